@@ -0,0 +1,112 @@
+"""Write a generated tree as one tar or zip archive instead of many files
+
+Over SMB/NFS every small file costs several round trips (create, write,
+close, rename). An archive is a single sequential stream that can be copied
+in one go and unpacked on the Jellyfin host. Entries are streamed one by
+one: tar archives (optionally gzip compressed) are written in stream mode
+and never seek, so they can go to stdout or a pipe and memory stays
+constant. Zip archives can be streamed too, but the format keeps one
+central directory record (a few hundred bytes) per entry until the end.
+
+    export_archive(session.file_contents, "library.tar.gz")
+    export_archive(file_contents, "-", ARCHIVE_TAR)  # To stdout
+"""
+import io
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import namedtuple
+
+import strm_engine
+
+ARCHIVE_TAR = "tar"
+ARCHIVE_TAR_GZ = "tar.gz"
+ARCHIVE_ZIP = "zip"
+ARCHIVE_FORMATS = (ARCHIVE_TAR, ARCHIVE_TAR_GZ, ARCHIVE_ZIP)
+
+# File dialog filter matching ARCHIVE_FORMATS
+ARCHIVE_FILE_TYPES = [("Tar archive", "*.tar"), ("Compressed tar archive", "*.tar.gz *.tgz"), ("Zip archive", "*.zip")]
+
+ExportResult = namedtuple("ExportResult", "files bytes")
+
+
+def archive_format(path):
+    """Guess the archive format from a file name; raises ValueError if it has no known extension"""
+    name = path.lower()
+    if name.endswith((".tar.gz", ".tgz")):
+        return ARCHIVE_TAR_GZ
+    if name.endswith(".tar"):
+        return ARCHIVE_TAR
+    if name.endswith(".zip"):
+        return ARCHIVE_ZIP
+    raise ValueError(f"Unknown archive type: {path} (use .tar, .tar.gz, .tgz or .zip)")
+
+
+def _entry_name(file_name):
+    """Archive member name: relative, with "/" separators"""
+    return file_name.replace("\\", "/").lstrip("/")
+
+
+def write_archive(file_contents, stream, fmt, progress=None, output_format=None):
+    """Stream every file of file_contents into stream (a binary file object) as fmt
+
+    progress, if given, is called as progress(files written) every 1000
+    files. Entries are converted by output_format (an
+    output_formats.OutputFormat), if given. Returns an ExportResult.
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+    mtime = int(time.time())  # Whole seconds: a fractional mtime would need an extra PAX header per entry
+    files = 0
+    size = 0
+    if fmt == ARCHIVE_ZIP:
+        date_time = time.localtime(mtime)[:6]
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+            for file_name, content in strm_engine.output_items(file_contents, output_format):
+                data = content.encode("utf-8")
+                info = zipfile.ZipInfo(_entry_name(file_name), date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                archive.writestr(info, data)
+                files += 1
+                size += len(data)
+                if progress is not None and not files % 1000:
+                    progress(files)
+    else:
+        mode = "w|gz" if fmt == ARCHIVE_TAR_GZ else "w|"
+        with tarfile.open(fileobj=stream, mode=mode, format=tarfile.PAX_FORMAT) as archive:
+            for file_name, content in strm_engine.output_items(file_contents, output_format):
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(_entry_name(file_name))
+                info.size = len(data)
+                info.mtime = mtime
+                info.mode = 0o644
+                archive.addfile(info, io.BytesIO(data))
+                archive.members.clear()  # TarFile remembers every member; nothing reads them back here
+                files += 1
+                size += len(data)
+                if progress is not None and not files % 1000:
+                    progress(files)
+    return ExportResult(files, size)
+
+
+def export_archive(file_contents, path, fmt=None, progress=None, output_format=None):
+    """Write file_contents as an archive to path ("-" for stdout); fmt defaults to the extension of path"""
+    if path == "-":
+        return write_archive(file_contents, sys.stdout.buffer, fmt or ARCHIVE_TAR, progress, output_format)
+    fmt = fmt or archive_format(path)
+    # Written under a temporary name so an interrupted export never looks complete
+    temp_path = path + ".part"
+    try:
+        with open(temp_path, "wb") as stream:
+            result = write_archive(file_contents, stream, fmt, progress, output_format)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return result
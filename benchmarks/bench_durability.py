@@ -0,0 +1,75 @@
+"""Throughput of the .strm writer in each durability mode
+
+Writes the same set of files once per mode and prints files/sec, so the
+cost of atomic replace and fsync can be compared on the target storage:
+
+    python benchmarks/bench_durability.py --files 5000 --target /mnt/nas/bench
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import strm_engine  # noqa: E402
+
+
+def make_contents(count):
+    """Build file contents laid out like a multi-season show"""
+    return {
+        os.path.join(f"Season {index // 100 + 1:02d}", f"S{index // 100 + 1:02d}E{index % 100 + 1:02d}.strm"):
+            f"http://example.com/stream/{index}.mkv"
+        for index in range(count)
+    }
+
+
+def run_mode(target, file_contents, durability, workers):
+    """Write all files in one mode, returns elapsed seconds"""
+    folder = tempfile.mkdtemp(prefix=f"bench-{durability}-", dir=target)
+    try:
+        start = time.perf_counter()
+        job = strm_engine.GenerationJob(folder, file_contents, workers, force=True, durability=durability).start()
+        job.wait()
+        elapsed = time.perf_counter() - start
+        if job.errors:
+            raise job.errors[0][1]
+        return elapsed
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="files per mode (default %(default)s)")
+    parser.add_argument("--workers", type=int, default=strm_engine.DEFAULT_WORKERS)
+    parser.add_argument("--target", default=None, help="folder on the storage to test (default: system temp)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    target = args.target or tempfile.gettempdir()
+    file_contents = make_contents(args.files)
+
+    results = []
+    for durability in strm_engine.DURABILITY_MODES:
+        elapsed = run_mode(target, file_contents, durability, args.workers)
+        results.append({
+            "mode": durability,
+            "files": args.files,
+            "seconds": round(elapsed, 4),
+            "files_per_sec": round(args.files / elapsed, 1) if elapsed else None,
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['mode']:>7}: {result['files_per_sec']:>10} files/s ({result['seconds']} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
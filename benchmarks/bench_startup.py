@@ -0,0 +1,78 @@
+"""Import time of the headless entry point
+
+Imports strm_cli (and with it the engine) in fresh interpreters, prints the
+median import time and fails if it exceeds strm_cli.IMPORT_BUDGET_MS or if
+any GUI module was imported on the way:
+
+    python benchmarks/bench_startup.py --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GUI_MODULES = ("tkinter", "_tkinter", "customtkinter", "virtual_list", "jellyfin_strm_generator")
+
+# Runs in the child interpreter; prints import milliseconds and any GUI modules loaded
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import strm_cli
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed)
+print(",".join(name for name in {GUI_MODULES!r} if name in sys.modules))
+"""
+
+
+def measure_once():
+    """Return (milliseconds, GUI modules imported) for one fresh interpreter"""
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name] if len(output) > 1 else []
+
+
+def main(argv=None):
+    import strm_cli
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters to measure (default %(default)s)")
+    parser.add_argument("--budget", type=float, default=strm_cli.IMPORT_BUDGET_MS,
+                        help="allowed median import time in ms (default %(default)s)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    timings = []
+    gui_modules = set()
+    for _ in range(args.runs):
+        elapsed, modules = measure_once()
+        timings.append(elapsed)
+        gui_modules.update(modules)
+
+    median = statistics.median(timings)
+    result = {
+        "runs": args.runs,
+        "median_ms": round(median, 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "budget_ms": args.budget,
+        "gui_modules": sorted(gui_modules),
+        "ok": median <= args.budget and not gui_modules,
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import strm_cli: median {result['median_ms']} ms "
+              f"(min {result['min_ms']}, max {result['max_ms']}, budget {args.budget} ms)")
+        if gui_modules:
+            print(f"GUI modules imported on the headless path: {', '.join(result['gui_modules'])}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
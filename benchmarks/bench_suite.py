@@ -0,0 +1,369 @@
+"""Throughput of the hot paths at 10 to 100k entries
+
+Core cases run headless against strm_engine. Widget cases drive the two GUIs
+(setup_series, update_file_list, on_file_select, generate_stmr_files) and
+need a display; on a headless machine run them under Xvfb:
+
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    xvfb-run python benchmarks/bench_suite.py --baseline benchmarks/baseline.json
+
+Results are printed as a table or, with --json, as JSON. With --baseline
+every case that got slower than the stored result by more than --tolerance
+is reported as a regression and the exit code is 1.
+
+Timings only compare on the machine that produced them, so no baseline is
+shipped: save one on each machine (or CI runner) before using --baseline.
+The baseline records its Python version and platform, and a comparison
+against a baseline from elsewhere prints a warning.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import strm_engine  # noqa: E402
+
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown against the baseline (25 %)
+MIN_SLACK_SECONDS = 0.002  # Differences below this are timer noise, never regressions
+SELECT_SAMPLES = 200  # File switches measured per size
+
+
+def timed(function, repeat):
+    """Return the best wall time of repeat calls to function"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def sample_files(files, count=SELECT_SAMPLES):
+    """Return up to count files spread evenly over the list"""
+    step = max(1, len(files) // count)
+    return files[::step][:count]
+
+
+def series_session(size):
+    """Return a session with size episodes, every other one filled in"""
+    session = strm_engine.StrmSession()
+    session.setup_series(size)
+    for index, file in enumerate(session.files):
+        if index % 2:
+            session.file_contents[file] = f"http://example.com/stream/{index}.mkv"
+    return session
+
+
+# --- core (headless) cases ---
+# Each case takes (size, repeat, scratch folder) and returns (seconds, operations)
+
+def core_setup_series(size, repeat, scratch):
+    session = strm_engine.StrmSession()
+    return timed(lambda: session.setup_series(size), repeat), size
+
+
+def core_search(size, repeat, scratch):
+    session = series_session(size)
+
+    def search():
+        session.search_index = None  # Include building the index, like the first keystroke after a change
+        session.search("e1")
+
+    return timed(search, repeat), size
+
+
+def core_select(size, repeat, scratch):
+    # What on_file_select and rapid entry do besides drawing: store, then find the next empty file
+    session = series_session(size)
+    files = sample_files(session.files)
+
+    def select():
+        for file in files:
+            session.set_content(file, session.file_contents[file])
+            session.next_empty_file(file)
+
+    return timed(select, repeat), len(files)
+
+
+def core_generate(size, repeat, scratch):
+    session = series_session(size)
+
+    def generate():
+        folder = tempfile.mkdtemp(dir=scratch)
+        try:
+            job = session.start_generation(folder)
+            job.wait()
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    return timed(generate, repeat), size
+
+
+def core_generate_unchanged(size, repeat, scratch):
+    session = series_session(size)
+    folder = tempfile.mkdtemp(dir=scratch)
+    session.start_generation(folder).wait()
+    return timed(lambda: session.start_generation(folder).wait(), repeat), size
+
+
+CORE_CASES = [
+    ("core.setup_series", core_setup_series),
+    ("core.search", core_search),
+    ("core.select", core_select),
+    ("core.generate", core_generate),
+    ("core.generate_unchanged", core_generate_unchanged),
+]
+
+
+# --- widget cases (need a display) ---
+
+class WidgetBench:
+    """Both GUIs without their startup dialogs, with journals in a scratch folder"""
+
+    def __init__(self, scratch):
+        import tkinter as tk
+        import jellyfin_strm_generator
+        import stmr_file_creator
+        from tkinter import messagebox
+
+        jellyfin_strm_generator.DEFAULT_JOURNAL_DIR = scratch
+        stmr_file_creator.DEFAULT_JOURNAL_DIR = scratch
+        messagebox.showinfo = lambda *args, **kwargs: "ok"  # generate_stmr_files reports with a dialog
+
+        class Generator(jellyfin_strm_generator.JellyfinStrmGenerator):
+            def initialize_app(self):
+                self.current_folder = scratch
+
+        class Creator(stmr_file_creator.StrmFileCreator):
+            def restore_session(self):
+                self.current_folder = scratch
+                return True
+
+        self.scratch = scratch
+        self.ctk_root = jellyfin_strm_generator.ctk.CTk()
+        self.generator = Generator(self.ctk_root)
+        self.tk_root = tk.Toplevel(self.ctk_root)
+        self.creator = Creator(self.tk_root)
+        self.flush()
+
+    def flush(self):
+        """Process pending redraws so they are part of the measurement"""
+        self.ctk_root.update_idletasks()
+        self.ctk_root.update()
+
+    def close(self):
+        self.generator.journal.close()
+        self.creator.journal.close()
+        self.ctk_root.destroy()
+
+    def load_creator(self, size):
+        """Give the STMR creator size files"""
+        from file_index import FileIndex
+
+        creator = self.creator
+        creator.files = [f"file_{index:06d}.stmr" for index in range(size)]
+        creator.file_contents = {file: f"http://example.com/{file}" for file in creator.files}
+        creator.file_index = FileIndex(creator.files, creator.file_contents)
+        creator.current_file = creator.files[0]
+
+    def jellyfin_setup_series(self, size, repeat, scratch):
+        def setup():
+            self.generator.current_file = ""
+            self.generator.setup_series(size)
+            self.flush()
+
+        return timed(setup, repeat), size
+
+    def jellyfin_update_file_list(self, size, repeat, scratch):
+        self.generator.session.setup_series(size)
+
+        def update():
+            self.generator.update_file_list()
+            self.flush()
+
+        return timed(update, repeat), size
+
+    def jellyfin_on_file_select(self, size, repeat, scratch):
+        self.generator.current_file = ""
+        self.generator.setup_series(size)
+        files = sample_files(self.generator.files)
+
+        def select():
+            for file in files:
+                self.generator.on_file_select(file)
+                self.flush()
+
+        return timed(select, repeat), len(files)
+
+    def stmr_update_file_list(self, size, repeat, scratch):
+        self.load_creator(size)
+
+        def update():
+            self.creator.update_file_list()
+            self.flush()
+
+        return timed(update, repeat), size
+
+    def stmr_on_file_select(self, size, repeat, scratch):
+        self.load_creator(size)
+        self.creator.update_file_list()
+        listbox = self.creator.file_listbox
+        indexes = sample_files(list(range(size)))
+
+        def select():
+            for index in indexes:
+                listbox.selection_clear(0, "end")
+                listbox.selection_set(index)
+                self.creator.on_file_select(None)
+                self.flush()
+
+        return timed(select, repeat), len(indexes)
+
+    def stmr_generate(self, size, repeat, scratch):
+        self.load_creator(size)
+
+        def generate():
+            folder = tempfile.mkdtemp(dir=scratch)
+            self.creator.current_folder = folder
+            try:
+                self.creator.generate_stmr_files().wait()
+                self.flush()  # Let the status bar see the finished job
+            finally:
+                shutil.rmtree(folder, ignore_errors=True)
+
+        return timed(generate, repeat), size
+
+    def cases(self):
+        return [
+            ("widget.jellyfin.setup_series", self.jellyfin_setup_series),
+            ("widget.jellyfin.update_file_list", self.jellyfin_update_file_list),
+            ("widget.jellyfin.on_file_select", self.jellyfin_on_file_select),
+            ("widget.stmr.update_file_list", self.stmr_update_file_list),
+            ("widget.stmr.on_file_select", self.stmr_on_file_select),
+            ("widget.stmr.generate", self.stmr_generate),
+        ]
+
+
+def open_widget_bench(scratch):
+    """Return a WidgetBench, or None if no display is available"""
+    try:
+        return WidgetBench(scratch)
+    except ImportError as e:
+        print(f"skipping widget cases: {e}", file=sys.stderr)
+    except Exception as e:  # tkinter.TclError without a display
+        print(f"skipping widget cases (no display? run under xvfb-run): {e}", file=sys.stderr)
+    return None
+
+
+def run_cases(cases, sizes, repeat, scratch, pattern):
+    """Run every case at every size, returns result dicts"""
+    results = []
+    for name, case in cases:
+        if pattern and pattern not in name:
+            continue
+        for size in sizes:
+            seconds, operations = case(size, repeat, scratch)
+            results.append({
+                "name": name,
+                "size": size,
+                "seconds": round(seconds, 6),
+                "ops_per_sec": round(operations / seconds, 1) if seconds else None,
+            })
+            print(f"{name:<34} {size:>7} {seconds * 1000:>10.2f} ms", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the results that are slower than the baseline by more than tolerance"""
+    previous = {(result["name"], result["size"]): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        limit = max(before["seconds"] * (1 + tolerance), before["seconds"] + MIN_SLACK_SECONDS)
+        if result["seconds"] > limit:
+            regressions.append(dict(result, baseline_seconds=before["seconds"],
+                                    slowdown=round(result["seconds"] / before["seconds"], 2)))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated entry counts (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best one counts (default %(default)s)")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this text")
+    widgets = parser.add_mutually_exclusive_group()
+    widgets.add_argument("--widgets", action="store_true", help="fail if the widget cases cannot run")
+    widgets.add_argument("--no-widgets", action="store_true", help="only run the headless cases")
+    parser.add_argument("--target", default=None, help="scratch folder for generated files (default: system temp)")
+    parser.add_argument("--baseline", help="compare against results saved with --save-baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline (default %(default)s)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store the results as the new baseline")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            print(f"error: no baseline at {args.baseline}; create one on this machine with --save-baseline",
+                  file=sys.stderr)
+            return 2
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    scratch = tempfile.mkdtemp(prefix="strm-bench-", dir=args.target)
+    try:
+        results = run_cases(CORE_CASES, sizes, args.repeat, scratch, args.filter)
+
+        bench = None if args.no_widgets else open_widget_bench(scratch)
+        if bench is None and args.widgets:
+            return 2
+        if bench is not None:
+            try:
+                results += run_cases(bench.cases(), sizes, args.repeat, scratch, args.filter)
+            finally:
+                bench.close()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if baseline is not None:
+        if (baseline.get("python"), baseline.get("platform")) != (report["python"], report["platform"]):
+            print(f"warning: baseline was recorded with Python {baseline.get('python')} on "
+                  f"{baseline.get('platform')}; timings may not be comparable", file=sys.stderr)
+        report["regressions"] = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for result in results:
+            print(f"{result['name']:<34} {result['size']:>7} {result['seconds'] * 1000:>10.2f} ms "
+                  f"{result['ops_per_sec'] or 0:>12.1f} ops/s")
+        for regression in report.get("regressions", []):
+            print(f"REGRESSION {regression['name']} @ {regression['size']}: "
+                  f"{regression['seconds']} s vs {regression['baseline_seconds']} s ({regression['slowdown']}x)")
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
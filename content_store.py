@@ -0,0 +1,183 @@
+"""SQLite-backed replacement for the file_contents dict
+
+SqliteContentStore behaves like the ordered {file name: URL} dict used by
+StrmSession and the writer, but keeps the rows in an SQLite database. The
+show, season and episode of every file are derived from its path and
+indexed, together with an "is empty" flag, so queries such as "all empty
+episodes" or "everything under show X" stay fast at millions of rows and
+do not need every URL in memory.
+
+    store = SqliteContentStore("library.db")
+    session = strm_engine.StrmSession(store)
+
+Use ":memory:" as path for a store that lives only as long as the process.
+"""
+import sqlite3
+from collections.abc import MutableMapping
+
+from strm_engine import parse_episode_file_name, show_from_path
+
+BATCH_SIZE = 10000  # Rows per executemany() when loading many files at once
+
+# position is the rowid, so rows are stored (and scanned) in insertion order
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    position INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    show TEXT NOT NULL,
+    season INTEGER,
+    episode INTEGER,
+    url TEXT NOT NULL,
+    empty INTEGER NOT NULL
+);
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS files_show ON files (show, season, episode);
+CREATE INDEX IF NOT EXISTS files_empty ON files (empty) WHERE empty = 1;
+"""
+_DROP_INDEXES = """
+DROP INDEX IF EXISTS files_show;
+DROP INDEX IF EXISTS files_empty;
+"""
+
+_UPSERT = """
+INSERT INTO files (path, position, show, season, episode, url, empty) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET url = excluded.url, empty = excluded.empty
+"""
+
+
+def _row(file_name, position, url):
+    """Return the column values stored for one file"""
+    episode = parse_episode_file_name(file_name) or (None, None)
+    return (file_name, position, show_from_path(file_name), episode[0], episode[1],
+            url, 0 if url.strip() else 1)
+
+
+class SqliteContentStore(MutableMapping):
+    """Ordered file name -> content mapping stored in SQLite
+
+    Iteration follows insertion order, like a dict. Replacing the content of
+    an existing file keeps its position.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        # Writer threads read rows through this connection (see GenerationJob); SQLite serializes the access
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA + _INDEXES)
+        self._next_position = self._scalar("SELECT COALESCE(MAX(position), -1) + 1 FROM files")
+
+    def _scalar(self, sql, parameters=()):
+        return self.connection.execute(sql, parameters).fetchone()[0]
+
+    def __getitem__(self, file_name):
+        row = self.connection.execute("SELECT url FROM files WHERE path = ?", (file_name,)).fetchone()
+        if row is None:
+            raise KeyError(file_name)
+        return row[0]
+
+    def __setitem__(self, file_name, content):
+        with self.connection:
+            self.connection.execute(_UPSERT, _row(file_name, self._next_position, content))
+        self._next_position += 1
+
+    def __delitem__(self, file_name):
+        with self.connection:
+            deleted = self.connection.execute("DELETE FROM files WHERE path = ?", (file_name,)).rowcount
+        if not deleted:
+            raise KeyError(file_name)
+
+    def __contains__(self, file_name):
+        return self.connection.execute("SELECT 1 FROM files WHERE path = ?", (file_name,)).fetchone() is not None
+
+    def __iter__(self):
+        for row in self.connection.execute("SELECT path FROM files ORDER BY position"):
+            yield row[0]
+
+    def __len__(self):
+        return self._scalar("SELECT COUNT(*) FROM files")
+
+    def get(self, file_name, default=None):
+        row = self.connection.execute("SELECT url FROM files WHERE path = ?", (file_name,)).fetchone()
+        return default if row is None else row[0]
+
+    def items(self):
+        """Yield (file name, content) pairs in order from one query, like iter_items()"""
+        return self.iter_items()
+
+    def iter_items(self):
+        """Yield (file name, content) pairs in order without loading them all at once"""
+        yield from self.connection.execute("SELECT path, url FROM files ORDER BY position")
+
+    def values(self):
+        """Yield the contents in order without loading them all at once"""
+        for row in self.connection.execute("SELECT url FROM files ORDER BY position"):
+            yield row[0]
+
+    def update(self, pairs=(), **kwargs):
+        """Insert or replace many (file name, content) pairs in one transaction"""
+        if isinstance(pairs, dict):
+            pairs = pairs.items()
+        batch = []
+        with self.connection:
+            for file_name, content in pairs:
+                batch.append(_row(file_name, self._next_position, content))
+                self._next_position += 1
+                if len(batch) >= BATCH_SIZE:
+                    self.connection.executemany(_UPSERT, batch)
+                    batch = []
+            if batch:
+                self.connection.executemany(_UPSERT, batch)
+        if kwargs:
+            self.update(kwargs.items())
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM files")
+        self._next_position = 0
+
+    def replace(self, pairs):
+        """Replace every file with the given (file name, content) pairs
+
+        The secondary indexes are dropped while loading and rebuilt once
+        afterwards, which is much faster than updating them row by row.
+        """
+        self.clear()
+        self.connection.executescript(_DROP_INDEXES)
+        try:
+            self.update(pairs)
+        finally:
+            self.connection.executescript(_INDEXES)
+
+    def files(self):
+        """Return all file names in order"""
+        return [row[0] for row in self.connection.execute("SELECT path FROM files ORDER BY position")]
+
+    def empty_files(self):
+        """Return the names of files that have no content (uses the partial index)"""
+        return [row[0] for row in self.connection.execute(
+            "SELECT path FROM files WHERE empty = 1 ORDER BY position")]
+
+    def count_empty(self):
+        """Return the number of files that have no content"""
+        return self._scalar("SELECT COUNT(*) FROM files WHERE empty = 1")
+
+    def shows(self):
+        """Return the distinct show names"""
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT show FROM files ORDER BY show")]
+
+    def files_for_show(self, show, season=None):
+        """Return the files of one show (optionally one season) ordered by season and episode"""
+        if season is None:
+            cursor = self.connection.execute(
+                "SELECT path FROM files WHERE show = ? ORDER BY season, episode, position", (show,))
+        else:
+            cursor = self.connection.execute(
+                "SELECT path FROM files WHERE show = ? AND season = ? ORDER BY episode, position", (show, season))
+        return [row[0] for row in cursor]
+
+    def close(self):
+        """Close the database"""
+        self.connection.close()
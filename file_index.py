@@ -0,0 +1,116 @@
+"""As-you-type search over file names and their URLs
+
+FileIndex keeps one lowercase "name + URL" string per file, in a list
+parallel to the file names, and the results of recent queries. Matching
+runs in C (itertools.compress over operator.contains), and since typing
+usually extends the previous query - anything matching "s02e1" also matches
+"s02e" - each keystroke only re-checks the files that matched one character
+ago instead of the whole list. Deleting a character returns the cached
+result directly. Changing a file updates its string and drops only the
+cached results that contained it. The strings are only built on the first
+real search, so an index over lazily loaded contents costs nothing until
+somebody filters.
+"""
+from collections import OrderedDict
+from itertools import compress, repeat
+from operator import contains
+
+MAX_CACHED_QUERIES = 64
+
+
+class FileIndex:
+    """Substring index over file names and contents, in list order"""
+
+    def __init__(self, files=(), file_contents=None):
+        self.files = []
+        self.texts = None  # Lowercase searchable text of files[i], built on the first search
+        self.positions = {}  # file name -> index in files
+        self.file_contents = None  # Source of the texts until they are built
+        self.cache = OrderedDict()  # lowercase query -> (files, texts), most recently used last
+        self.rebuild(files, file_contents or {})
+
+    @staticmethod
+    def searchable(file_name, content):
+        """Return the text a file is matched against"""
+        return f"{file_name}\n{content}".lower()
+
+    def rebuild(self, files, file_contents):
+        """Index a new list of files"""
+        self.files = list(files)
+        self.positions = {file: index for index, file in enumerate(self.files)}
+        self.file_contents = file_contents
+        self.texts = None
+        self.cache.clear()
+
+    def _build_texts(self):
+        """Build the searchable texts from the contents given to rebuild()"""
+        file_contents = self.file_contents
+        if not isinstance(file_contents, dict):
+            file_contents = dict(file_contents.items())  # One bulk read for lazy or database-backed contents
+        self.texts = [self.searchable(file, file_contents.get(file, "")) for file in self.files]
+        self.file_contents = None
+
+    def _forget_queries(self, *texts):
+        """Drop the cached results any of texts matched"""
+        for query in [query for query in self.cache if any(query in text for text in texts)]:
+            del self.cache[query]
+
+    def update(self, file_name, content):
+        """Re-index one file after its content changed (or add it at the end)"""
+        index = self.positions.get(file_name)
+        if self.texts is None:
+            if index is None:  # Its text is built with the others from the contents
+                self.positions[file_name] = len(self.files)
+                self.files.append(file_name)
+            return
+
+        text = self.searchable(file_name, content)
+        if index is None:
+            self.positions[file_name] = len(self.files)
+            self.files.append(file_name)
+            self.texts.append(text)
+            self._forget_queries(text)
+        else:
+            self._forget_queries(self.texts[index], text)
+            self.texts[index] = text
+
+    def remove(self, file_name):
+        """Forget one file"""
+        index = self.positions.pop(file_name, None)
+        if index is None:
+            return
+        if self.texts is not None:
+            self._forget_queries(self.texts[index])
+            del self.texts[index]
+        del self.files[index]
+        for file in self.files[index:]:
+            self.positions[file] -= 1
+
+    def search(self, query):
+        """Return the files whose name or content contains query, in list order"""
+        query = query.strip().lower()
+        if not query:
+            return self.files
+
+        cached = self.cache.get(query)
+        if cached is not None:
+            self.cache.move_to_end(query)
+            return cached[0]
+
+        if self.texts is None:
+            self._build_texts()
+
+        # Narrow down the result of the longest cached prefix of the query
+        files, texts = self.files, self.texts
+        for length in range(len(query) - 1, 0, -1):
+            cached = self.cache.get(query[:length])
+            if cached is not None:
+                files, texts = cached
+                break
+
+        matches = list(map(contains, texts, repeat(query)))
+        result = (list(compress(files, matches)), list(compress(texts, matches)))
+        self.cache[query] = result
+        while len(self.cache) > MAX_CACHED_QUERIES:
+            self.cache.popitem(last=False)
+        return result[0]
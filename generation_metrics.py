@@ -0,0 +1,143 @@
+"""Timings of a generation run
+
+GenerationMetrics is filled in by the writer while a run is in progress:
+time spent per phase (creating folders, opening, writing, fsync, rename,
+hashing, manifest), a histogram of per-file latency, bytes written and
+files per second. report() returns everything as a JSON-ready dict.
+
+Listeners give the headless engine a callback API; each one is called from
+the worker threads as listener(file_name, status, seconds, size) after every
+file, so keep them cheap:
+
+    metrics = GenerationMetrics(listeners=[lambda name, status, seconds, size: print(name, seconds)])
+    strm_engine.GenerationJob(folder, file_contents, metrics=metrics).start().wait()
+    metrics.save_report("run.json")
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+# Phases, in the order they happen for one file
+PHASES = ("hash", "check", "mkdir", "open", "write", "fsync", "replace", "manifest", "ui")
+
+# Upper bounds of the latency histogram buckets in milliseconds; slower files land in a last open bucket
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class GenerationMetrics:
+    """Thread-safe phase timings and per-file latencies of one run"""
+
+    def __init__(self, listeners=()):
+        self.listeners = list(listeners)
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.phase_counts = dict.fromkeys(PHASES, 0)
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.statuses = {"created": 0, "updated": 0, "unchanged": 0}
+        self.files = 0
+        self.bytes_written = 0
+        self.latency_total = 0.0
+        self.latency_min = None
+        self.latency_max = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Call listener(file_name, status, seconds, size) after every file"""
+        self.listeners.append(listener)
+
+    def start(self):
+        """Mark the start of the run"""
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def finish(self):
+        """Mark the end of the run"""
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        """Seconds since start() (until finish(), once called)"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def add_phase(self, phase, seconds):
+        """Add time spent in one phase"""
+        with self._lock:
+            self.phase_seconds[phase] += seconds
+            self.phase_counts[phase] += 1
+
+    def file_done(self, file_name, status, seconds, size):
+        """Record one handled file; size is the number of bytes written (0 if skipped)"""
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.files += 1
+            self.statuses[status] += 1
+            self.bytes_written += size
+            self.latency_total += seconds
+            self.latency_max = max(self.latency_max, seconds)
+            self.latency_min = seconds if self.latency_min is None else min(self.latency_min, seconds)
+            self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        for listener in self.listeners:
+            listener(file_name, status, seconds, size)
+
+    def percentile(self, fraction):
+        """Estimate a latency percentile in milliseconds from the histogram (bucket upper bound)"""
+        if not self.files:
+            return None
+        rank = fraction * self.files
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.latency_max * 1000, 3)
+
+    def report(self):
+        """Return the metrics as a JSON-serializable dict"""
+        elapsed = self.elapsed
+        with self._lock:
+            return {
+                "version": 1,
+                "elapsed_seconds": round(elapsed, 6),
+                "files": self.files,
+                "statuses": dict(self.statuses),
+                "bytes_written": self.bytes_written,
+                "files_per_sec": round(self.files / elapsed, 1) if elapsed else None,
+                "bytes_per_sec": round(self.bytes_written / elapsed, 1) if elapsed else None,
+                # Summed over all worker threads, so the total can exceed elapsed_seconds
+                "phases": {
+                    phase: {"seconds": round(self.phase_seconds[phase], 6), "count": self.phase_counts[phase]}
+                    for phase in PHASES
+                },
+                "latency_ms": {
+                    "mean": round(self.latency_total / self.files * 1000, 3) if self.files else None,
+                    "min": round(self.latency_min * 1000, 3) if self.latency_min is not None else None,
+                    "max": round(self.latency_max * 1000, 3),
+                    "p50": self.percentile(0.5),
+                    "p90": self.percentile(0.9),
+                    "p99": self.percentile(0.99),
+                    "histogram": [
+                        {"le": bound, "count": count}
+                        for bound, count in zip(LATENCY_BUCKETS_MS + (None,), self.histogram)
+                    ],
+                },
+            }
+
+    def save_report(self, path):
+        """Write report() as JSON to path"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def summary(self):
+        """Human readable one-line summary"""
+        report = self.report()
+        slowest = max(PHASES, key=lambda phase: self.phase_seconds[phase])
+        return (f"{report['files_per_sec'] or 0:.0f} files/s, p90 {report['latency_ms']['p90'] or 0} ms/file, "
+                f"most time in {slowest}")
@@ -0,0 +1,142 @@
+"""Tell a Jellyfin server which folders changed after generation
+
+Jellyfin only shows new .strm files after a library scan. RefreshNotifier
+collects the files a run wrote, reduces them to their top-level (show)
+folders and, once no file was added for delay seconds, sends one
+POST /Library/Media/Updated listing those folders, so only they are
+rescanned. Writes in several batches (a sync pass, a run split into jobs)
+therefore end up in a single request. When more than max_paths folders
+changed, one full POST /Library/Refresh is sent instead.
+
+Hook it into a run through the metrics listener:
+
+    notifier = RefreshNotifier("http://jellyfin:8096", api_key, "/media/shows")
+    metrics = GenerationMetrics(listeners=[notifier.file_written])
+    ...
+    notifier.close()  # Sends what is still pending
+
+Failed requests are collected in errors; generation never fails because the
+server is unreachable. Only the standard library is used.
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_DELAY = 2.0  # Seconds without new files before the refresh is sent
+MAX_TARGETED_PATHS = 100  # More changed folders than this trigger a full library refresh
+DEFAULT_TIMEOUT = 10.0  # Seconds per request
+USER_AGENT = "strm-generator/1.0"
+
+
+class RefreshNotifier:
+    """Coalesce written files into debounced Jellyfin refresh requests"""
+
+    def __init__(self, server, api_key, server_folder, delay=DEFAULT_DELAY, max_paths=MAX_TARGETED_PATHS,
+                 timeout=DEFAULT_TIMEOUT):
+        self.server = server.rstrip("/")
+        self.api_key = api_key
+        self.server_folder = server_folder.rstrip("/\\")  # The target folder as the Jellyfin server sees it
+        self.delay = delay
+        self.max_paths = max_paths
+        self.timeout = timeout
+        self.requests_sent = 0
+        self.errors = []  # Messages of failed requests
+        self._pending = {}  # top-level folder -> "Created" or "Modified"
+        self._last_added = 0.0
+        self._closed = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def folder_of(file_name):
+        """Top-level folder of a relative file name ("" for files in the target folder itself)"""
+        parts = file_name.replace("\\", "/").split("/")
+        return parts[0] if len(parts) > 1 else ""
+
+    def server_path(self, folder):
+        """Path of a top-level folder on the Jellyfin server"""
+        return f"{self.server_folder}/{folder}" if folder else self.server_folder
+
+    def file_written(self, file_name, status, seconds=None, size=None):
+        """GenerationMetrics listener: queue the folder of a created or updated file"""
+        if status == "unchanged":
+            return
+        self.add(file_name, "Created" if status == "created" else "Modified")
+
+    def add(self, file_name, update_type="Modified"):
+        """Queue a refresh of the folder of file_name"""
+        folder = self.folder_of(file_name)
+        with self._condition:
+            if self._pending.get(folder) != "Created":
+                self._pending[folder] = update_type  # A new file makes the folder "Created"
+            self._last_added = time.monotonic()
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="jellyfin-notify", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Send the pending refresh once nothing was added for delay seconds"""
+        with self._condition:
+            while not self._closed:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                remaining = self._last_added + self.delay - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                pending, self._pending = self._pending, {}
+                self._condition.release()
+                try:
+                    self._send(pending)
+                finally:
+                    self._condition.acquire()
+
+    def _take(self):
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self):
+        """Send what is pending now, without waiting for the delay"""
+        pending = self._take()
+        if pending:
+            self._send(pending)
+
+    def close(self):
+        """Send what is pending and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _send(self, pending):
+        """Send one request for the folders in pending"""
+        if len(pending) > self.max_paths:
+            self._post("/Library/Refresh", None)
+            return
+        updates = [{"Path": self.server_path(folder), "UpdateType": update_type}
+                   for folder, update_type in sorted(pending.items())]
+        self._post("/Library/Media/Updated", {"Updates": updates})
+
+    def _post(self, endpoint, body):
+        """POST body as JSON to the server; failures are recorded in errors"""
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        request = urllib.request.Request(self.server + endpoint, data=data, method="POST", headers={
+            "Content-Type": "application/json",
+            "User-Agent": USER_AGENT,
+            "X-Emby-Token": self.api_key,
+            "Authorization": f'MediaBrowser Token="{self.api_key}"',
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+            self.requests_sent += 1
+        except urllib.error.HTTPError as e:
+            self.errors.append(f"{endpoint}: HTTP {e.code}")
+        except (OSError, ValueError) as e:
+            self.errors.append(f"{endpoint}: {e}")
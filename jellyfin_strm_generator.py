@@ -1,21 +1,30 @@
 import os
 import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
-# Ensure proper path to customtkinter package
+# customtkinter is a declared requirement; it is not installed at runtime
 try:
     import customtkinter as ctk
-except ImportError:
-    # If import fails, try to install package automatically
-    print("Installing customtkinter library...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "customtkinter"])
-    import customtkinter as ctk
+except ImportError as e:
+    raise ImportError("The GUI needs customtkinter, install it with: pip install customtkinter") from e
+
+import archive_export
+import library_reader
+import output_formats
+import reconcile
+import strm_engine
+from session_journal import DEFAULT_JOURNAL_DIR, SessionJournal
+from virtual_list import VirtualFileList
 
 # Basic constants
 ACCENT_COLOR = "#3a7ebf"  # main accent color
 MODERN_FONT = "Segoe UI"  # modern font for Windows
+PROGRESS_POLL_MS = 100  # how often the progress window polls a running generation job
+SELECT_LATENCY_BUDGET_MS = 16  # one frame at 60 Hz; slower file switches are reported in the status bar
+GENERATION_REPORT_FILE_NAME = "last_generation.json"  # timings of the last run, next to the session journal
 
 class JellyfinStrmGenerator:
     def __init__(self, root):
@@ -30,12 +39,14 @@ class JellyfinStrmGenerator:
         
         # Variables
         self.current_folder = ""
-        self.content_type = ""  # "movie" or "series"
-        self.season_number = 1  # Default season number
-        self.files = []
-        self.file_contents = {}
+        self.mirror_folders = []  # Further targets written together with current_folder
+        self.session = strm_engine.StrmSession()  # Files, contents, type and season
+        # Every edit is journaled so a crash or closed window doesn't lose it
+        self.journal = SessionJournal(os.path.join(DEFAULT_JOURNAL_DIR, "jellyfin_strm_generator"))
+        self.session.attach_journal(self.journal)
         self.current_file = ""
-        self.current_selected_file_btn = None  # To track currently selected file
+        self.select_latency_ms = 0.0  # Duration of the last file switch
+        self.filter_query = ""  # Text of the file list filter when it was last applied
         self.dialogs = []  # List of active dialogs
         
         # Set application icon
@@ -59,9 +70,27 @@ class JellyfinStrmGenerator:
         
         # Initialize
         self.initialize_app()
+    
+    @property
+    def files(self):
+        """File names of the current session"""
+        return self.session.files
+    
+    @property
+    def file_contents(self):
+        """File contents of the current session"""
+        return self.session.file_contents
         
     def on_close(self):
         """Method called when main window is closed"""
+        # Fold the journal into a snapshot so the next start restores instantly
+        try:
+            self.save_current_content()
+            self.journal.compact()
+            self.journal.close()
+        except OSError:
+            pass
+        
         # Close all open dialogs
         for dialog in self.dialogs:
             try:
@@ -74,6 +103,10 @@ class JellyfinStrmGenerator:
     def initialize_app(self):
         """Initialize the application"""
         try:
+            # Offer to continue the previous session
+            if self.offer_session_restore():
+                return
+            
             self.set_status("Select folder to save files...")
             
             # Select initial folder
@@ -82,9 +115,19 @@ class JellyfinStrmGenerator:
                 self.root.destroy()
                 return
                 
+            # Edit the files already in the folder instead of starting from scratch
+            existing = library_reader.scan_library(folder, (strm_engine.STRM_EXTENSION,))
+            if existing and messagebox.askyesno(
+                "Existing files",
+                f"This folder already contains {len(existing)} .strm files.\n\nOpen them for editing?"
+            ):
+                self.open_library(folder, existing)
+                return
+            
             self.current_folder = folder
+            self.journal.record_meta(folder=folder)
             # Update displayed folder in UI
-            self.folder_label.configure(text=f"Target folder: {self.current_folder}")
+            self.update_folder_label()
             self.set_status("Folder selected, choose content type...")
             
             # Choose content type
@@ -93,6 +136,37 @@ class JellyfinStrmGenerator:
             messagebox.showerror("Error", f"An error occurred during application initialization: {str(e)}")
             self.root.destroy()
             
+    def offer_session_restore(self):
+        """Restore the journaled session if the user wants to; returns True if restored"""
+        try:
+            state = self.journal.load()
+        except OSError:
+            state = None
+        if state is None or not state.files:
+            self.journal.clear()
+            return False
+        
+        folder = state.meta.get("folder", "")
+        if not messagebox.askyesno(
+            "Restore session",
+            f"Restore the previous session with {len(state.files)} files?\n\nTarget folder: {folder or 'not selected'}"
+        ):
+            self.journal.clear()
+            return False
+        
+        self.session.restore(state)
+        self.current_folder = folder
+        self.mirror_folders = list(state.meta.get("mirrors") or [])
+        self.update_folder_label()
+        self.update_type_badge()
+        self.update_file_list()
+        
+        current_file = state.meta.get("current_file")
+        self.current_file = ""
+        self.on_file_select(current_file if current_file in self.file_contents else self.files[0])
+        self.set_status(f"Restored previous session ({len(self.files)} files)")
+        return True
+    
     def setup_ui(self):
         """Create UI components"""
         # Main container with padding
@@ -155,6 +229,16 @@ class JellyfinStrmGenerator:
         )
         self.file_count.pack(fill="x", pady=(0, 10))
         
+        # Filter box, narrows the list by file name or URL as you type
+        self.filter_entry = ctk.CTkEntry(
+            self.left_frame,
+            placeholder_text="Filter by name or URL...",
+            font=(MODERN_FONT, 13)
+        )
+        self.filter_entry.pack(fill="x", pady=(0, 10))
+        self.filter_entry.bind("<KeyRelease>", self.apply_filter)
+        self.filter_entry.bind("<Escape>", self.clear_filter)
+        
         # File list with border
         self.filelist_container = ctk.CTkFrame(
             self.left_frame, 
@@ -163,15 +247,13 @@ class JellyfinStrmGenerator:
         )
         self.filelist_container.pack(fill="both", expand=True, pady=(0, 10))
         
-        # File list - scrollable frame
-        self.file_scrollable_frame = ctk.CTkScrollableFrame(
-            self.filelist_container, 
-            fg_color="transparent"
+        # File list - virtualized, only visible rows have buttons
+        self.file_list = VirtualFileList(
+            self.filelist_container,
+            command=self.on_file_select,
+            selected_color=ACCENT_COLOR
         )
-        self.file_scrollable_frame.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        # Dynamic file buttons will be added in update_file_list
-        self.file_buttons = {}
+        self.file_list.pack(fill="both", expand=True, padx=5, pady=5)
         
         # Buttons for operations
         self.button_frame = ctk.CTkFrame(self.left_frame, fg_color="transparent")
@@ -201,6 +283,36 @@ class JellyfinStrmGenerator:
         )
         self.change_type_button.grid(row=0, column=1, sticky="ew")
         
+        # Check URLs button
+        self.check_urls_button = ctk.CTkButton(
+            self.button_frame,
+            text="Check URLs",
+            command=self.check_urls,
+            fg_color=("#d1d5db", "#4b5563"),
+            font=(MODERN_FONT, 13)
+        )
+        self.check_urls_button.grid(row=1, column=0, sticky="ew", padx=(0, 5), pady=(5, 0))
+        
+        # Import playlist button
+        self.import_button = ctk.CTkButton(
+            self.button_frame,
+            text="Import M3U",
+            command=self.import_playlist,
+            fg_color=("#d1d5db", "#4b5563"),
+            font=(MODERN_FONT, 13)
+        )
+        self.import_button.grid(row=1, column=1, sticky="ew", pady=(5, 0))
+        
+        # Open existing library button
+        self.open_library_button = ctk.CTkButton(
+            self.button_frame,
+            text="Open existing folder",
+            command=self.open_library,
+            fg_color=("#d1d5db", "#4b5563"),
+            font=(MODERN_FONT, 13)
+        )
+        self.open_library_button.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+        
         # --- Right side - content editing ---
         self.right_frame = ctk.CTkFrame(self.content_frame)
         self.right_frame.grid(row=0, column=1, sticky="nsew")
@@ -223,6 +335,16 @@ class JellyfinStrmGenerator:
         )
         self.file_label.pack(side="left", padx=(5, 0))
         
+        # Rapid entry: Enter saves and jumps to the next empty episode
+        self.rapid_entry_var = ctk.BooleanVar(value=False)
+        self.rapid_entry_switch = ctk.CTkSwitch(
+            self.editor_frame,
+            text="Rapid entry",
+            variable=self.rapid_entry_var,
+            font=(MODERN_FONT, 13)
+        )
+        self.rapid_entry_switch.pack(side="right")
+        
         # Instructions
         self.url_label = ctk.CTkLabel(
             self.right_frame,
@@ -242,12 +364,35 @@ class JellyfinStrmGenerator:
         
         # Binding for text changes
         self.content_text.bind("<KeyRelease>", self.save_current_content)
+        self.content_text.bind("<Return>", self.on_enter_pressed)
+        self.content_text.bind("<KP_Enter>", self.on_enter_pressed)
         
         # Help text
         help_text = ("Insert URL for media playback. For example:\n"
                      "http://example.com/stream/video.mp4\n"
                      "or local path: C:\\Videos\\movie.mp4")
         
+        # URL template for filling the whole season at once
+        self.template_frame = ctk.CTkFrame(self.right_frame, fg_color="transparent")
+        self.template_frame.pack(fill="x", pady=(10, 0))
+        
+        self.template_entry = ctk.CTkEntry(
+            self.template_frame,
+            placeholder_text="URL template, e.g. https://example.com/{show_url}/S{season:02d}E{episode:02d}.mkv",
+            font=(MODERN_FONT, 13)
+        )
+        self.template_entry.pack(side="left", fill="x", expand=True)
+        
+        self.template_button = ctk.CTkButton(
+            self.template_frame,
+            text="Fill from template",
+            command=self.fill_from_template,
+            fg_color=("#d1d5db", "#4b5563"),
+            font=(MODERN_FONT, 13),
+            width=130
+        )
+        self.template_button.pack(side="left", padx=(5, 0))
+        
         self.help_frame = ctk.CTkFrame(self.right_frame, fg_color="transparent")
         self.help_frame.pack(fill="x", pady=(10, 0))
         
@@ -307,6 +452,17 @@ class JellyfinStrmGenerator:
         )
         self.change_folder_button.pack(side="left", padx=(15, 0))
         
+        # Further target folders, e.g. a backup NAS
+        self.mirror_button = ctk.CTkButton(
+            self.bottom_frame,
+            text="Mirrors...",
+            command=self.manage_mirror_folders,
+            fg_color=("#d1d5db", "#4b5563"),
+            font=(MODERN_FONT, 13),
+            width=90
+        )
+        self.mirror_button.pack(side="left", padx=(10, 0))
+        
         # Generate files button
         self.generate_button = ctk.CTkButton(
             self.bottom_frame,
@@ -317,6 +473,44 @@ class JellyfinStrmGenerator:
         )
         self.generate_button.pack(side="right")
         
+        # One archive instead of many small files, for copying to the Jellyfin host in one transfer
+        self.export_button = ctk.CTkButton(
+            self.bottom_frame,
+            text="Export archive...",
+            command=self.export_archive,
+            fg_color=("#d1d5db", "#4b5563"),
+            font=(MODERN_FONT, 13)
+        )
+        self.export_button.pack(side="right", padx=(0, 10))
+        
+        # Durability mode for writing files (see strm_engine.DURABILITY_MODES)
+        self.durability_var = ctk.StringVar(value=strm_engine.DEFAULT_DURABILITY)
+        self.durability_menu = ctk.CTkOptionMenu(
+            self.bottom_frame,
+            values=list(strm_engine.DURABILITY_MODES),
+            variable=self.durability_var,
+            width=100,
+            font=(MODERN_FONT, 13)
+        )
+        self.durability_menu.pack(side="right", padx=(0, 10))
+        
+        self.durability_label = ctk.CTkLabel(
+            self.bottom_frame,
+            text="Write mode:",
+            font=(MODERN_FONT, 13)
+        )
+        self.durability_label.pack(side="right", padx=(0, 5))
+        
+        # Delete .strm files written earlier that are no longer in the list (see reconcile)
+        self.prune_var = ctk.BooleanVar(value=False)
+        self.prune_checkbox = ctk.CTkCheckBox(
+            self.bottom_frame,
+            text="Delete old files",
+            variable=self.prune_var,
+            font=(MODERN_FONT, 13)
+        )
+        self.prune_checkbox.pack(side="right", padx=(0, 10))
+        
         # Status bar
         self.status_frame = ctk.CTkFrame(self.root)
         self.status_frame.pack(side="bottom", fill="x")
@@ -414,13 +608,11 @@ class JellyfinStrmGenerator:
         # This function is called when the OK button is clicked
         def on_ok():
             try:
-                self.content_type = content_type_var.get()
+                self.session.content_type = content_type_var.get()
                 dialog.grab_release()
                 
                 # Update type in UI
-                content_type_text = "Movie" if self.content_type == "movie" else "Series"
-                content_type_icon = "🎬" if self.content_type == "movie" else "📺"
-                self.type_badge.configure(text=f"{content_type_icon} {content_type_text}")
+                self.update_type_badge()
                 
                 # After closing the dialog, continue based on the selected type
                 if dialog in self.dialogs:
@@ -432,7 +624,7 @@ class JellyfinStrmGenerator:
                 self.root.after(150, self.root.focus_force)
                 
                 # After closing the dialog, continue based on the selected type
-                if self.content_type == "movie":
+                if self.session.content_type == "movie":
                     self.setup_movie()
                 else:
                     self.show_season_dialog()
@@ -531,7 +723,7 @@ class JellyfinStrmGenerator:
                 dialog.grab_release()
                 
                 # Save season number
-                self.season_number = season
+                self.session.season_number = season
                 
                 # Remove dialog from list and destroy it
                 if dialog in self.dialogs:
@@ -568,7 +760,7 @@ class JellyfinStrmGenerator:
                 dialog.destroy()
                 
                 # If user closes dialog with X, use default value
-                self.season_number = 1
+                self.session.season_number = 1
                 
                 # Ensure main window is in foreground
                 self.root.after(100, self.root.lift)
@@ -583,8 +775,7 @@ class JellyfinStrmGenerator:
     
     def setup_movie(self):
         """Setup application for movie"""
-        self.files = ["movie.strm"]
-        self.file_contents = {self.files[0]: ""}
+        self.session.setup_movie()
         self.current_file = self.files[0]
         
         # Update UI
@@ -708,15 +899,13 @@ class JellyfinStrmGenerator:
         """Setup application for series"""
         try:
             # Generate file list considering season number
-            season_prefix = f"S{self.season_number:02d}"
-            self.files = [f"{season_prefix}E{i:02d}.strm" for i in range(1, episode_count + 1)]
-            self.file_contents = {file: "" for file in self.files}
+            self.session.setup_series(episode_count)
             self.current_file = self.files[0] if self.files else ""
             
             # Update UI
             self.update_file_list()
             
-            self.set_status(f"Series - season {self.season_number}, {episode_count} episodes ready")
+            self.set_status(f"Series - season {self.session.season_number}, {episode_count} episodes ready")
             
             # Highlight first file
             if self.files:
@@ -729,10 +918,8 @@ class JellyfinStrmGenerator:
         """Change content type"""
         if messagebox.askyesno("Change content type", "Changing content type will delete all current files. Continue?"):
             # Reset files
-            self.files = []
-            self.file_contents = {}
+            self.session.reset()
             self.current_file = ""
-            self.current_selected_file_btn = None
             
             # Dialog for new type
             self.show_content_type_dialog()
@@ -744,90 +931,188 @@ class JellyfinStrmGenerator:
             self.set_status("Content type changed")
     
     def update_file_list(self):
-        """Update file list"""
-        # Delete all buttons from list
-        for widget in self.file_scrollable_frame.winfo_children():
-            widget.destroy()
-        self.file_buttons = {}
+        """Update file list, showing only the files that match the filter"""
+        query = self.filter_entry.get().strip()
+        visible = self.session.search(query) if query else self.files
         
         # Update file count
-        self.file_count.configure(text=f"Total files: {len(self.files)}")
+        if query:
+            self.file_count.configure(text=f"Total files: {len(self.files)} ({len(visible)} shown)")
+        else:
+            self.file_count.configure(text=f"Total files: {len(self.files)}")
+        
+        # The list only creates buttons for visible rows
+        self.file_list.set_items(visible)
+    
+    def apply_filter(self, event=None):
+        """Refilter the file list after a keystroke in the filter box"""
+        query = self.filter_entry.get().strip()
+        if query == self.filter_query:
+            return  # Cursor movement and modifier keys don't change the result
+        self.filter_query = query
+        self.update_file_list()
+    
+    def clear_filter(self, event=None):
+        """Show all files again"""
+        self.filter_entry.delete(0, "end")
+        self.apply_filter()
+        if self.current_file:
+            self.file_list.set_selected(self.current_file)
         
-        # Add buttons for files
-        for file in self.files:
-            # Lambda function must have local variable to store value for each iteration
-            def create_command(f=file):
-                return lambda: self.on_file_select(f)
-                
-            # Create button for file
-            btn = ctk.CTkButton(
-                self.file_scrollable_frame,
-                text=file,
-                anchor="w",
-                height=35,
-                fg_color="transparent", 
-                hover_color=("#e0e0e0", "#3a3a3a"),
-                text_color=("gray10", "gray90"),
-                command=create_command()
-            )
-            btn.pack(fill="x", pady=(0, 2))
-            
-            # Save reference to button
-            self.file_buttons[file] = btn
-            
     def on_file_select(self, selected_file):
-        """Handle file selection"""
+        """Handle file selection
+        
+        Only the previously and newly selected rows are touched, so switching
+        stays within SELECT_LATENCY_BUDGET_MS however long the season is.
+        """
         try:
+            start = time.perf_counter()
+            
             # Save current content
             if self.current_file:
                 self.save_current_content()
             
-            # Visually highlight selected file
-            for file, button in self.file_buttons.items():
-                if (file == selected_file):
-                    button.configure(fg_color=ACCENT_COLOR, text_color=("white", "white"))
-                    self.current_selected_file_btn = button  # Save reference to selected button
-                else:
-                    button.configure(fg_color="transparent", text_color=("gray10", "gray90"))
+            # Visually highlight selected file (touches only the old and new row)
+            self.file_list.set_selected(selected_file)
             
             # Update current file
             self.current_file = selected_file
             self.file_label.configure(text=f"Editing: {self.current_file}")
+            self.journal.record_meta(current_file=selected_file)
             
-            # Update content
-            self.content_text.delete("1.0", "end")
-            self.content_text.insert("1.0", self.file_contents.get(selected_file, ""))
+            # Update content, leaving the textbox alone if it already shows it
+            content = self.file_contents.get(selected_file, "")
+            if self.content_text.get("1.0", "end-1c") != content:
+                self.content_text.delete("1.0", "end")
+                self.content_text.insert("1.0", content)
             
-            self.set_status(f"Editing: {selected_file}")
+            self.select_latency_ms = (time.perf_counter() - start) * 1000
+            if self.select_latency_ms > SELECT_LATENCY_BUDGET_MS:
+                self.set_status(f"Editing: {selected_file} (switch took {self.select_latency_ms:.0f} ms)")
+            else:
+                self.set_status(f"Editing: {selected_file}")
         except Exception as e:
             self.set_status(f"Error selecting file: {str(e)}")
     
+    def on_enter_pressed(self, event=None):
+        """In rapid entry mode, save and jump to the next empty episode"""
+        if not self.rapid_entry_var.get():
+            return None  # Normal newline
+        
+        self.save_current_content()
+        # Stay within the filtered list, so the jump never lands on a file that isn't shown
+        visible = self.file_list.items if self.filter_query else None
+        next_file = self.session.next_empty_file(self.current_file, visible)
+        if next_file is None:
+            self.set_status("All shown files have content" if visible is not None else "All files have content")
+        else:
+            self.on_file_select(next_file)
+        return "break"  # Don't insert a newline into the URL
+    
+    def update_folder_label(self):
+        """Show the target folder and the number of mirrors"""
+        text = f"Target folder: {self.current_folder or 'Not selected'}"
+        if self.mirror_folders:
+            text += f" (+{len(self.mirror_folders)} mirrors)"
+        self.folder_label.configure(text=text)
+    
+    def manage_mirror_folders(self):
+        """Add a folder that receives a copy of every generated file, or remove all of them"""
+        if self.mirror_folders:
+            answer = messagebox.askyesnocancel(
+                "Mirror folders",
+                "Files are also generated into:\n" + "\n".join(self.mirror_folders) +
+                "\n\nAdd another folder? (No removes all mirror folders.)"
+            )
+            if answer is None:
+                return
+            if not answer:
+                self.mirror_folders = []
+                self.journal.record_meta(mirrors=[])
+                self.update_folder_label()
+                self.set_status("Mirror folders removed")
+                return
+        
+        folder = filedialog.askdirectory(title="Select a mirror folder for .strm files")
+        if not folder:
+            return
+        if os.path.normpath(folder) == os.path.normpath(self.current_folder or "") or folder in self.mirror_folders:
+            messagebox.showinfo("Mirror folders", "This folder is already a target.")
+            return
+        self.mirror_folders.append(folder)
+        self.journal.record_meta(mirrors=self.mirror_folders)
+        self.update_folder_label()
+        self.set_status(f"Added mirror folder: {folder}")
+    
     def change_folder(self):
         """Change target folder"""
         folder = filedialog.askdirectory(title="Select folder for .strm files")
         if folder:  # User selected folder
+            # Offer to edit what is already there instead of overwriting it blindly
+            existing = library_reader.scan_library(folder, (strm_engine.STRM_EXTENSION,))
+            if existing and messagebox.askyesno(
+                "Existing files",
+                f"This folder already contains {len(existing)} .strm files.\n\n"
+                "Open them for editing? (No keeps your current files and uses the folder as target.)"
+            ):
+                self.open_library(folder, existing)
+                return
+            
             self.current_folder = folder
-            self.folder_label.configure(text=f"Target folder: {self.current_folder}")
+            self.journal.record_meta(folder=folder)
+            self.update_folder_label()
             self.set_status(f"Folder changed to: {self.current_folder}")
     
+    def open_library(self, folder=None, files=None):
+        """Load the .strm files of an existing folder for editing; the folder becomes the target
+
+        files, if given, is the scan_library() result for folder, so the folder isn't scanned twice.
+        """
+        if folder is None:
+            folder = filedialog.askdirectory(title="Open folder with existing .strm files")
+            if not folder:
+                return  # User canceled
+        
+        self.save_current_content()
+        if self.session.has_content():
+            if not messagebox.askyesno("Open folder", "Opening a folder will replace all current files. Continue?"):
+                return
+        
+        try:
+            count = self.session.open_library(folder, files=files)
+        except OSError as e:
+            messagebox.showerror("Error", f"An error occurred while opening the folder:\n{str(e)}")
+            return
+        if not count:
+            messagebox.showinfo("Open folder", "The folder contains no .strm files.")
+            return
+        
+        self.current_folder = folder
+        self.journal.record_meta(folder=folder)
+        self.update_folder_label()
+        self.current_file = ""
+        self.update_type_badge()
+        self.update_file_list()
+        self.on_file_select(self.files[0])  # Reads just this file; the rest loads in the background
+        self.set_status(f"Opened {count} files from {folder}")
+    
     def save_current_content(self, event=None):
         """Save current content to memory"""
         if self.current_file:
-            self.file_contents[self.current_file] = self.content_text.get("1.0", "end-1c")
+            try:
+                self.session.set_content(self.current_file, self.content_text.get("1.0", "end-1c"))
+            except OSError as e:
+                self.set_status(f"Could not write session journal: {str(e)}")
     
     def reset_app(self):
         """Reset application"""
         if messagebox.askyesno("Confirm reset", "This will delete all your current files. Continue?"):
             # Reset files
-            self.files = []
-            self.file_contents = {}
+            self.session.reset()
             self.current_file = ""
-            self.current_selected_file_btn = None
             
             # Reset UI
-            for widget in self.file_scrollable_frame.winfo_children():
-                widget.destroy()
-            self.file_buttons = {}
+            self.file_list.set_items([])
             self.content_text.delete("1.0", "end")
             self.file_label.configure(text="Editing: ")
             self.file_count.configure(text="Total files: 0")
@@ -837,18 +1122,139 @@ class JellyfinStrmGenerator:
             
             self.set_status("Application has been reset")
     
+    def update_type_badge(self):
+        """Show the current content type in the badge"""
+        content_type_text = "Movie" if self.session.content_type == "movie" else "Series"
+        content_type_icon = "🎬" if self.session.content_type == "movie" else "📺"
+        self.type_badge.configure(text=f"{content_type_icon} {content_type_text}")
+    
+    def import_playlist(self):
+        """Replace the current files with the entries of an M3U/M3U8 playlist"""
+        path = filedialog.askopenfilename(
+            title="Select playlist",
+            filetypes=[("M3U playlists", "*.m3u *.m3u8"), ("All files", "*.*")]
+        )
+        if not path:
+            return  # User canceled
+        
+        self.save_current_content()
+        if self.session.has_content():
+            if not messagebox.askyesno("Import playlist", "Importing will replace all current files. Continue?"):
+                return
+        
+        try:
+            import m3u_import
+            
+            # Playlists with several shows are laid out as a Jellyfin library
+            count = self.session.load_entries(m3u_import.read_m3u(path), strm_engine.LAYOUT_JELLYFIN)
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while importing the playlist:\n{str(e)}")
+            self.set_status("Error importing playlist")
+            return
+        
+        self.current_file = ""
+        self.update_type_badge()
+        self.update_file_list()
+        if self.files:
+            self.on_file_select(self.files[0])
+        self.set_status(f"Imported {count} files from {os.path.basename(path)}")
+    
+    def fill_from_template(self):
+        """Fill episode URLs from the template field
+        
+        The show name ({show}, {show_url}) is the name of the target folder.
+        """
+        import url_template
+        
+        template = self.template_entry.get().strip()
+        if not template:
+            self.set_status("Enter a URL template first")
+            return
+        try:
+            render = url_template.compile_url_template(template)
+        except ValueError as e:
+            messagebox.showerror("Invalid template", str(e))
+            return
+        
+        self.save_current_content()
+        only_empty = True
+        if self.session.has_content():
+            answer = messagebox.askyesnocancel(
+                "Fill from template",
+                "Some files already have a URL.\n\nYes: overwrite all files\nNo: fill only empty files"
+            )
+            if answer is None:
+                return
+            only_empty = not answer
+        
+        show = os.path.basename(os.path.normpath(self.current_folder)) if self.current_folder else ""
+        try:
+            filled = self.session.apply_template(render, show, only_empty=only_empty)
+        except (ValueError, TypeError) as e:
+            messagebox.showerror("Invalid template", str(e))
+            return
+        
+        # Show the new URL of the file being edited
+        if self.current_file:
+            self.content_text.delete("1.0", "end")
+            self.content_text.insert("1.0", self.file_contents.get(self.current_file, ""))
+        self.set_status(f"Filled {filled} files from template")
+    
+    def check_urls(self):
+        """Probe all entered URLs in the background and report unreachable ones"""
+        # Imported here so the GUI doesn't pay for asyncio/ssl unless URLs are checked
+        import strm_probe
+        
+        self.save_current_content()
+        urls = [content.strip() for content in self.file_contents.values() if content.strip()]
+        if not urls:
+            self.set_status("No URLs to check")
+            return
+        
+        job = strm_probe.ProbeJob(urls).start()
+        self.check_urls_button.configure(state="disabled")
+        
+        def poll():
+            if not job.finished.is_set():
+                self.set_status(f"Checking URLs... ({job.done}/{job.total})")
+                self.root.after(PROGRESS_POLL_MS, poll)
+                return
+            
+            self.check_urls_button.configure(state="normal")
+            if job.error is not None:
+                self.set_status("Error checking URLs")
+                messagebox.showerror("Error", f"An error occurred while checking URLs:\n{str(job.error)}")
+                return
+            
+            dead = job.dead()
+            if not dead:
+                self.set_status(f"All {len(job.results)} URLs are reachable")
+                return
+            
+            # Map unreachable URLs back to the files using them
+            dead_urls = {result.url: result for result in dead}
+            lines = []
+            for file_name, content in self.file_contents.items():
+                result = dead_urls.get(content.strip())
+                if result is not None:
+                    reason = f"HTTP {result.status}" if result.status is not None else result.error
+                    lines.append(f"{file_name}: {reason}")
+            shown = "\n".join(lines[:20])
+            if len(lines) > 20:
+                shown += f"\n... and {len(lines) - 20} more"
+            self.set_status(f"{len(dead)} of {len(job.results)} URLs are unreachable")
+            messagebox.showwarning("Unreachable URLs", f"The following files point to unreachable URLs:\n{shown}")
+        
+        poll()
+    
     def generate_strm_files(self):
         """Generate .strm files"""
         try:
             # First save current content
             self.save_current_content()
             
-            # Check if folder exists
-            if not os.path.exists(self.current_folder):
-                os.makedirs(self.current_folder)
-            
-            # Check for empty files
-            empty_files = [file for file, content in self.file_contents.items() if not content.strip()]
+            # Check for empty files; files of an opened folder that were never read are left to the workers
+            empty_files = self.session.empty_files(loaded_only=True)
             if empty_files:
                 empty_file_list = "\n".join(empty_files)
                 if not messagebox.askyesno("Warning about empty files", 
@@ -856,11 +1262,48 @@ class JellyfinStrmGenerator:
                     self.set_status("Generation canceled")
                     return
             
+            # With pruning, plan every target first (one scan each) and confirm the deletions
+            targets = [self.current_folder] + self.mirror_folders
+            plans = []
+            if self.prune_var.get():
+                plans = [reconcile.plan_generation(folder, self.file_contents, prune=True,
+                                                   output_format=output_formats.FORMAT_STRM) for folder in targets]
+                deletions = [(plan.folder, file_name) for plan in plans for file_name in plan.delete]
+                try:
+                    for plan in plans:
+                        plan.check_prune_limit()
+                except ValueError as e:
+                    messagebox.showerror("Delete old files", str(e))
+                    self.set_status("Generation canceled")
+                    return
+                if deletions:
+                    listing = "\n".join(os.path.join(folder, file_name) for folder, file_name in deletions[:15])
+                    if len(deletions) > 15:
+                        listing += f"\n... and {len(deletions) - 15} more"
+                    if not messagebox.askyesno(
+                        "Delete old files",
+                        f"{len(deletions)} files are no longer in the list and will be deleted:\n{listing}\n\nContinue?"
+                    ):
+                        self.set_status("Generation canceled")
+                        return
+            
+            # Generate files on background threads; the window only polls the job.
+            # With mirrors every target gets its own writer pool, so a slow share doesn't hold up the others
+            # Started before the window is built, so a folder that cannot be created leaves no modal window behind
+            multi = bool(self.mirror_folders)
+            if multi:
+                job = self.session.start_generation_to(targets, durability=self.durability_var.get(),
+                                                       output_format=output_formats.FORMAT_STRM)
+            else:
+                job = self.session.start_generation(self.current_folder, durability=self.durability_var.get(),
+                                                    output_format=output_formats.FORMAT_STRM)
+            self.generate_button.configure(state="disabled")
+            
             # Progress bar
             progress_window = ctk.CTkToplevel(self.root)
             self.dialogs.append(progress_window)
             progress_window.title("Generating files")
-            progress_window.geometry("400x150")
+            progress_window.geometry("400x190")
             progress_window.transient(self.root)
             progress_window.grab_set()
             progress_window.resizable(False, False)
@@ -903,33 +1346,46 @@ class JellyfinStrmGenerator:
             )
             status_label.pack(pady=5)
             
-            # Generate files
-            total_files = len(self.files)
-            files_processed = 0
+            # Buttons for pausing and cancelling
+            control_frame = ctk.CTkFrame(progress_window, fg_color="transparent")
+            control_frame.pack(pady=(10, 0))
             
-            # Update UI
-            progress_window.update()
+            def toggle_pause():
+                if job.paused:
+                    job.resume()
+                    pause_button.configure(text="Pause")
+                else:
+                    job.pause()
+                    pause_button.configure(text="Resume")
             
-            for file_name, content in self.file_contents.items():
-                # Update progress bar
-                files_processed += 1
-                progress_value = files_processed / total_files
-                progress.set(progress_value)
-                status_label.configure(text=f"Generating: {file_name} ({files_processed}/{total_files})")
-                
-                # Create file
-                file_path = os.path.join(self.current_folder, file_name)
-                with open(file_path, "w", encoding="utf-8") as file:
-                    file.write(content)
-                
-                # Update UI
-                progress_window.update()
+            def cancel_job():
+                job.cancel()
+                pause_button.configure(state="disabled")
+                cancel_button.configure(state="disabled")
+                status_label.configure(text="Cancelling...")
+            
+            pause_button = ctk.CTkButton(
+                control_frame,
+                text="Pause",
+                command=toggle_pause,
+                font=(MODERN_FONT, 14),
+                width=80
+            )
+            pause_button.pack(side="left", padx=5)
             
-            # After completion
-            status_label.configure(text="Completed!")
+            cancel_button = ctk.CTkButton(
+                control_frame,
+                text="Cancel",
+                command=cancel_job,
+                fg_color=("#d1d5db", "#4b5563"),
+                font=(MODERN_FONT, 14),
+                width=80
+            )
+            cancel_button.pack(side="left", padx=5)
             
-            # Add OK button
             def close_progress():
+                if not job.finished.is_set():
+                    cancel_job()
                 if progress_window in self.dialogs:
                     self.dialogs.remove(progress_window)
                 progress_window.grab_release()
@@ -938,24 +1394,143 @@ class JellyfinStrmGenerator:
                 self.root.after(100, self.root.lift)
                 self.root.after(150, self.root.focus_force)
             
-            ok_button = ctk.CTkButton(
-                progress_window,
-                text="OK",
-                command=close_progress,
-                font=(MODERN_FONT, 14),
-                width=80
-            )
-            ok_button.pack(pady=(10, 0))
+            progress_window.protocol("WM_DELETE_WINDOW", close_progress)
+            
+            def on_finished():
+                self.generate_button.configure(state="normal")
+                
+                # Replace pause/cancel with an OK button
+                for widget in control_frame.winfo_children():
+                    widget.destroy()
+                ok_button = ctk.CTkButton(
+                    control_frame,
+                    text="OK",
+                    command=close_progress,
+                    font=(MODERN_FONT, 14),
+                    width=80
+                )
+                ok_button.pack()
+                
+                # Keep the timings of this run for diagnosing slow targets
+                try:
+                    job.metrics.save_report(os.path.join(self.journal.folder, GENERATION_REPORT_FILE_NAME))
+                except OSError:
+                    pass  # The report is only a diagnostic
+                
+                # Remove old files only after everything was written
+                deleted = 0
+                if plans and not job.errors and not job.cancelled:
+                    status_label.configure(text="Deleting old files...")
+                    progress_window.update_idletasks()
+                    for plan in plans:
+                        prune_errors = reconcile.prune_plan(plan)
+                        deleted += len(plan.delete) - len(prune_errors)
+                        if prune_errors:
+                            file_name, error = prune_errors[0]
+                            messagebox.showerror("Error", f"Could not delete {len(prune_errors)} old files:\n"
+                                                          f"{file_name}: {error}")
+                
+                # Update status
+                if multi and job.errors and len(job.target_errors()) < len(job.folders):
+                    # Some targets succeeded; name the ones that failed
+                    failed = job.target_errors()
+                    details = "\n".join(f"{folder}: {len(errors)} errors, e.g. {errors[0][1]}"
+                                        for folder, errors in failed.items())
+                    status_label.configure(text=f"{len(failed)} of {len(job.folders)} targets failed")
+                    self.set_status(f"Generated into {len(job.folders) - len(failed)} of {len(job.folders)} targets")
+                    messagebox.showerror("Error", f"Some target folders could not be written:\n{details}")
+                elif job.errors:
+                    file_name, error = job.errors[0]
+                    status_label.configure(text=f"Failed to write {len(job.errors)} files")
+                    self.set_status("Error generating files")
+                    messagebox.showerror("Error", f"An error occurred while saving files:\n{file_name}: {str(error)}")
+                elif job.cancelled:
+                    status_label.configure(text=f"Cancelled after {job.done}/{job.total} files")
+                    self.set_status(f"Generation cancelled, {job.done} files written")
+                else:
+                    removed = f", {deleted} deleted" if plans else ""
+                    status_label.configure(text=f"Completed! {job.stats.summary()}{removed}")
+                    self.set_status(f"Generated {job.total} files successfully ({job.stats.summary()}{removed}; "
+                                    f"{job.metrics.summary()})")
             
-            # Update status
-            self.set_status(f"Generated {total_files} files successfully")
+            def poll():
+                if not progress_window.winfo_exists():
+                    if not job.finished.is_set():
+                        self.root.after(PROGRESS_POLL_MS, poll)  # Wait for cancellation to finish
+                    else:
+                        self.generate_button.configure(state="normal")
+                    return
+                start = time.perf_counter()
+                if job.total:
+                    progress.set(job.done / job.total)
+                if job.finished.is_set():
+                    on_finished()
+                    return
+                if job.paused:
+                    status_label.configure(text=f"Paused ({job.done}/{job.total})")
+                elif not job.cancelled and multi:
+                    status_label.configure(text=" | ".join(f"{os.path.basename(os.path.normpath(folder))}: "
+                                                           f"{done}/{total}" for folder, done, total in job.progress()))
+                elif not job.cancelled:
+                    status_label.configure(text=f"Generating: {job.current_file} ({job.done}/{job.total})")
+                job.metrics.add_phase("ui", time.perf_counter() - start)  # Time the progress window costs
+                self.root.after(PROGRESS_POLL_MS, poll)
+            
+            poll()
             
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while saving files:\n{str(e)}")
             self.set_status("Error generating files")
 
-# Run application only if file is run directly (not as a module)
-if __name__ == "__main__":
+    def export_archive(self):
+        """Write all files into one .tar/.tar.gz/.zip archive on a background thread"""
+        self.save_current_content()
+        path = filedialog.asksaveasfilename(
+            title="Export .strm files as archive",
+            defaultextension=".tar",
+            filetypes=archive_export.ARCHIVE_FILE_TYPES
+        )
+        if not path:
+            return
+        try:
+            archive_export.archive_format(path)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        contents = dict(self.file_contents.items())  # Snapshot, editing can go on meanwhile
+        state = {"done": 0, "result": None, "error": None}
+        
+        def progress(done):
+            state["done"] = done
+        
+        def run():
+            try:
+                state["result"] = archive_export.export_archive(contents, path, progress=progress,
+                                                                       output_format=output_formats.FORMAT_STRM)
+            except (OSError, ValueError) as e:
+                state["error"] = e
+        
+        def poll():
+            if thread.is_alive():
+                self.set_status(f"Exporting: {state['done']}/{len(contents)} files")
+                self.root.after(PROGRESS_POLL_MS, poll)
+                return
+            self.export_button.configure(state="normal")
+            if state["error"] is not None:
+                self.set_status("Error exporting files")
+                messagebox.showerror("Error", f"An error occurred while exporting files:\n{state['error']}")
+            else:
+                result = state["result"]
+                self.set_status(f"Exported {result.files} files ({result.bytes} bytes) to {path}")
+        
+        self.export_button.configure(state="disabled")
+        thread = threading.Thread(target=run, name="strm-export", daemon=True)
+        thread.start()
+        poll()
+
+def main():
+    """Open the main window and run the application"""
     try:
         # Initialize main window and application
         app = ctk.CTk()
@@ -975,4 +1550,8 @@ if __name__ == "__main__":
     except Exception as e:
         import traceback
         error_detail = traceback.format_exc()
-        messagebox.showerror("Application Error", f"An unexpected error occurred:\n{str(e)}\n\nDetail:\n{error_detail}")
\ No newline at end of file
+        messagebox.showerror("Application Error", f"An unexpected error occurred:\n{str(e)}\n\nDetail:\n{error_detail}")
+
+# Run application only if file is run directly (not as a module)
+if __name__ == "__main__":
+    main()
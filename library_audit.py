@@ -0,0 +1,225 @@
+"""Audit a whole .strm library for files Jellyfin will not play or parse
+
+Reports:
+    empty       - files without a URL
+    invalid     - content that is neither a URL nor an absolute path
+    unreadable  - files that could not be read
+    bad_names   - episode files whose name is not SxxEyy (or whose season
+                  does not match their "Season NN" folder)
+    duplicates  - groups of files pointing at the same URL
+
+Listing directories and reading files both go through one thread pool. On
+a network share every scandir and every open costs a round trip, so many of
+them are kept in flight at once; reads are batched per task to keep the
+pool overhead low. Duplicate URLs are found through an index of short URL
+hashes rather than the URLs themselves, which keeps memory small on
+500k-file trees.
+"""
+import hashlib
+import os
+import queue
+import re
+
+DEFAULT_AUDIT_WORKERS = 32  # Requests in flight; network filesystems are latency-bound
+READ_BATCH = 64  # Files read per pool task
+AUDIT_EXTENSIONS = (".strm",)
+
+_SEASON_FOLDER = re.compile(r"^(?:Season\s*(\d+)|Specials)$", re.IGNORECASE)
+_EPISODE_NAME = re.compile(r"S(\d+)E(\d+)", re.IGNORECASE)
+_OTHER_EPISODE_NAME = re.compile(r"(?<!\d)\d{1,2}x\d{1,4}(?!\d)|\bEp(?:isode)?[\s._-]*\d+", re.IGNORECASE)
+_URL_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://", re.IGNORECASE)
+
+
+def check_name(relative_path):
+    """Return why a file name does not follow the SxxEyy convention, or None"""
+    parts = relative_path.replace("\\", "/").split("/")
+    name = parts[-1]
+    episode = _EPISODE_NAME.search(name)
+    folder = _SEASON_FOLDER.match(parts[-2]) if len(parts) > 1 else None
+
+    if folder is not None:
+        if episode is None:
+            return "episode in a season folder without SxxEyy in its name"
+        folder_season = int(folder.group(1)) if folder.group(1) is not None else 0  # Specials are season 0
+        if int(episode.group(1)) != folder_season:
+            return f"season {int(episode.group(1))} in the folder of season {folder_season}"
+        return None
+    if episode is None and _OTHER_EPISODE_NAME.search(name):
+        return "episode numbering Jellyfin may not parse, use SxxEyy"
+    return None
+
+
+def check_content(content):
+    """Return "empty", "invalid" or None for the content of a .strm file"""
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    if not lines:
+        return "empty"
+    target = lines[0]  # Jellyfin plays the first line
+    if _URL_SCHEME.match(target) or os.path.isabs(target) or target.startswith("\\\\"):
+        return None
+    return "invalid"
+
+
+def url_key(content):
+    """Short hash of the URL of a file, used to find duplicates"""
+    url = content.strip().splitlines()[0].strip()
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=12).digest()
+
+
+class AuditReport:
+    """Findings of one audit run"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.files = 0
+        self.directories = 0
+        self.empty = []
+        self.invalid = []
+        self.unreadable = []  # (path, error)
+        self.bad_names = []  # (path, reason)
+        self._first_by_url = {}  # URL hash -> first path seen
+        self._duplicates = {}  # URL hash -> all paths, once a second one was seen
+
+    def add_file(self, path, content):
+        """Check one file that was read successfully"""
+        self.files += 1
+        reason = check_name(path)
+        if reason is not None:
+            self.bad_names.append((path, reason))
+
+        problem = check_content(content)
+        if problem == "empty":
+            self.empty.append(path)
+            return
+        if problem == "invalid":
+            self.invalid.append(path)
+
+        key = url_key(content)
+        first = self._first_by_url.get(key)
+        if first is None:
+            self._first_by_url[key] = path
+        else:
+            self._duplicates.setdefault(key, [first]).append(path)
+
+    def add_error(self, path, error):
+        """Record a file that could not be read"""
+        self.files += 1
+        self.unreadable.append((path, str(error)))
+
+    @property
+    def duplicates(self):
+        """Groups of files with the same URL, each sorted, largest group first"""
+        return sorted((sorted(paths) for paths in self._duplicates.values()), key=lambda group: (-len(group), group))
+
+    @property
+    def issue_count(self):
+        """Number of problems found (a duplicate group counts once per extra file)"""
+        return (len(self.empty) + len(self.invalid) + len(self.unreadable) + len(self.bad_names)
+                + sum(len(paths) - 1 for paths in self._duplicates.values()))
+
+    def to_dict(self, limit=None):
+        """Return the report as a JSON-ready dict, with at most limit entries per category"""
+        def cut(items):
+            return items if limit is None else items[:limit]
+
+        return {
+            "folder": self.folder,
+            "files": self.files,
+            "directories": self.directories,
+            "issues": self.issue_count,
+            "empty": cut(sorted(self.empty)),
+            "invalid": cut(sorted(self.invalid)),
+            "unreadable": [{"path": path, "error": error} for path, error in cut(sorted(self.unreadable))],
+            "bad_names": [{"path": path, "reason": reason} for path, reason in cut(sorted(self.bad_names))],
+            "duplicates": cut(self.duplicates),
+        }
+
+    def summary(self):
+        """Human readable one-line summary"""
+        duplicate_files = sum(len(paths) for paths in self._duplicates.values())
+        return (f"{self.files} files in {self.directories} folders: {len(self.empty)} empty, "
+                f"{len(self.invalid)} invalid, {len(self.unreadable)} unreadable, {len(self.bad_names)} badly named, "
+                f"{duplicate_files} in {len(self._duplicates)} duplicate groups")
+
+
+def _list_directory(folder, relative, extensions):
+    """Return (subfolders, files) of one folder, relative to the library root"""
+    subfolders = []
+    files = []
+    with os.scandir(os.path.join(folder, relative)) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue  # Manifest and temp files of interrupted writes
+            path = os.path.join(relative, entry.name) if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(path)
+            elif entry.name.lower().endswith(extensions):
+                files.append(path)
+    return subfolders, files
+
+
+def _read_batch(folder, paths):
+    """Read a batch of files; returns (path, content, error) for each"""
+    results = []
+    for path in paths:
+        try:
+            with open(os.path.join(folder, path), "r", encoding="utf-8", errors="replace") as file:
+                results.append((path, file.read(), None))
+        except OSError as e:
+            results.append((path, None, e))
+    return results
+
+
+def audit_library(folder, workers=DEFAULT_AUDIT_WORKERS, extensions=AUDIT_EXTENSIONS, progress=None):
+    """Audit every file below folder and return an AuditReport
+
+    progress, if given, is called as progress(files checked so far) after
+    each batch. Results are collected on the calling thread, so the report
+    needs no locking.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not os.path.isdir(folder):
+        raise NotADirectoryError(f"Not a folder: {folder}")
+    extensions = tuple(extension.lower() for extension in extensions)
+    report = AuditReport(folder)
+    results = queue.Queue()
+    outstanding = 0
+
+    def run(kind, function, *args):
+        try:
+            results.put((kind, args, function(*args), None))
+        except Exception as e:  # Always answer, or the collecting loop would wait forever
+            results.put((kind, args, None, e))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strm-audit") as executor:
+        def submit(kind, function, *args):
+            nonlocal outstanding
+            outstanding += 1
+            executor.submit(run, kind, function, *args)
+
+        submit("list", _list_directory, folder, "", extensions)
+        while outstanding:
+            kind, args, result, error = results.get()
+            outstanding -= 1
+            if error is not None and not isinstance(error, OSError):
+                raise error
+            if kind == "list":
+                if error is not None:
+                    report.unreadable.append((args[1] or ".", str(error)))
+                    continue
+                report.directories += 1
+                subfolders, files = result
+                for subfolder in subfolders:
+                    submit("list", _list_directory, folder, subfolder, extensions)
+                for start in range(0, len(files), READ_BATCH):
+                    submit("read", _read_batch, folder, files[start:start + READ_BATCH])
+            else:
+                for path, content, read_error in result:
+                    if read_error is not None:
+                        report.add_error(path, read_error)
+                    else:
+                        report.add_file(path, content)
+                if progress is not None:
+                    progress(report.files)
+    return report
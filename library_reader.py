@@ -0,0 +1,173 @@
+"""Open an existing folder of .strm/.stmr files for editing
+
+Opening only lists file names (one os.scandir per folder); contents are
+read when a file is first needed, e.g. when it is selected in the editor.
+A background prefetch reads the rest in parallel, which hides the latency
+of network shares, and anything that needs every file at once (finding
+empty files, exports) waits for it instead of reading file by file.
+Generation reads the files it needs on its own worker threads.
+"""
+import os
+import threading
+from collections.abc import MutableMapping
+
+DEFAULT_READ_WORKERS = 16  # Parallel reads; reads from a NAS are latency-bound, not bandwidth-bound
+
+
+def scan_library(folder, extensions):
+    """Return the relative paths of files with one of extensions below folder, sorted
+
+    Hidden files (the manifest, temp files of interrupted writes) are skipped.
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    found = []
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        try:
+            with os.scandir(os.path.join(folder, relative)) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    path = os.path.join(relative, entry.name) if relative else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(path)
+                    elif entry.name.lower().endswith(extensions):
+                        found.append(path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+    found.sort()
+    return found
+
+
+def read_text(path):
+    """Read one file as the editor shows it"""
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as file:
+        return file.read()
+
+
+class LibraryContents(MutableMapping):
+    """file_contents of an opened folder; a file is read from disk on first access
+
+    Reads happen outside the lock, and a value stored by the editor always
+    wins over one read concurrently.
+    """
+
+    def __init__(self, folder, file_names, workers=DEFAULT_READ_WORKERS):
+        self.folder = folder
+        self.names = list(file_names)  # Every file, loaded or not, in list order
+        self.loaded = {}  # file name -> content of files read or edited
+        self.unread = set(self.names)  # Files that have not been read yet
+        self.edited = set()  # Files changed in the editor since the folder was opened
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._prefetch = None
+
+    def _load(self, file_name):
+        """Read one file unless it was loaded meanwhile; returns its content"""
+        try:
+            content = read_text(os.path.join(self.folder, file_name))
+        except FileNotFoundError:
+            content = ""  # Deleted behind our back, it is written again on generation
+        with self._lock:
+            if file_name not in self.unread and file_name not in self.loaded:
+                return content  # Removed from the session while it was being read
+            self.unread.discard(file_name)
+            return self.loaded.setdefault(file_name, content)
+
+    def __getitem__(self, file_name):
+        try:
+            return self.loaded[file_name]
+        except KeyError:
+            if file_name not in self.unread:
+                raise
+        return self._load(file_name)
+
+    def __contains__(self, file_name):
+        return file_name in self.loaded or file_name in self.unread
+
+    def __setitem__(self, file_name, content):
+        with self._lock:
+            if file_name not in self.loaded and file_name not in self.unread:
+                self.names.append(file_name)
+            self.unread.discard(file_name)
+            self.edited.add(file_name)
+            self.loaded[file_name] = content
+
+    def __delitem__(self, file_name):
+        with self._lock:
+            if file_name not in self.loaded and file_name not in self.unread:
+                raise KeyError(file_name)
+            self.unread.discard(file_name)
+            self.loaded.pop(file_name, None)
+            self.edited.discard(file_name)
+            self.names.remove(file_name)
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefetch(self):
+        """Read every file that has not been read yet, in parallel; returns when done"""
+        # Imported here so opening a folder costs nothing until reads are needed
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._lock:
+            unread = [name for name in self.names if name in self.unread]
+        if not unread:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="strm-reader") as executor:
+            for _ in executor.map(self._load, unread):
+                pass
+
+    def start_prefetch(self):
+        """Start prefetch() on a background thread"""
+        if self._prefetch is None:
+            self._prefetch = threading.Thread(target=self.prefetch, name="strm-prefetch", daemon=True)
+            self._prefetch.start()
+
+    def load_all(self):
+        """Make sure every file is in memory (reads the rest in parallel)"""
+        self.prefetch()
+        if self._prefetch is not None:
+            self._prefetch.join()
+
+    def items(self):
+        """Return (file name, content) pairs in order, reading missing files in parallel first"""
+        self.load_all()
+        with self._lock:
+            return [(name, self.loaded[name]) for name in self.names]
+
+    def values(self):
+        """Return the contents in order, reading missing files in parallel first"""
+        return [content for _, content in self.items()]
+
+    def has_loaded_content(self):
+        """True if any file read or edited so far has content; never reads from disk"""
+        with self._lock:
+            loaded = list(self.loaded.values())
+        return any(content.strip() for content in loaded)
+
+    def empty_loaded_files(self):
+        """Return the names of files read or edited so far that have no content, in order; never reads from disk"""
+        with self._lock:
+            return [name for name in self.names if name in self.loaded and not self.loaded[name].strip()]
+
+    def edits(self):
+        """Return (file names, contents) of the files edited since opening, in list order"""
+        with self._lock:
+            names = [name for name in self.names if name in self.edited]
+            return names, {name: self.loaded[name] for name in names}
+
+
+def open_library(folder, extensions, workers=DEFAULT_READ_WORKERS, file_names=None):
+    """List the files of folder; returns (file names, LibraryContents)
+
+    file_names, if given, is the result of an earlier scan_library() of
+    folder, which saves scanning it a second time.
+    """
+    if file_names is None:
+        file_names = scan_library(folder, extensions)
+    return file_names, LibraryContents(folder, file_names, workers)
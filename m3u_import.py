@@ -0,0 +1,86 @@
+"""Streaming M3U/M3U8 playlist import
+
+Playlists are read line by line and turned into strm_engine.Entry objects
+one at a time, so memory use does not depend on the size of the playlist.
+Each #EXTINF title is matched against common episode patterns
+("Show S01E02", "Show 1x02", "Show Episode 2"); titles that don't look
+like an episode become movies.
+"""
+import os
+import re
+
+from strm_engine import Entry
+
+_ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+_EPISODE_PATTERNS = [
+    # Show S01E02, Show.S01.E02, Show - s1e2
+    re.compile(r"^(?P<show>.*?)[\s._\-\[(]*S(?P<season>\d{1,4})[\s._-]*E(?P<episode>\d{1,4})(?!\d)", re.IGNORECASE),
+    # Show 1x02
+    re.compile(r"^(?P<show>.*?)[\s._\-\[(]*(?<!\d)(?P<season>\d{1,2})x(?P<episode>\d{1,4})(?!\d)", re.IGNORECASE),
+    # Show Episode 2, Show Ep. 2 (season 1)
+    re.compile(r"^(?P<show>.*?)[\s._-]+(?:Episode|Ep\.?)\s*(?P<episode>\d{1,4})(?!\d)", re.IGNORECASE),
+]
+_SEPARATORS = re.compile(r"[\s._]+")
+
+
+def parse_extinf(line):
+    """Return (title, attributes) of an #EXTINF line"""
+    body = line[len("#EXTINF:"):]
+    # The title follows the first comma that is not inside a quoted attribute
+    in_quotes = False
+    for index, char in enumerate(body):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == "," and not in_quotes:
+            return body[index + 1:].strip(), dict(_ATTRIBUTE.findall(body[:index]))
+    return "", dict(_ATTRIBUTE.findall(body))
+
+
+def clean_show_name(name):
+    """Replace dots/underscores with spaces and trim leftover separators"""
+    return _SEPARATORS.sub(" ", name).strip(" -[(")
+
+
+def title_to_entry(title, url, group=""):
+    """Map a playlist title to an Entry (episode if it matches a pattern, otherwise a movie)"""
+    for pattern in _EPISODE_PATTERNS:
+        match = pattern.match(title)
+        if match:
+            groups = match.groupdict()
+            show = clean_show_name(groups["show"]) or clean_show_name(group) or "Unknown"
+            season = int(groups.get("season") or 1)
+            return Entry(show, season, int(groups["episode"]), url)
+    return Entry(clean_show_name(title) or clean_show_name(group) or "Unknown", None, None, url)
+
+
+def iter_m3u(lines):
+    """Yield entries from an iterable of playlist lines"""
+    title = None
+    group = ""
+    attributes = {}
+    for line in lines:
+        line = line.strip().lstrip("\ufeff")
+        if not line:
+            continue
+        if line.startswith("#EXTINF:"):
+            title, attributes = parse_extinf(line)
+            continue
+        if line.startswith("#EXTGRP:"):
+            group = line[len("#EXTGRP:"):].strip()
+            continue
+        if line.startswith("#"):
+            continue  # #EXTM3U, #EXTVLCOPT and other directives
+
+        # A URL line completes the entry
+        if not title:
+            title = attributes.get("tvg-name") or os.path.splitext(os.path.basename(line.split("?")[0]))[0]
+        yield title_to_entry(title, line, attributes.get("group-title") or group)
+        title = None
+        group = ""
+        attributes = {}
+
+
+def read_m3u(path):
+    """Yield entries from an M3U/M3U8 playlist file"""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        yield from iter_m3u(file)
@@ -0,0 +1,114 @@
+"""Kodi/Jellyfin .nfo sidecars for generated .strm files
+
+A .strm file carries nothing but a URL, so Jellyfin asks its remote
+metadata providers about every item it finds. With an .nfo next to it -
+tvshow.nfo in the show folder, one .nfo per episode, movie.nfo for a movie -
+titles, years and provider IDs are indexed locally. The sidecars are
+added to file_contents alongside the .strm files, so they are written in
+the same batched pass with the same durability and skip-if-unchanged
+handling.
+
+Metadata comes from optional manifest columns (strm_engine.META_FIELDS):
+title, plot, aired, imdb_id, tmdb_id, tvdb_id for the item itself and
+show_title, show_plot, show_imdb_id, show_tmdb_id, show_tvdb_id for the
+show. Show and season/episode numbers come from the entry itself.
+"""
+import os
+from xml.sax.saxutils import escape
+
+import strm_engine
+
+NFO_EXTENSION = ".nfo"
+TVSHOW_NFO_FILE_NAME = "tvshow.nfo"
+MOVIE_NFO_FILE_NAME = "movie.nfo"
+
+ID_PROVIDERS = ("tmdb", "tvdb", "imdb")  # Order of the <uniqueid> elements; the first one present is the default
+
+XML_HEADER = '<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+
+
+def _element(name, value):
+    """One indented XML element, or "" if value is empty"""
+    if value is None or value == "":
+        return ""
+    return f"  <{name}>{escape(str(value))}</{name}>\n"
+
+
+def _unique_ids(meta, prefix=""):
+    """<uniqueid> elements for the provider IDs in meta"""
+    lines = []
+    for provider in ID_PROVIDERS:
+        value = meta.get(f"{prefix}{provider}_id")
+        if value:
+            default = ' default="true"' if not lines else ""
+            lines.append(f'  <uniqueid type="{provider}"{default}>{escape(str(value))}</uniqueid>\n')
+    return "".join(lines)
+
+
+def episode_nfo(entry):
+    """Text of the .nfo of one episode"""
+    meta = entry.meta or {}
+    title = meta.get("title") or strm_engine.episode_file_name(entry.season, entry.episode)[:-len(".strm")]
+    return (XML_HEADER + "<episodedetails>\n"
+            + _element("title", title)
+            + _element("showtitle", meta.get("show_title") or entry.show)
+            + _element("season", entry.season)
+            + _element("episode", entry.episode)
+            + _element("aired", meta.get("aired"))
+            + _element("plot", meta.get("plot"))
+            + _unique_ids(meta)
+            + "</episodedetails>\n")
+
+
+def movie_nfo(entry):
+    """Text of movie.nfo"""
+    meta = entry.meta or {}
+    return (XML_HEADER + "<movie>\n"
+            + _element("title", meta.get("title") or entry.show)
+            + _element("year", entry.year)
+            + _element("premiered", meta.get("aired"))
+            + _element("plot", meta.get("plot"))
+            + _unique_ids(meta)
+            + "</movie>\n")
+
+
+def tvshow_nfo(entry):
+    """Text of tvshow.nfo, from any episode entry of the show"""
+    meta = entry.meta or {}
+    return (XML_HEADER + "<tvshow>\n"
+            + _element("title", meta.get("show_title") or entry.show)
+            + _element("year", entry.year)
+            + _element("plot", meta.get("show_plot"))
+            + _unique_ids(meta, "show_")
+            + "</tvshow>\n")
+
+
+def _show_meta_count(entry):
+    """How much show-level metadata an entry carries"""
+    meta = entry.meta or {}
+    return sum(1 for field in strm_engine.META_FIELDS if field.startswith("show_") and meta.get(field))
+
+
+def sidecar_items(entries, layout=strm_engine.LAYOUT_FLAT):
+    """Yield (path, content) of every .strm file and its sidecars for entries
+
+    Episodes get "<name>.nfo" next to their .strm, movies a movie.nfo in
+    their folder, and every show one tvshow.nfo in its top folder, built
+    from the episode with the most show metadata. Like
+    build_file_contents(), later entries replace earlier ones.
+    """
+    shows = {}  # show folder -> entry used for tvshow.nfo
+    for entry in entries:
+        path = strm_engine.entry_path(entry, layout)
+        yield path, entry.url
+        folder = os.path.dirname(path)
+        if entry.season is None or entry.episode is None:
+            yield os.path.join(folder, MOVIE_NFO_FILE_NAME), movie_nfo(entry)
+            continue
+        yield os.path.splitext(path)[0] + NFO_EXTENSION, episode_nfo(entry)
+        show_folder = path.replace("\\", "/").split("/")[0]
+        known = shows.get(show_folder)
+        if known is None or _show_meta_count(entry) > _show_meta_count(known):
+            shows[show_folder] = entry
+    for show_folder, entry in shows.items():
+        yield os.path.join(show_folder, TVSHOW_NFO_FILE_NAME), tvshow_nfo(entry)
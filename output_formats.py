@@ -0,0 +1,88 @@
+"""Output formats the writer engine can produce
+
+An OutputFormat turns a session entry (file name + content as edited) into
+the file that is written: its name and its text. The engine, the archive
+export and the reconciliation planner all go through the same format, so
+batching, concurrency, durability and progress work the same for every
+format. New formats are added with register_output_format():
+
+    class NfoLinkFormat(OutputFormat):
+        def render(self, file_name, content):
+            return f"<link>{content.strip()}</link>\\n"
+
+    register_output_format(NfoLinkFormat("link", ".link.nfo", "URL wrapped in an NFO link"))
+"""
+import os
+
+# Extensions that are replaced when a file name is written in another format
+KNOWN_EXTENSIONS = (".strm", ".stmr")
+
+
+class OutputFormat:
+    """Write the content of every entry unchanged, under the format's extension"""
+
+    def __init__(self, name, extension, description=""):
+        self.name = name
+        self.extension = extension
+        self.description = description
+
+    def path(self, file_name):
+        """Return the name file_name is written under"""
+        if file_name.lower().endswith(self.extension):
+            return file_name
+        root, extension = os.path.splitext(file_name)
+        if extension.lower() in KNOWN_EXTENSIONS:
+            file_name = root
+        return file_name + self.extension
+
+    def render(self, file_name, content):
+        """Return the text written for an entry"""
+        return content
+
+    def converts(self, file_name):
+        """True for entry files; other files (e.g. .nfo sidecars) are written as they are"""
+        extension = os.path.splitext(file_name)[1].lower()
+        return not extension or extension in KNOWN_EXTENSIONS or extension == self.extension
+
+    def writes_as_is(self, file_name):
+        """True if an entry is written under its own name and with its own text"""
+        if not self.converts(file_name):
+            return True
+        return self.path(file_name) == file_name and type(self).render is OutputFormat.render
+
+    def convert(self, pairs):
+        """Yield (written name, written text) for every (file name, content) pair"""
+        for file_name, content in pairs:
+            if self.converts(file_name):
+                yield self.path(file_name), self.render(file_name, content)
+            else:
+                yield file_name, content
+
+
+class M3uFormat(OutputFormat):
+    """A one-entry extended M3U playlist per file, titled after the file"""
+
+    def render(self, file_name, content):
+        lines = [line.strip() for line in content.splitlines() if line.strip()]
+        title = os.path.splitext(os.path.basename(file_name.replace("\\", "/")))[0]
+        return f"#EXTM3U\n#EXTINF:-1,{title}\n{lines[0] if lines else ''}\n"
+
+
+FORMAT_STRM = OutputFormat("strm", ".strm", "Jellyfin/Kodi .strm file with the URL")
+FORMAT_STMR = OutputFormat("stmr", ".stmr", "STMR file")
+FORMAT_M3U = M3uFormat("m3u", ".m3u", "one-entry M3U playlist")
+
+OUTPUT_FORMATS = {output_format.name: output_format for output_format in (FORMAT_STRM, FORMAT_STMR, FORMAT_M3U)}
+
+
+def register_output_format(output_format):
+    """Make output_format available by its name (replaces a format of the same name)"""
+    OUTPUT_FORMATS[output_format.name] = output_format
+
+
+def get_output_format(name):
+    """Return the registered format called name; raises ValueError for unknown names"""
+    try:
+        return OUTPUT_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output format: {name} (known: {', '.join(sorted(OUTPUT_FORMATS))})")
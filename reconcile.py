@@ -0,0 +1,203 @@
+"""Plan a generation run against what is already in the target folder
+
+Generation only ever writes, so files of episodes that were dropped or
+renamed stay behind. plan_generation() compares the desired files with the
+target folder - one directory scan plus the hashes in the write manifest,
+no file is opened - and sorts every file into create, update, unchanged or
+delete. The plan can be printed as a dry run or applied: apply_plan()
+writes only create + update and removes the delete list.
+
+Pruning is deliberately conservative:
+    - only files recorded in the manifest (i.e. written by this tool) are
+      deleted, unless prune_unmanaged is set;
+    - a plan that would delete more than max_prune (a fraction of the files
+      in the folder) is refused, so an empty or truncated manifest cannot
+      wipe a library;
+    - folders are only removed once pruning left them empty.
+"""
+import os
+
+import strm_engine
+from library_reader import scan_library
+
+MAX_PRUNE_FRACTION = 0.5  # Largest share of the existing files a plan may delete
+DEFAULT_PRUNE_WORKERS = 16  # Parallel deletes; each one is a round trip on a network share
+
+
+class _PlannedFiles:
+    """The create and update files of a plan, read from its source as they are written"""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def __len__(self):
+        return len(self.plan.create) + len(self.plan.update)
+
+    def iter_items(self):
+        wanted = set(self.plan.create)
+        wanted.update(self.plan.update)
+        for file_name, content in strm_engine.output_items(self.plan.file_contents, self.plan.output_format):
+            if file_name in wanted:
+                yield file_name, content
+
+
+class GenerationPlan:
+    """What a run would do to a target folder; lists hold relative file names
+
+    Only names are kept; the contents stay in file_contents and are read
+    again, converted by output_format, when the plan is applied.
+    """
+
+    def __init__(self, folder, file_contents, output_format=None):
+        self.folder = folder
+        self.file_contents = file_contents
+        self.output_format = output_format
+        self.create = []
+        self.update = []
+        self.unchanged = []
+        self.delete = []
+        self.unmanaged = []  # Files not in the manifest that are not desired either; kept
+        self.existing = 0  # Files of the scanned extensions found in the folder
+
+    def summary(self):
+        """Human readable one-line summary"""
+        text = (f"{len(self.create)} to create, {len(self.update)} to update, "
+                f"{len(self.unchanged)} unchanged, {len(self.delete)} to delete")
+        if self.unmanaged:
+            text += f", {len(self.unmanaged)} unknown files kept"
+        return text
+
+    def lines(self):
+        """Yield one "action path" line per file that would change"""
+        for action, files in (("create", self.create), ("update", self.update), ("delete", self.delete)):
+            for file_name in files:
+                yield f"{action} {file_name}"
+
+    def to_dict(self):
+        """Return the plan as a JSON-ready dict"""
+        return {
+            "folder": self.folder,
+            "create": self.create,
+            "update": self.update,
+            "unchanged": len(self.unchanged),
+            "delete": self.delete,
+            "unmanaged": self.unmanaged,
+        }
+
+    def changed_files(self):
+        """Return the create and update files as a mapping GenerationJob streams from"""
+        return _PlannedFiles(self)
+
+    def check_prune_limit(self, max_prune=MAX_PRUNE_FRACTION):
+        """Raise ValueError if the plan deletes more than max_prune of the existing files"""
+        if self.delete and len(self.delete) > max_prune * self.existing:
+            raise ValueError(f"Refusing to delete {len(self.delete)} of {self.existing} files in {self.folder}; "
+                             f"raise the prune limit if this is intended")
+
+
+def plan_generation(folder, file_contents, prune=False, prune_unmanaged=False, extensions=None,
+                    output_format=None):
+    """Compare file_contents with folder and return a GenerationPlan
+
+    Files on disk with one of extensions (default: the extension of
+    output_format, .strm without one) that are not desired go to
+    plan.delete if prune is set (and they were generated by this tool, or
+    prune_unmanaged is set). With output_format the plan lists the
+    converted file names. file_contents is read once, as a stream for
+    content stores, and only the names are kept.
+    """
+    if extensions is None:
+        extensions = (output_format.extension if output_format is not None else strm_engine.STRM_EXTENSION,)
+    manifest = strm_engine.WriteManifest(folder)
+    key = strm_engine.WriteManifest.key
+    existing = set()
+    if os.path.isdir(folder):
+        existing = {key(file_name) for file_name in scan_library(folder, extensions)}
+
+    plan = GenerationPlan(folder, file_contents, output_format)
+    plan.existing = len(existing)
+    desired = set()
+    for file_name, content in strm_engine.output_items(file_contents, output_format):
+        name = key(file_name)
+        desired.add(name)
+        if name not in existing:
+            plan.create.append(file_name)
+        elif manifest.hashes.get(name) == strm_engine.content_hash(content):
+            plan.unchanged.append(file_name)
+        else:
+            plan.update.append(file_name)
+
+    for name in sorted(existing - desired):
+        if name in manifest.hashes or prune_unmanaged:
+            (plan.delete if prune else plan.unmanaged).append(name)
+        else:
+            plan.unmanaged.append(name)
+    return plan
+
+
+def _remove(path):
+    """Delete one file; returns the exception instead of raising it"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass  # Already gone, which is what we wanted
+    except OSError as e:
+        return e
+    return None
+
+
+def prune_files(folder, file_names, workers=DEFAULT_PRUNE_WORKERS):
+    """Delete file_names below folder in parallel, then remove folders left empty
+
+    Returns the (file name, exception) pairs of files that could not be deleted.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = [os.path.join(folder, *file_name.split("/")) for file_name in file_names]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strm-prune") as executor:
+        errors = [(file_name, error) for file_name, error in zip(file_names, executor.map(_remove, paths))
+                  if error is not None]
+
+    # Deepest folders first, so a season folder goes before its show folder
+    root = os.path.abspath(folder)
+    parents = {os.path.dirname(os.path.abspath(path)) for path in paths}
+    for parent in sorted(parents, key=len, reverse=True):
+        while parent != root and parent.startswith(root + os.sep):
+            try:
+                os.rmdir(parent)  # Fails unless empty, so nothing else is ever removed
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+    return errors
+
+
+def apply_plan(plan, workers=strm_engine.DEFAULT_WORKERS, durability=strm_engine.DEFAULT_DURABILITY,
+               max_prune=MAX_PRUNE_FRACTION, metrics=None, force=False):
+    """Write the create and update files of plan and delete its delete list
+
+    Returns (GenerationJob, prune errors). Nothing is written or deleted if
+    the plan exceeds max_prune, and nothing is deleted if writing failed.
+    """
+    plan.check_prune_limit(max_prune)
+    job = strm_engine.GenerationJob(plan.folder, plan.changed_files(), workers, force, durability, metrics).start()
+    job.wait()
+    if job.errors:
+        return job, []
+    return job, prune_plan(plan)
+
+
+def prune_plan(plan):
+    """Delete the delete list of plan and drop those files from the manifest
+
+    Returns the (file name, exception) pairs of files that could not be deleted.
+    """
+    if not plan.delete:
+        return []
+    errors = prune_files(plan.folder, plan.delete)
+    failed = {file_name for file_name, _ in errors}
+    manifest = strm_engine.WriteManifest(plan.folder)
+    for file_name in plan.delete:
+        if file_name not in failed and manifest.hashes.pop(file_name, None) is not None:
+            manifest.changed = True
+    manifest.save()
+    return errors
@@ -0,0 +1,247 @@
+"""Crash-safe journal of an editing session
+
+Every edit is appended as one JSON line to a journal file and flushed
+immediately, so closing the window or a crash loses at most the edit being
+typed. After compact_every records the full state is written to a snapshot
+(temp file + os.replace); on startup the snapshot is loaded and only the
+short journal tail after it is replayed.
+
+Compaction triggered by an edit must not stall typing, so the journal is
+moved aside and the snapshot is written and synced on a background thread
+while new records go to a fresh journal. The moved journal is deleted once
+the snapshot is in place; until then it is replayed before the journal.
+
+Records are absolute ("file X now has content Y"), so replaying a record
+that is already part of the snapshot is harmless. A torn last line from a
+crash is dropped.
+"""
+import json
+import os
+import shutil
+import threading
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".strm_sessions")
+DEFAULT_COMPACT_EVERY = 1000  # Journal records before they are folded into the snapshot
+
+SNAPSHOT_FILE_NAME = "session.snapshot.json"
+JOURNAL_FILE_NAME = "session.journal"
+ROTATED_JOURNAL_FILE_NAME = "session.journal.old"  # Journal folded into a snapshot still being written
+
+
+class JournalState:
+    """Session state restored from a journal"""
+
+    def __init__(self, meta=None, files=None, file_contents=None):
+        self.meta = meta or {}  # folder, content_type, season_number, current_file, ...
+        self.files = files or []
+        self.file_contents = file_contents or {}
+
+    def apply(self, record):
+        """Apply one journal record"""
+        op = record.get("op")
+        if op == "set":
+            file_name = record["file"]
+            if file_name not in self.file_contents:
+                self.files.append(file_name)
+            self.file_contents[file_name] = record.get("content", "")
+        elif op == "delete":
+            file_name = record["file"]
+            if file_name in self.file_contents:
+                del self.file_contents[file_name]
+                self.files.remove(file_name)
+        elif op == "meta":
+            self.meta.update(record.get("fields", {}))
+
+
+class SessionJournal:
+    """Append-only journal plus periodic snapshot in one folder
+
+    source, if set, is a callable returning (files, file_contents, meta) of
+    the live session; it is used to write snapshots during compaction.
+    """
+
+    def __init__(self, folder, compact_every=DEFAULT_COMPACT_EVERY):
+        self.folder = folder
+        self.compact_every = compact_every
+        self.snapshot_path = os.path.join(folder, SNAPSHOT_FILE_NAME)
+        self.journal_path = os.path.join(folder, JOURNAL_FILE_NAME)
+        self.rotated_path = os.path.join(folder, ROTATED_JOURNAL_FILE_NAME)
+        self.source = None
+        self.meta = {}
+        self.records_since_snapshot = 0
+        self.error = None  # OSError of the last background compaction, if it failed
+        self._file = None
+        self._compaction = None  # Thread writing a snapshot in the background
+
+    def load(self):
+        """Return the saved JournalState, or None if there is no saved session"""
+        state = None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            state = JournalState(
+                dict(data.get("meta", {})),
+                [name for name, _ in data.get("files", [])],
+                {name: content for name, content in data.get("files", [])}
+            )
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError):
+            state = None  # Corrupt snapshot, fall back to the journal alone
+
+        # Replay the tail of edits made after the snapshot; a journal moved aside for
+        # a compaction that never finished comes first
+        for path in (self.rotated_path, self.journal_path):
+            state = self._replay(path, state)
+
+        if state is not None:
+            self.meta = dict(state.meta)
+        return state
+
+    def _replay(self, path, state):
+        """Apply the records of one journal file to state (created if None) and return it"""
+        try:
+            with open(path, "rb+") as file:
+                valid_end = 0
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        record = json.loads(line.decode("utf-8"))
+                    except ValueError:
+                        # Torn write at the end of the journal; cut it off so new records start on a clean line
+                        file.truncate(valid_end)
+                        break
+                    valid_end += len(line)
+                    if state is None:
+                        state = JournalState()
+                    state.apply(record)
+                    self.records_since_snapshot += 1
+        except FileNotFoundError:
+            pass
+        return state
+
+    def _append(self, record):
+        """Append one record and flush it to the operating system"""
+        if self._file is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.records_since_snapshot += 1
+        if self.records_since_snapshot >= self.compact_every and self.source is not None:
+            self.compact_in_background()
+
+    def record_content(self, file_name, content):
+        """Record that file_name now has content (also used for new files)"""
+        self._append({"op": "set", "file": file_name, "content": content})
+
+    def record_delete(self, file_name):
+        """Record that file_name was removed"""
+        self._append({"op": "delete", "file": file_name})
+
+    def record_meta(self, **fields):
+        """Record session settings such as the folder or the selected file"""
+        self.meta.update(fields)
+        self._append({"op": "meta", "fields": fields})
+
+    def snapshot(self, files, file_contents, meta=None):
+        """Write the full state and start an empty journal"""
+        self.wait()
+        rows = self._rows(files, file_contents, meta)
+        self._rotate()
+        self._write_snapshot(rows, dict(self.meta))
+
+    def compact(self):
+        """Fold the journal into a snapshot of the live session (needs source)"""
+        if self.source is None:
+            return
+        files, file_contents, meta = self.source()
+        self.snapshot(files, file_contents, meta)
+
+    def compact_in_background(self):
+        """Like compact(), but write the snapshot on a background thread
+
+        Only copying the session happens on the calling thread. Does nothing
+        while an earlier background compaction is still running.
+        """
+        if self.source is None or (self._compaction is not None and self._compaction.is_alive()):
+            return
+        files, file_contents, meta = self.source()
+        rows = self._rows(files, file_contents, meta)
+        self._rotate()
+        self._compaction = threading.Thread(target=self._compact_worker, args=(rows, dict(self.meta)),
+                                            name="strm-journal-compact", daemon=True)
+        self._compaction.start()
+
+    def _compact_worker(self, rows, meta):
+        try:
+            self._write_snapshot(rows, meta)
+            self.error = None
+        except OSError as e:
+            self.error = e  # The moved journal stays, so nothing is lost
+
+    def wait(self):
+        """Wait until a background compaction has finished"""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def _rows(self, files, file_contents, meta):
+        """Copy the session into snapshot rows so it can be written while editing goes on"""
+        if meta:
+            self.meta.update(meta)
+        return [[name, file_contents.get(name, "")] for name in files]
+
+    def _rotate(self):
+        """Move the journal aside; new records go to a fresh journal"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.records_since_snapshot = 0
+        if not os.path.exists(self.rotated_path):
+            try:
+                os.replace(self.journal_path, self.rotated_path)
+            except FileNotFoundError:
+                pass
+            return
+        # An earlier snapshot was never completed; its records must stay in front of these
+        try:
+            with open(self.journal_path, "rb") as source, open(self.rotated_path, "ab") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def _write_snapshot(self, rows, meta):
+        """Write and sync the snapshot, then drop the journal it replaces"""
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "meta": meta, "files": rows}, file, ensure_ascii=False, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        try:
+            os.remove(self.rotated_path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Forget the saved session"""
+        self.wait()
+        self.close()
+        self.meta = {}
+        self.records_since_snapshot = 0
+        for path in (self.snapshot_path, self.journal_path, self.rotated_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Close the journal file once a background compaction has finished"""
+        self.wait()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
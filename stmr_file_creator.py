@@ -1,6 +1,15 @@
+import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-import os
+
+import archive_export
+import library_reader
+import output_formats
+import strm_engine
+from file_index import FileIndex
+from session_journal import DEFAULT_JOURNAL_DIR, SessionJournal
+
+PROGRESS_POLL_MS = 100  # how often the status bar polls a running generation job
 
 class StrmFileCreator:
     def __init__(self, root):
@@ -20,8 +29,19 @@ class StrmFileCreator:
         self.files = ["untitled.stmr"]
         self.file_contents = {"untitled.stmr": ""}
         
-        # Initial folder selection
-        self.select_initial_folder()
+        # Every edit is journaled so a crash or closed window doesn't lose it
+        self.journal = SessionJournal(os.path.join(DEFAULT_JOURNAL_DIR, "stmr_file_creator"))
+        self.journal.source = self.journal_state
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Restore the previous session or start with an initial folder selection
+        if not self.restore_session():
+            self.select_initial_folder()
+            if self.current_folder:  # Nothing to journal when the selection was cancelled
+                self.journal.compact()
+        
+        # Search index over file names and contents, kept up to date on every edit
+        self.file_index = FileIndex(self.files, self.file_contents)
         
         # Create main frame
         self.main_frame = ttk.Frame(self.root)
@@ -38,6 +58,13 @@ class StrmFileCreator:
         # File list label
         ttk.Label(self.left_frame, text="Files:").pack(anchor=tk.W, pady=(0, 5))
         
+        # Filter box, narrows the list as you type
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(self.left_frame, textvariable=self.filter_var)
+        self.filter_entry.pack(fill=tk.X, pady=(0, 5))
+        self.filter_entry.bind('<Escape>', lambda event: self.filter_var.set(""))
+        self.filter_var.trace_add("write", lambda *args: self.update_file_list())
+        
         # File listbox with scrollbar
         self.file_list_frame = ttk.Frame(self.left_frame)
         self.file_list_frame.pack(fill=tk.BOTH, expand=True)
@@ -67,6 +94,10 @@ class StrmFileCreator:
         self.delete_file_button = ttk.Button(self.file_button_frame, text="Delete File", command=self.delete_file)
         self.delete_file_button.pack(side=tk.LEFT)
         
+        # Open existing folder button
+        self.open_folder_button = ttk.Button(self.file_button_frame, text="Open Folder", command=self.open_folder)
+        self.open_folder_button.pack(side=tk.LEFT, padx=(5, 0))
+        
         # Right side - file content
         self.right_frame = ttk.Frame(self.paned_window)
         self.paned_window.add(self.right_frame, weight=3)
@@ -88,6 +119,7 @@ class StrmFileCreator:
         
         # Content binding for auto-save
         self.content_text.bind('<KeyRelease>', self.save_current_content)
+        self.content_text.insert(tk.END, self.file_contents.get(self.current_file, ""))
         
         # Bottom frame for save buttons
         self.bottom_frame = ttk.Frame(self.main_frame)
@@ -104,6 +136,10 @@ class StrmFileCreator:
         # Save button
         self.save_button = ttk.Button(self.bottom_frame, text="Generate STMR Files", command=self.generate_stmr_files)
         self.save_button.pack(side=tk.RIGHT)
+        
+        # Export button: one archive instead of many small files
+        self.export_button = ttk.Button(self.bottom_frame, text="Export Archive", command=self.export_archive)
+        self.export_button.pack(side=tk.RIGHT, padx=(0, 10))
 
         # Status bar
         self.status_var = tk.StringVar()
@@ -111,6 +147,102 @@ class StrmFileCreator:
         self.status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+    def restore_session(self):
+        """Offer to restore the journaled session; returns True if restored"""
+        try:
+            state = self.journal.load()
+        except OSError:
+            state = None
+        if state is None or not state.files or not state.meta.get("folder"):
+            self.journal.clear()
+            return False
+        
+        if not messagebox.askyesno("Restore Session",
+                                   f"Restore the previous session with {len(state.files)} files?\n\n"
+                                   f"Folder: {state.meta['folder']}"):
+            self.journal.clear()
+            return False
+        
+        if state.meta.get("library"):
+            # Reopen the folder and apply the edits made on top of it
+            self.load_folder(state.meta["library"])
+            for file_name in state.files:
+                if file_name not in self.file_contents:
+                    self.files.append(file_name)
+                self.file_contents[file_name] = state.file_contents.get(file_name, "")
+        else:
+            self.files = state.files
+            self.file_contents = state.file_contents
+        self.current_folder = state.meta["folder"]
+        current_file = state.meta.get("current_file")
+        self.current_file = current_file if current_file in self.file_contents else self.files[0]
+        return True
+    
+    def journal_state(self):
+        """Return (files, file_contents, meta) for a journal snapshot
+
+        For an opened folder only the edited files are saved; the rest is
+        read from the folder again on restore.
+        """
+        if isinstance(self.file_contents, library_reader.LibraryContents):
+            files, file_contents = self.file_contents.edits()
+            return files, file_contents, {"library": self.file_contents.folder}
+        return self.files, self.file_contents, {"library": None}
+    
+    def load_folder(self, folder, files=None):
+        """Use the .stmr files in folder; returns False if there are none
+
+        Only the names are listed now (or taken from files, an earlier scan of
+        folder), contents are read on selection and in the background.
+        """
+        files, file_contents = library_reader.open_library(folder, (".stmr",), file_names=files)
+        if not files:
+            return False
+        self.files = files
+        self.file_contents = file_contents
+        self.current_file = files[0]
+        self.current_folder = folder
+        file_contents.start_prefetch()
+        return True
+    
+    def open_folder(self):
+        """Load the .stmr files of an existing folder for editing"""
+        folder = filedialog.askdirectory(title="Open folder with existing .stmr files")
+        if not folder:
+            return  # User cancelled
+        if not messagebox.askyesno("Open Folder", "Opening a folder will replace the current files. Continue?"):
+            return
+        
+        self.save_current_content()
+        try:
+            loaded = self.load_folder(folder)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not open the folder:\n{str(e)}")
+            return
+        if not loaded:
+            messagebox.showinfo("Open Folder", "The folder contains no .stmr files.")
+            return
+        
+        self.file_index = FileIndex(self.files, self.file_contents)
+        self.journal.record_meta(folder=folder)
+        self.journal.compact()
+        self.folder_label.config(text=f"Selected folder: {self.current_folder}")
+        self.filter_var.set("")
+        self.update_file_list()
+        self.file_listbox.selection_set(0)
+        self.on_file_select(None)
+        self.status_var.set(f"Opened {len(self.files)} files from {folder}")
+    
+    def on_close(self):
+        """Fold the journal into a snapshot and close the window"""
+        try:
+            self.save_current_content()
+            self.journal.compact()
+            self.journal.close()
+        except (OSError, AttributeError, tk.TclError):
+            pass
+        self.root.destroy()
+    
     def select_initial_folder(self):
         """Prompt user to select initial folder"""
         self.root.withdraw()  # Hide main window during folder selection
@@ -123,9 +255,16 @@ class StrmFileCreator:
                 self.select_initial_folder()
             else:
                 self.root.quit()
-                return
+            return
                 
         self.current_folder = folder
+        # Edit the files already in the folder instead of overwriting them
+        existing = library_reader.scan_library(folder, (".stmr",))
+        if existing and messagebox.askyesno("Existing Files",
+                                            f"This folder already contains {len(existing)} .stmr files.\n\n"
+                                            "Open them for editing?"):
+            self.load_folder(folder, existing)
+        self.journal.record_meta(folder=folder)
         self.root.deiconify()  # Show main window again
     
     def change_folder(self):
@@ -133,14 +272,16 @@ class StrmFileCreator:
         folder = filedialog.askdirectory(title="Select folder for .stmr files")
         if folder:  # User selected a folder
             self.current_folder = folder
+            self.journal.record_meta(folder=folder)
             self.folder_label.config(text=f"Selected folder: {self.current_folder}")
             self.status_var.set(f"Folder changed to: {self.current_folder}")
     
     def update_file_list(self):
-        """Update the file list in the UI"""
+        """Update the file list in the UI, showing only files matching the filter"""
+        visible = self.file_index.search(self.filter_var.get())
         self.file_listbox.delete(0, tk.END)
-        for file in self.files:
-            self.file_listbox.insert(tk.END, file)
+        if visible:
+            self.file_listbox.insert(tk.END, *visible)  # One Tcl call for the whole list
     
     def on_file_select(self, event):
         """Handle file selection from the list"""
@@ -154,6 +295,7 @@ class StrmFileCreator:
             
             # Update current file and show content
             self.current_file = selected_file
+            self.journal.record_meta(current_file=selected_file)
             self.file_label.config(text=f"Editing: {self.current_file}")
             
             # Clear and insert content
@@ -165,7 +307,17 @@ class StrmFileCreator:
     
     def save_current_content(self, event=None):
         """Save the current file content to memory"""
-        self.file_contents[self.current_file] = self.content_text.get(1.0, "end-1c")
+        if self.current_file not in self.file_contents:
+            return  # The file was just deleted
+        content = self.content_text.get(1.0, "end-1c")
+        if self.file_contents[self.current_file] == content:
+            return
+        self.file_contents[self.current_file] = content
+        self.file_index.update(self.current_file, content)
+        try:
+            self.journal.record_content(self.current_file, content)
+        except OSError as e:
+            self.status_var.set(f"Could not write session journal: {str(e)}")
     
     def new_file(self):
         """Create a new file"""
@@ -188,8 +340,11 @@ class StrmFileCreator:
         # Add to files and content
         self.files.append(file_name)
         self.file_contents[file_name] = ""
+        self.file_index.update(file_name, "")
+        self.journal.record_content(file_name, "")
         
-        # Update UI
+        # Update UI (clearing the filter so the new file is listed)
+        self.filter_var.set("")
         self.update_file_list()
         
         # Select the new file
@@ -215,6 +370,8 @@ class StrmFileCreator:
                 # Remove file
                 self.files.remove(file_to_delete)
                 del self.file_contents[file_to_delete]
+                self.file_index.remove(file_to_delete)
+                self.journal.record_delete(file_to_delete)
                 
                 # Update UI
                 self.update_file_list()
@@ -228,26 +385,52 @@ class StrmFileCreator:
             messagebox.showwarning("Warning", "No file selected")
     
     def generate_stmr_files(self):
-        """Generate all STMR files in the selected folder"""
+        """Generate all STMR files in the selected folder; returns the running GenerationJob"""
         try:
             # First save current content
             self.save_current_content()
             
-            # Check if folder exists
-            if not os.path.exists(self.current_folder):
-                os.makedirs(self.current_folder)
-            
-            # Create each file
-            for file_name, content in self.file_contents.items():
-                file_path = os.path.join(self.current_folder, file_name)
-                with open(file_path, "w", encoding="utf-8") as file:
-                    file.write(content)
-            
-            messagebox.showinfo("Success", f"Generated {len(self.files)} STMR files in:\n{self.current_folder}")
-            self.status_var.set(f"Generated {len(self.files)} files successfully")
+            # Write each file whose content changed since the last run on the shared writer engine
+            job = strm_engine.GenerationJob(self.current_folder, self.file_contents,
+                                            output_format=output_formats.FORMAT_STMR).start()
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while saving files:\n{str(e)}")
             self.status_var.set("Error generating files")
+            return None
+        
+        self.save_button.config(state=tk.DISABLED)
+        folder = self.current_folder
+        
+        def poll():
+            if not job.finished.is_set():
+                self.status_var.set(f"Generating: {job.done}/{job.total} files")
+                self.root.after(PROGRESS_POLL_MS, poll)
+                return
+            self.save_button.config(state=tk.NORMAL)
+            if job.errors:
+                file_name, error = job.errors[0]
+                messagebox.showerror("Error", f"An error occurred while saving files:\n{file_name}: {str(error)}")
+                self.status_var.set("Error generating files")
+                return
+            messagebox.showinfo("Success", f"Generated {job.total} STMR files in:\n{folder}\n\n{job.stats.summary()}")
+            self.status_var.set(f"Generated {job.total} files successfully ({job.stats.summary()})")
+        
+        poll()
+        return job
+
+    def export_archive(self):
+        """Write all STMR files into one .tar/.tar.gz/.zip archive"""
+        self.save_current_content()
+        path = filedialog.asksaveasfilename(title="Export STMR files as archive", defaultextension=".tar",
+                                            filetypes=archive_export.ARCHIVE_FILE_TYPES)
+        if not path:
+            return
+        try:
+            result = archive_export.export_archive(self.file_contents, path, output_format=output_formats.FORMAT_STMR)
+            self.status_var.set(f"Exported {result.files} files ({result.bytes} bytes) to {path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while exporting files:\n{str(e)}")
+            self.status_var.set("Error exporting files")
 
 if __name__ == "__main__":
     root = tk.Tk()
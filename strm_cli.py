@@ -0,0 +1,432 @@
+"""Command line front-end for the .strm generation engine
+
+Example:
+    python strm_cli.py generate manifest.csv --output /srv/media/shows
+    python strm_cli.py expand --show "My Show" --seasons 1-3 --episodes 1-24 \\
+        --template "https://cdn.example.com/{show_url}/S{season:02d}E{episode:02d}.mkv" -o /srv/media/shows
+    python strm_cli.py generate manifest.csv --archive - | ssh jellyfin tar -x -C /srv/media/shows
+    python strm_cli.py probe manifest.csv
+    python strm_cli.py sync lists/ --output /srv/media/shows
+    python strm_cli.py gui
+
+Only the modules a command needs are imported, so headless runs never load
+Tk or customtkinter and start within IMPORT_BUDGET_MS (see
+benchmarks/bench_startup.py).
+"""
+import argparse
+import json
+import os
+import sys
+
+import output_formats
+import strm_engine
+
+IMPORT_BUDGET_MS = 50  # Import time allowed for this module and the engine
+
+
+def run_probe(urls, args):
+    """Probe urls with the options in args, print unreachable ones and return them"""
+    # Imported here so commands that don't probe don't pay for asyncio/ssl
+    import strm_probe
+
+    results = strm_probe.probe_urls(
+        urls,
+        cache_path=None if args.no_cache else args.cache,
+        ttl=args.ttl,
+        per_host=args.per_host,
+        timeout=args.timeout
+    )
+    dead = [result for result in results.values() if result.ok is False]
+    for result in dead:
+        reason = f"HTTP {result.status}" if result.status is not None else result.error
+        print(f"dead: {result.url} ({reason})", file=sys.stderr)
+    if not args.quiet:
+        reachable = sum(1 for result in results.values() if result.ok)
+        print(f"Probed {len(results)} URLs: {reachable} reachable, {len(dead)} dead")
+    return dead
+
+
+def cmd_probe(args):
+    """Check that the URLs of a manifest are reachable"""
+    urls = [entry.url for entry in strm_engine.read_manifest(args.manifest)]
+    return 1 if run_probe(urls, args) else 0
+
+
+def new_file_contents(args):
+    """Return the mapping entries are collected in: a dict, or an emptied SQLite store with --store"""
+    if not args.store:
+        return {}
+    import content_store
+
+    store = content_store.SqliteContentStore(args.store)
+    store.clear()
+    return store
+
+
+def cmd_generate(args):
+    """Generate a .strm tree from a manifest"""
+    entries = strm_engine.read_manifest(args.manifest)
+    if args.skip_empty:
+        # Dropped before the files are built, so no sidecar (movie.nfo, tvshow.nfo) is made for them either
+        entries = (entry for entry in entries if entry.url.strip())
+    file_contents = strm_engine.build_file_contents(entries, args.layout, new_file_contents(args), args.nfo)
+
+    empty_files = [] if args.skip_empty or args.allow_empty else strm_engine.find_empty_files(file_contents)
+    if empty_files:
+        print(f"error: {len(empty_files)} entries have no URL (use --allow-empty or --skip-empty):",
+              file=sys.stderr)
+        for file_name in empty_files[:20]:
+            print(f"  {file_name}", file=sys.stderr)
+        return 1
+
+    return write_tree(file_contents, args)
+
+
+def cmd_expand(args):
+    """Generate whole seasons from a URL template"""
+    import url_template
+
+    render = url_template.compile_url_template(args.template)
+    seasons = url_template.parse_range(args.seasons)
+    episodes = url_template.parse_range(args.episodes)
+    entries = url_template.expand_template(render, args.show, seasons, episodes, args.base)
+    return write_tree(strm_engine.build_file_contents(entries, args.layout, new_file_contents(args), args.nfo), args)
+
+
+def new_notifier(args):
+    """Return a jellyfin_notify.RefreshNotifier for the --jellyfin options, or None"""
+    if not args.jellyfin:
+        return None
+    import jellyfin_notify
+
+    if not args.jellyfin_key:
+        raise ValueError("--jellyfin needs an API key (--jellyfin-key or JELLYFIN_API_KEY)")
+    return jellyfin_notify.RefreshNotifier(args.jellyfin, args.jellyfin_key,
+                                           args.jellyfin_path or os.path.abspath(args.output),
+                                           args.jellyfin_delay)
+
+
+def close_notifier(notifier, args):
+    """Send the pending refresh and report its outcome"""
+    if notifier is None:
+        return
+    notifier.close()
+    for error in notifier.errors:
+        print(f"warning: Jellyfin refresh failed: {error}", file=sys.stderr)
+    if notifier.requests_sent and not args.quiet:
+        print(f"Asked Jellyfin to refresh ({notifier.requests_sent} requests)")
+
+
+def export_tree(file_contents, args):
+    """Write file_contents as one archive (--archive)"""
+    import archive_export
+
+    result = archive_export.export_archive(file_contents, args.archive, args.archive_format,
+                                           output_format=output_formats.get_output_format(args.format))
+    if not args.quiet:
+        # stderr, so the summary never ends up inside an archive written to stdout
+        print(f"Exported {result.files} files ({result.bytes} bytes) to "
+              f"{'stdout' if args.archive == '-' else args.archive}", file=sys.stderr)
+    return 0
+
+
+def reconcile_tree(file_contents, args):
+    """Plan the run against the target folder; print it (--dry-run) or apply it with pruning (--prune)"""
+    import reconcile
+
+    output_format = output_formats.get_output_format(args.format)
+    extensions = (output_format.extension, ".nfo") if args.nfo else None
+    plan = reconcile.plan_generation(args.output, file_contents, args.prune or args.dry_run, args.prune_unmanaged,
+                                     extensions, output_format)
+    if args.force:
+        plan.update += plan.unchanged
+        plan.unchanged = []
+    if args.dry_run:
+        if not args.quiet:
+            for line in plan.lines():
+                print(line)
+        print(f"Plan for {args.output}: {plan.summary()}")
+        if plan.delete and not args.prune:
+            print("(files are only deleted with --prune)")
+        return 0
+
+    notifier = new_notifier(args)
+    metrics = strm_engine.GenerationMetrics([notifier.file_written] if notifier else [])
+    job, prune_errors = reconcile.apply_plan(plan, args.workers, args.durability, args.prune_limit, metrics,
+                                              args.force)
+    if notifier is not None:
+        for file_name in plan.delete:
+            notifier.add(file_name)
+    close_notifier(notifier, args)
+    if args.report:
+        job.metrics.save_report(args.report)
+    for file_name, error in job.errors + prune_errors:
+        print(f"error: {file_name}: {error}", file=sys.stderr)
+    if job.errors or prune_errors:
+        return 1
+    if not args.quiet:
+        print(f"Generated {job.done} files in {args.output} ({job.stats.summary()}, "
+              f"{len(plan.delete)} deleted; {job.metrics.summary()})")
+    return 0
+
+
+def entry_urls(file_contents, args):
+    """Return the URLs of the entries in file_contents, leaving out .nfo sidecars"""
+    if not args.nfo:
+        return file_contents.values()
+    import nfo_sidecars
+
+    return (content for file_name, content in strm_engine.output_items(file_contents)
+            if not file_name.endswith(nfo_sidecars.NFO_EXTENSION))
+
+
+def write_tree(file_contents, args):
+    """Probe (if requested) and write file_contents with the write options in args"""
+    if not args.output and not args.archive:
+        raise ValueError("either --output or --archive is required")
+    if args.archive and (args.output or args.mirror or args.jellyfin):
+        raise ValueError("--archive cannot be combined with --output, --mirror or --jellyfin")
+    if (args.prune or args.dry_run) and (args.archive or args.mirror):
+        raise ValueError("--prune and --dry-run cannot be combined with --archive or --mirror")
+    if args.probe and run_probe(entry_urls(file_contents, args), args):
+        print("error: some URLs are unreachable, nothing was generated", file=sys.stderr)
+        return 1
+    if args.archive:
+        return export_tree(file_contents, args)
+    if args.prune or args.dry_run:
+        return reconcile_tree(file_contents, args)
+
+    notifier = new_notifier(args)
+    listeners = [notifier.file_written] if notifier else []
+    output_format = output_formats.get_output_format(args.format)
+    if args.mirror:
+        job = strm_engine.MultiTargetJob([args.output] + args.mirror, file_contents, args.workers, args.force,
+                                         args.durability, listeners, output_format).start()
+    else:
+        job = strm_engine.GenerationJob(args.output, file_contents, args.workers, args.force, args.durability,
+                                        strm_engine.GenerationMetrics(listeners),
+                                        output_format=output_format).start()
+    job.wait()
+    close_notifier(notifier, args)
+    if args.report:
+        job.metrics.save_report(args.report)
+    for file_name, error in job.errors:
+        print(f"error: {file_name}: {error}", file=sys.stderr)
+    if args.mirror and not args.quiet:
+        for folder, done, total in job.progress():
+            print(f"{folder}: {done}/{total} files, {job.jobs[folder].stats.summary()}")
+    if job.errors:
+        return 1
+    if not args.quiet and args.mirror:
+        print(f"Generated {len(job.prepared)} files into {len(job.folders)} folders")
+    elif not args.quiet:
+        print(f"Generated {job.done} files in {args.output} ({job.stats.summary()}; {job.metrics.summary()})")
+    return 0
+
+
+def cmd_audit(args):
+    """Report empty, invalid, badly named and duplicate files of a library"""
+    import library_audit
+
+    report = library_audit.audit_library(args.folder, args.workers)
+    if args.json:
+        print(json.dumps(report.to_dict(args.limit), indent=2))
+        return 1 if report.issue_count else 0
+
+    for path in report.empty[:args.limit]:
+        print(f"empty: {path}")
+    for path in report.invalid[:args.limit]:
+        print(f"invalid: {path}")
+    for path, error in report.unreadable[:args.limit]:
+        print(f"unreadable: {path} ({error})")
+    for path, reason in report.bad_names[:args.limit]:
+        print(f"bad name: {path} ({reason})")
+    for group in report.duplicates[:args.limit]:
+        print(f"duplicate URL: {', '.join(group)}")
+    if not args.quiet:
+        print(report.summary())
+    return 1 if report.issue_count else 0
+
+
+def cmd_sync(args):
+    """Regenerate the entries of changed manifests until interrupted"""
+    import strm_sync
+
+    def report(result):
+        for file_name, error in result.errors:
+            print(f"error: {file_name}: {error}", file=sys.stderr)
+        if not args.quiet:
+            print(f"Synced {len(result.manifests)} manifests: {result.changed} changed entries "
+                  f"({result.stats.summary()}), {result.removed} removed entries", flush=True)
+
+    notifier = new_notifier(args)
+    sync = strm_sync.ManifestSync(args.source, args.output, args.layout, args.interval,
+                                  0 if args.once else args.debounce, args.workers, args.durability,
+                                  args.force, report, [notifier.file_written] if notifier else [])
+    try:
+        if args.once:
+            result = sync.sync_once()
+            return 1 if result is not None and result.errors else 0
+        sync.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_notifier(notifier, args)
+    return 0
+
+
+def cmd_gui(args):
+    """Open the graphical generator"""
+    try:
+        import jellyfin_strm_generator
+    except ImportError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    jellyfin_strm_generator.main()
+    return 0
+
+
+def build_parser():
+    """Create the argument parser"""
+    parser = argparse.ArgumentParser(prog="strm_cli", description="Generate Jellyfin .strm files without the GUI")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="write a .strm tree from a manifest")
+    generate.add_argument("manifest", help="CSV (show,season,episode,url), JSON or M3U/M3U8 manifest")
+    empty = generate.add_mutually_exclusive_group()
+    empty.add_argument("--allow-empty", action="store_true", help="write entries without a URL as empty files")
+    empty.add_argument("--skip-empty", action="store_true", help="leave out entries without a URL")
+    add_write_options(generate)
+    generate.set_defaults(func=cmd_generate)
+
+    expand = subparsers.add_parser("expand", help="write whole seasons from a URL template")
+    expand.add_argument("--show", required=True, help="show name")
+    expand.add_argument("--template", required=True,
+                        help="URL template, e.g. '{base}/{show_url}/S{season:02d}E{episode:02d}.mkv'")
+    expand.add_argument("--base", default="", help="value of {base} in the template")
+    expand.add_argument("--seasons", default="1", help="season numbers, e.g. 1-3,5 (default %(default)s)")
+    expand.add_argument("--episodes", required=True, help="episode numbers of every season, e.g. 1-24")
+    add_write_options(expand)
+    expand.set_defaults(func=cmd_expand)
+
+    probe = subparsers.add_parser("probe", help="check that the URLs of a manifest are reachable")
+    probe.add_argument("manifest", help="CSV (show,season,episode,url), JSON or M3U/M3U8 manifest")
+    probe.add_argument("-q", "--quiet", action="store_true", help="only print unreachable URLs")
+    add_probe_options(probe)
+    probe.set_defaults(func=cmd_probe)
+
+    audit = subparsers.add_parser("audit", help="find empty, invalid, badly named and duplicate .strm files")
+    audit.add_argument("folder", help="library folder to scan")
+    audit.add_argument("-j", "--workers", type=int, default=32,
+                       help="folders and file batches read in parallel (default %(default)s)")
+    audit.add_argument("--limit", type=int, default=20, help="entries listed per problem (default %(default)s)")
+    audit.add_argument("--json", action="store_true", help="print the report as JSON")
+    audit.add_argument("-q", "--quiet", action="store_true", help="don't print the summary line")
+    audit.set_defaults(func=cmd_audit)
+
+    sync = subparsers.add_parser("sync", help="watch manifests and regenerate the entries that change")
+    sync.add_argument("source", help="manifest file, or folder of .csv/.json/.m3u/.m3u8 manifests")
+    sync.add_argument("-o", "--output", required=True, help="target folder")
+    sync.add_argument("--layout", choices=strm_engine.LAYOUTS, default=strm_engine.LAYOUT_FLAT,
+                      help="file layout, see generate (default %(default)s)")
+    sync.add_argument("--interval", type=float, default=2.0, help="seconds between polls (default %(default)s)")
+    sync.add_argument("--debounce", type=float, default=1.0,
+                      help="seconds a manifest must stay unchanged before it is read (default %(default)s)")
+    sync.add_argument("--once", action="store_true", help="sync every manifest once and exit")
+    sync.add_argument("-j", "--workers", type=int, default=strm_engine.DEFAULT_WORKERS,
+                      help=f"parallel writer threads (default {strm_engine.DEFAULT_WORKERS})")
+    sync.add_argument("--durability", choices=strm_engine.DURABILITY_MODES, default=strm_engine.DEFAULT_DURABILITY,
+                      help="see generate (default %(default)s)")
+    sync.add_argument("--force", action="store_true", help="rewrite files even if their content did not change")
+    sync.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    add_jellyfin_options(sync)
+    sync.set_defaults(func=cmd_sync)
+
+    gui = subparsers.add_parser("gui", help="open the graphical generator")
+    gui.set_defaults(func=cmd_gui)
+
+    return parser
+
+
+def add_write_options(parser):
+    """Add the options controlling how a tree is written"""
+    parser.add_argument("-o", "--output", help="target folder")
+    parser.add_argument("--archive", metavar="PATH",
+                        help="write one .tar, .tar.gz/.tgz or .zip archive instead of a folder (- for stdout)")
+    parser.add_argument("--archive-format", choices=("tar", "tar.gz", "zip"),
+                        help="archive format (default: from the file name, tar for stdout)")
+    parser.add_argument("--nfo", action="store_true",
+                        help="also write tvshow.nfo, episode .nfo and movie.nfo sidecars from the manifest's "
+                             "title, plot, aired and *_id columns")
+    parser.add_argument("--format", choices=sorted(output_formats.OUTPUT_FORMATS), default="strm",
+                        help="file format to write (default %(default)s)")
+    parser.add_argument("--mirror", metavar="FOLDER", action="append", default=[],
+                        help="also write to this folder, concurrently and independently of the others "
+                             "(can be given several times)")
+    parser.add_argument("--layout", choices=strm_engine.LAYOUTS, default=strm_engine.LAYOUT_FLAT,
+                        help="flat: Show/S01E02.strm; jellyfin: Show (Year)/Season 01/Show (Year) S01E02.strm "
+                             "(default %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=strm_engine.DEFAULT_WORKERS,
+                        help=f"parallel writer threads (default {strm_engine.DEFAULT_WORKERS})")
+    parser.add_argument("--durability", choices=strm_engine.DURABILITY_MODES, default=strm_engine.DEFAULT_DURABILITY,
+                        help="fast: no fsync; atomic: temp file + rename, one directory fsync per run; "
+                             "strict: fsync every file (default %(default)s)")
+    parser.add_argument("--force", action="store_true", help="rewrite files even if their content did not change")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only print what would be created, updated and deleted")
+    parser.add_argument("--prune", action="store_true",
+                        help="delete .strm files this tool wrote earlier that are no longer in the manifest")
+    parser.add_argument("--prune-unmanaged", action="store_true",
+                        help="with --prune, also delete .strm files this tool did not write")
+    parser.add_argument("--prune-limit", type=float, default=0.5,
+                        help="refuse to delete more than this fraction of the existing files (default %(default)s)")
+    parser.add_argument("--store", metavar="DB",
+                        help="collect entries in this SQLite database instead of memory (for very large manifests)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    parser.add_argument("--report", metavar="PATH",
+                        help="write phase timings, per-file latency histogram and throughput as JSON")
+    parser.add_argument("--probe", action="store_true", help="check that all URLs are reachable before writing")
+    add_probe_options(parser)
+    add_jellyfin_options(parser)
+
+
+def add_jellyfin_options(parser):
+    """Add the options for refreshing a Jellyfin server after writing"""
+    parser.add_argument("--jellyfin", metavar="URL", help="Jellyfin server to refresh after writing, "
+                                                           "e.g. http://localhost:8096")
+    parser.add_argument("--jellyfin-key", default=os.environ.get("JELLYFIN_API_KEY"),
+                        help="Jellyfin API key (default: $JELLYFIN_API_KEY)")
+    parser.add_argument("--jellyfin-path", metavar="PATH",
+                        help="the output folder as the Jellyfin server sees it (default: the output folder)")
+    parser.add_argument("--jellyfin-delay", type=float, default=2.0,
+                        help="seconds without new files before the refresh is sent (default %(default)s)")
+
+
+def add_probe_options(parser):
+    """Add the options controlling URL probing"""
+    # Defaults are spelled out so that --help works without importing strm_probe
+    parser.add_argument("--cache", default=os.path.join(os.path.expanduser("~"), ".strm_probe_cache.json"),
+                        help="probe result cache (default %(default)s)")
+    parser.add_argument("--ttl", type=float, default=24 * 60 * 60,
+                        help="seconds a cached result stays valid (default %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="probe every URL, ignoring the cache")
+    parser.add_argument("--per-host", type=int, default=4, help="concurrent connections per host (default %(default)s)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds per request (default %(default)s)")
+
+
+def main(argv=None):
+    """Entry point, returns the process exit code"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        sqlite3 = sys.modules.get("sqlite3")  # Only imported when --store is used
+        if not isinstance(e, (OSError, ValueError)) and not (sqlite3 and isinstance(e, sqlite3.Error)):
+            raise
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
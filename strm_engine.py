@@ -0,0 +1,1094 @@
+"""Headless .strm generation engine
+
+Everything needed to build and write a .strm tree without Tk, customtkinter
+or dialogs. The GUI (jellyfin_strm_generator.py) and the command line
+(strm_cli.py) are both thin front-ends over this module.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+from file_index import FileIndex
+from generation_metrics import GenerationMetrics
+from library_reader import LibraryContents, open_library
+
+STRM_EXTENSION = ".strm"
+MOVIE_FILE_NAME = "movie.strm"
+MANIFEST_FILE_NAME = ".strm-manifest.json"  # Hashes of generated files, kept in the target folder
+DEFAULT_WORKERS = 4  # Parallel writers; enough to hide NAS round trips without flooding the share
+
+# Durability modes for writing files:
+#   fast   - plain write, no fsync (a crash can leave truncated files)
+#   atomic - write a temp file and os.replace it, one directory fsync per batch
+#   strict - like atomic, but fsync every file and its directory
+DURABILITY_FAST = "fast"
+DURABILITY_ATOMIC = "atomic"
+DURABILITY_STRICT = "strict"
+DURABILITY_MODES = (DURABILITY_FAST, DURABILITY_ATOMIC, DURABILITY_STRICT)
+DEFAULT_DURABILITY = DURABILITY_FAST
+
+# Characters Windows (and therefore most SMB shares) refuse in file names
+_INVALID_NAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+# Episode file names as written by episode_file_name, possibly with a prefix
+_UNREAD = object()  # Content of a library file a GenerationJob worker reads itself
+_EPISODE_FILE_NAME = re.compile(r"S(\d+)E(\d+)\.strm$", re.IGNORECASE)
+
+# Layouts of the generated tree:
+#   flat     - Show/S01E02.strm and Show/movie.strm, like the GUI's single-season sessions
+#   jellyfin - Show (Year)/Season 01/Show (Year) S01E02.strm and Movie (Year)/Movie (Year).strm
+LAYOUT_FLAT = "flat"
+LAYOUT_JELLYFIN = "jellyfin"
+LAYOUTS = (LAYOUT_FLAT, LAYOUT_JELLYFIN)
+
+# One manifest row: a show (or movie) name, optional season/episode, the URL, an optional year and
+# optional metadata (a dict of the META_FIELDS columns that were filled in, used for .nfo sidecars)
+Entry = namedtuple("Entry", ["show", "season", "episode", "url", "year", "meta"], defaults=(None, None))
+
+# Optional manifest columns describing the item (title ... tvdb_id) and its show (show_*)
+META_FIELDS = ("title", "plot", "aired", "imdb_id", "tmdb_id", "tvdb_id",
+               "show_title", "show_plot", "show_imdb_id", "show_tmdb_id", "show_tvdb_id")
+
+
+def episode_file_name(season, episode):
+    """Return the file name for one episode, e.g. S01E02.strm"""
+    return f"S{season:02d}E{episode:02d}{STRM_EXTENSION}"
+
+
+def parse_episode_file_name(file_name):
+    """Return (season, episode) for names like S01E02.strm, otherwise None"""
+    match = _EPISODE_FILE_NAME.search(file_name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def series_file_names(season, episode_count):
+    """Return the file names of a season with the given number of episodes"""
+    return [episode_file_name(season, episode) for episode in range(1, episode_count + 1)]
+
+
+def sanitize_name(name):
+    """Make a show name safe to use as a folder name"""
+    name = _INVALID_NAME_CHARS.sub("", name).strip().rstrip(".")
+    return name or "Unknown"
+
+
+def show_folder_name(entry):
+    """Return "Show (Year)", or just the show name if the year is unknown"""
+    name = sanitize_name(entry.show)
+    if entry.year and f"({entry.year})" not in name:
+        name = f"{name} ({entry.year})"
+    return name
+
+
+def entry_path(entry, layout=LAYOUT_FLAT):
+    """Return the path of an entry relative to the output folder"""
+    is_movie = entry.season is None or entry.episode is None
+    if layout == LAYOUT_JELLYFIN:
+        show_folder = show_folder_name(entry)
+        if is_movie:
+            return os.path.join(show_folder, show_folder + STRM_EXTENSION)
+        return os.path.join(show_folder, f"Season {entry.season:02d}",
+                            f"{show_folder} {episode_file_name(entry.season, entry.episode)}")
+    if layout != LAYOUT_FLAT:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    show_folder = sanitize_name(entry.show)
+    if is_movie:
+        return os.path.join(show_folder, MOVIE_FILE_NAME)
+    return os.path.join(show_folder, episode_file_name(entry.season, entry.episode))
+
+
+def show_from_path(file_name):
+    """Return the show name of a generated file from its top-level folder, without the year"""
+    parts = file_name.replace("\\", "/").split("/")
+    if len(parts) < 2:
+        return ""
+    return re.sub(r"\s*\(\d{4}\)$", "", parts[0])
+
+
+def _parse_number(value, field, line):
+    """Parse an optional season/episode number from a manifest field"""
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Manifest entry {line}: {field} must be a number, got {value!r}")
+    if number < 0:
+        raise ValueError(f"Manifest entry {line}: {field} must not be negative")
+    return number
+
+
+def _make_entry(row, line):
+    """Build an Entry from a manifest row (dict)"""
+    show = str(row.get("show") or "").strip()
+    if not show:
+        raise ValueError(f"Manifest entry {line}: missing show name")
+    season = _parse_number(row.get("season"), "season", line)
+    episode = _parse_number(row.get("episode"), "episode", line)
+    if (season is None) != (episode is None):
+        raise ValueError(f"Manifest entry {line}: season and episode must be given together")
+    url = str(row.get("url") or "").strip()
+    year = _parse_number(row.get("year"), "year", line)
+    meta = {field: str(row[field]).strip() for field in META_FIELDS if str(row.get(field) or "").strip()}
+    return Entry(show, season, episode, url, year, meta or None)
+
+
+def read_manifest(path):
+    """Yield entries from a CSV, JSON or M3U/M3U8 manifest
+
+    CSV manifests need a header row with the columns show, season, episode
+    and url (and optionally year and the META_FIELDS). JSON manifests are a
+    list of objects with the same keys.
+    Season and episode may be left empty for movies. Playlists are mapped
+    to entries by m3u_import.
+    """
+    if path.lower().endswith((".m3u", ".m3u8")):
+        # Imported here because m3u_import itself imports this module
+        import m3u_import
+        yield from m3u_import.read_m3u(path)
+    elif path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as file:
+            rows = json.load(file)
+        if not isinstance(rows, list):
+            raise ValueError("JSON manifest must be a list of entries")
+        for line, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                raise ValueError(f"Manifest entry {line}: expected an object")
+            yield _make_entry(row, line)
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            reader = csv.DictReader(file)
+            missing = {"show", "url"} - set(reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"CSV manifest is missing columns: {', '.join(sorted(missing))}")
+            # Line 1 is the header
+            for line, row in enumerate(reader, start=2):
+                yield _make_entry(row, line)
+
+
+def build_file_contents(entries, layout=LAYOUT_FLAT, file_contents=None, nfo=False):
+    """Map relative file paths to their content for a set of entries
+
+    Later entries for the same show/season/episode replace earlier ones.
+    The paths are added to file_contents if given (e.g. a
+    content_store.SqliteContentStore), otherwise to a new dict. With nfo,
+    .nfo sidecars are added next to the .strm files (see nfo_sidecars).
+    """
+    if file_contents is None:
+        file_contents = {}
+    if nfo:
+        # Imported here because nfo_sidecars itself imports this module
+        import nfo_sidecars
+        file_contents.update(nfo_sidecars.sidecar_items(entries, layout))
+    else:
+        file_contents.update((entry_path(entry, layout), entry.url) for entry in entries)
+    return file_contents
+
+
+def find_empty_files(file_contents):
+    """Return the names of files that have no content"""
+    indexed = getattr(file_contents, "empty_files", None)
+    if indexed is not None:
+        return indexed()  # Content stores answer this from an index
+    return [file for file, content in file_contents.items() if not content.strip()]
+
+
+def fsync_directory(path):
+    """Flush a directory entry to disk so renames inside it survive a crash"""
+    if os.name == "nt":
+        return  # Directories cannot be opened on Windows; NTFS journals metadata itself
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Some network filesystems do not support fsync on directories
+    finally:
+        os.close(fd)
+
+
+class FileWriter:
+    """Write files below a folder using one of the DURABILITY_MODES
+
+    Folders are created on first use and remembered, so each folder of a
+    library is checked and created once per run rather than once per file.
+    In atomic mode the directories touched by a batch are only fsynced once,
+    by flush(), instead of after every file. If metrics (a GenerationMetrics)
+    is given, the time of every phase of a write is recorded in it.
+    """
+
+    def __init__(self, folder, durability=DEFAULT_DURABILITY, metrics=None):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.folder = folder
+        self.durability = durability
+        self.metrics = metrics
+        self._known_dirs = set()  # Folders known to exist
+        self._pending_dirs = set()
+        self._lock = threading.Lock()
+
+    def ensure_directory(self, path):
+        """Create path (and its parents) unless it is already known to exist"""
+        if path in self._known_dirs:
+            return
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self._known_dirs.add(path)
+
+    def lap(self, phase, start):
+        """Record the time since start as phase (if metrics are kept) and return the current time"""
+        now = time.perf_counter()
+        if self.metrics is not None:
+            self.metrics.add_phase(phase, now - start)
+        return now
+
+    @staticmethod
+    def _open(path, content):
+        """Open path for writing content, which is text or bytes from encode_content()"""
+        if isinstance(content, bytes):
+            return open(path, "wb")
+        return open(path, "w", encoding="utf-8")
+
+    def write(self, file_name, content):
+        """Write one file; content is text or bytes from encode_content()"""
+        start = time.perf_counter()
+        file_path = os.path.join(self.folder, file_name)
+        parent, name = os.path.split(file_path)
+        self.ensure_directory(parent)
+        start = self.lap("mkdir", start)
+
+        if self.durability == DURABILITY_FAST:
+            with self._open(file_path, content) as file:
+                start = self.lap("open", start)
+                file.write(content)
+            self.lap("write", start)  # Includes close, which is where NFS/SMB clients flush
+            return
+
+        # Hidden temp name next to the target, unique per thread, so os.replace stays on one filesystem
+        temp_path = os.path.join(parent, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        fsync_seconds = 0.0
+        try:
+            with self._open(temp_path, content) as file:
+                start = self.lap("open", start)
+                file.write(content)
+                if self.durability == DURABILITY_STRICT:
+                    file.flush()
+                    synced = time.perf_counter()
+                    os.fsync(file.fileno())
+                    fsync_seconds = time.perf_counter() - synced
+            start = self.lap("write", start + fsync_seconds)  # Write and close, without the fsync
+            os.replace(temp_path, file_path)
+            start = self.lap("replace", start)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        if self.durability == DURABILITY_STRICT:
+            fsync_directory(parent)
+            self.lap("fsync", start - fsync_seconds)  # File and directory fsync together
+        else:
+            with self._lock:
+                self._pending_dirs.add(parent)
+
+    def flush(self):
+        """Fsync every directory written to since the last flush (atomic mode)"""
+        with self._lock:
+            pending, self._pending_dirs = self._pending_dirs, set()
+        for path in pending:
+            start = time.perf_counter()
+            fsync_directory(path)
+            self.lap("fsync", start)
+
+
+def content_hash(content):
+    """Return the hash recorded in the manifest for a file's content"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def encode_content(content):
+    """Return content as the bytes a text-mode write would produce (os.linesep line endings)"""
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    return content.encode("utf-8")
+
+
+# A file encoded and hashed once, to be written to several targets
+PreparedFile = namedtuple("PreparedFile", "name data digest")
+
+
+def output_items(file_contents, output_format=None):
+    """Return the (file name, content) pairs to write, converted by output_format (an output_formats.OutputFormat)
+
+    Mappings with an iter_items() method (content stores) are streamed
+    instead of being loaded as a whole.
+    """
+    iter_items = getattr(file_contents, "iter_items", None)
+    pairs = iter_items() if iter_items is not None else file_contents.items()
+    return pairs if output_format is None else output_format.convert(pairs)
+
+
+def prepare_files(file_contents, output_format=None):
+    """Encode and hash every file of file_contents once; returns a list of PreparedFile"""
+    return [PreparedFile(file_name, encode_content(content), content_hash(content))
+            for file_name, content in output_items(file_contents, output_format)]
+
+
+class WriteManifest:
+    """Content hashes of the files previously generated into a folder
+
+    The manifest lets a run skip files whose content did not change, which
+    keeps their mtimes (and therefore Jellyfin) untouched. Whether a file
+    still exists is checked with one directory listing per folder rather
+    than one stat per file.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE_NAME)
+        self.hashes = {}  # Relative path with "/" separators -> content hash
+        self.changed = False
+        self._listings = {}  # Folder -> set of names it contained when first listed
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def key(file_name):
+        """Manifest key for a relative file name, identical on every platform"""
+        return file_name.replace(os.sep, "/")
+
+    def load(self):
+        """Read the manifest from the target folder, if there is one"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.hashes = dict(data.get("files", {}))
+        except FileNotFoundError:
+            self.hashes = {}
+        except (OSError, ValueError, AttributeError, TypeError):
+            # Unreadable manifest: treat every file as changed
+            self.hashes = {}
+
+    def exists(self, file_name):
+        """Return True if file_name is present in the target folder"""
+        parent, name = os.path.split(os.path.join(self.folder, file_name))
+        with self._lock:
+            listing = self._listings.get(parent)
+            if listing is None:
+                try:
+                    with os.scandir(parent) as entries:
+                        listing = {entry.name for entry in entries}
+                except (FileNotFoundError, NotADirectoryError):
+                    listing = set()
+                self._listings[parent] = listing
+        return name in listing
+
+    def status(self, file_name, digest):
+        """Return "created", "updated" or "unchanged" for a file about to be written"""
+        if not self.exists(file_name):
+            return "created"
+        if self.hashes.get(self.key(file_name)) == digest:
+            return "unchanged"
+        return "updated"
+
+    def record(self, file_name, digest):
+        """Remember the hash of a file that was just written"""
+        with self._lock:
+            self.hashes[self.key(file_name)] = digest
+            self.changed = True
+
+    def save(self):
+        """Write the manifest back to the target folder if anything changed"""
+        if not self.changed:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "files": self.hashes}, file, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+
+class WriteStats:
+    """Counts of created, updated and unchanged files of one run"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    @property
+    def total(self):
+        """Number of files handled"""
+        return self.created + self.updated + self.unchanged
+
+    @property
+    def written(self):
+        """Number of files actually written"""
+        return self.created + self.updated
+
+    def add(self, status):
+        """Count one file with the given status"""
+        setattr(self, status, getattr(self, status) + 1)
+
+    def summary(self):
+        """Human readable one-line summary"""
+        return f"{self.created} created, {self.updated} updated, {self.unchanged} unchanged"
+
+
+def write_if_changed(writer, manifest, file_name, content, force=False, digest=None):
+    """Write one file unless the manifest shows it already has this content
+
+    content is text, or bytes from encode_content() together with the
+    content_hash() of the text as digest. Returns "created", "updated" or
+    "unchanged". The file is reported to writer.metrics, if set.
+    """
+    started = time.perf_counter()
+    if digest is None:
+        digest = content_hash(content)
+    start = writer.lap("hash", started)
+    status = manifest.status(file_name, digest)
+    writer.lap("check", start)
+    size = 0
+    if status == "unchanged" and not force:
+        result = status
+    else:
+        writer.write(file_name, content)
+        manifest.record(file_name, digest)
+        result = "updated" if status == "unchanged" else status
+        if writer.metrics is not None:
+            size = len(content) if isinstance(content, bytes) else len(content.encode("utf-8"))
+    if writer.metrics is not None:
+        writer.metrics.file_done(file_name, result, time.perf_counter() - started, size)
+    return result
+
+
+def write_files(folder, file_contents, progress=None, force=False, durability=DEFAULT_DURABILITY, metrics=None,
+                output_format=None):
+    """Write every changed file in file_contents below folder
+
+    Files whose content matches the manifest of the previous run are
+    skipped unless force is set. progress, if given, is called as
+    progress(done, total, file_name) after each file. Timings are recorded
+    in metrics, if given. Files are written in output_format, if given.
+    Returns a WriteStats.
+    """
+    if metrics is not None:
+        metrics.start()
+    writer = FileWriter(folder, durability, metrics)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    manifest = WriteManifest(folder)
+    stats = WriteStats()
+    total_files = len(file_contents)
+    files_processed = 0
+    try:
+        for file_name, content in output_items(file_contents, output_format):
+            stats.add(write_if_changed(writer, manifest, file_name, content, force))
+
+            files_processed += 1
+            if progress is not None:
+                progress(files_processed, total_files, file_name)
+    finally:
+        writer.flush()
+        start = time.perf_counter()
+        manifest.save()
+        writer.lap("manifest", start)
+        if metrics is not None:
+            metrics.finish()
+    return stats
+
+
+class GenerationJob:
+    """Write files on a pool of worker threads
+
+    The job never calls back into the caller; a GUI polls done, total and
+    current_file (e.g. from root.after) so progress updates are throttled to
+    the polling interval instead of happening once per file. The job can be
+    paused, resumed and cancelled at any time. Files that did not change
+    since the last run are skipped (see WriteManifest) unless force is set.
+    Phase timings and per-file latencies are collected in metrics (a
+    GenerationMetrics, created if not given). Files are written in
+    output_format (an output_formats.OutputFormat), if given. Files already
+    encoded by prepare_files() can be passed as prepared instead of
+    file_contents.
+
+    A dict is copied when the job is created, so the caller can keep
+    editing. A mapping with an iter_items() method (a content store) is
+    streamed instead: the workers take the next row straight from its
+    cursor, so only the files being written are in memory. Of an opened
+    library (a library_reader.LibraryContents) only the edits are copied;
+    the workers read the other files themselves, and when writing back into
+    the library's own folder they skip unedited files that are still there,
+    since their content came from that very file.
+    """
+
+    def __init__(self, folder, file_contents, workers=DEFAULT_WORKERS, force=False,
+                 durability=DEFAULT_DURABILITY, metrics=None, prepared=None, output_format=None):
+        self.folder = folder
+        self.metrics = metrics if metrics is not None else GenerationMetrics()
+        self.writer = FileWriter(folder, durability, self.metrics)
+        self._feed = None  # Iterator the workers share when file_contents is streamed
+        self._library = None  # LibraryContents whose unedited files the workers read
+        self._in_place = False  # True when writing a library back into its own folder
+        self.output_format = output_format
+        if prepared is not None:
+            self.items = prepared
+        elif isinstance(file_contents, LibraryContents):
+            # Nothing is read here, on the caller's (GUI) thread
+            self._library = file_contents
+            self._in_place = not force and _same_folder(file_contents.folder, folder)
+            _, edits = file_contents.edits()
+            self.items = [(file_name, edits.get(file_name, _UNREAD), None) for file_name in file_contents]
+        elif hasattr(file_contents, "iter_items"):
+            self.items = None
+            self._feed = iter(output_items(file_contents, output_format))
+        else:
+            # Snapshot, the caller may keep editing
+            self.items = [(file_name, content, None)
+                          for file_name, content in output_items(file_contents, output_format)]
+        self.workers = max(1, workers)
+        self.force = force
+        self.total = len(file_contents) if self.items is None else len(self.items)
+        self.done = 0
+        self.current_file = ""
+        self.stats = WriteStats()
+        self.errors = []  # (file name, exception)
+        self.manifest = None
+        self.finished = threading.Event()
+
+        self._next_index = 0
+        self._lock = threading.Lock()
+        self._running = threading.Event()  # Cleared while paused
+        self._running.set()
+        self._cancelled = threading.Event()
+        self._executor = None
+
+    @property
+    def cancelled(self):
+        """True once cancel() was called"""
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        """True while the job is paused"""
+        return not self._running.is_set()
+
+    def start(self):
+        """Start writing in the background and return immediately"""
+        self.metrics.start()
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self.manifest = WriteManifest(self.folder)
+
+        # Imported here: concurrent.futures pulls in logging, which would slow down every CLI start
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="strm-writer")
+        futures = [self._executor.submit(self._work) for _ in range(self.workers)]
+        # Signal completion once the last worker has stopped
+        remaining = [len(futures)]
+
+        def worker_stopped(future):
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._executor.shutdown(wait=False)
+                try:
+                    self.writer.flush()
+                    start = time.perf_counter()
+                    self.manifest.save()
+                    self.writer.lap("manifest", start)
+                except OSError as e:
+                    self.errors.append((MANIFEST_FILE_NAME, e))
+                self.metrics.finish()
+                self.finished.set()
+
+        for future in futures:
+            future.add_done_callback(worker_stopped)
+        return self
+
+    def _take(self):
+        """Return the next item to write, or None when there is nothing left"""
+        with self._lock:
+            if self._feed is not None:
+                try:
+                    file_name, content = next(self._feed)
+                except StopIteration:
+                    return None
+                except Exception as e:
+                    # The source failed (e.g. a database error); stop every worker and report it
+                    self._feed = iter(())
+                    self.errors.append(("(source)", e))
+                    return None
+                return file_name, content, None
+            if self._next_index >= self.total:
+                return None
+            item = self.items[self._next_index]
+            self._next_index += 1
+            return item
+
+    def _work(self):
+        """Worker loop: write items until the list is exhausted or the job is cancelled"""
+        while True:
+            self._running.wait()
+            if self._cancelled.is_set():
+                return
+            item = self._take()
+            if item is None:
+                return
+            file_name, content, digest = item
+            status = None
+            try:
+                if self._library is not None:
+                    file_name, content = self._library_item(file_name, content)
+                if content is None:
+                    status = "unchanged"
+                else:
+                    status = write_if_changed(self.writer, self.manifest, file_name, content, self.force, digest)
+            except Exception as e:
+                # Not only OSError: a bad entry must not end the worker, or done would never reach total
+                with self._lock:
+                    self.errors.append((file_name, e))
+            with self._lock:
+                if status is not None:
+                    self.stats.add(status)
+                self.done += 1
+                self.current_file = file_name
+
+    def _library_item(self, file_name, content):
+        """Return the (file name, content) to write for a library file, content None to skip it
+
+        Runs on a worker, so reading the file never blocks the caller.
+        """
+        if content is _UNREAD:
+            writes_as_is = self.output_format is None or self.output_format.writes_as_is(file_name)
+            if self._in_place and writes_as_is and self.manifest.exists(file_name):
+                self.metrics.file_done(file_name, "unchanged", 0.0, 0)
+                return file_name, None  # Written back unedited it would only get a new mtime
+            content = self._library[file_name]
+        if self.output_format is None:
+            return file_name, content
+        return next(self.output_format.convert([(file_name, content)]))
+
+    def pause(self):
+        """Stop starting new writes until resume() is called"""
+        self._running.clear()
+
+    def resume(self):
+        """Continue after pause()"""
+        self._running.set()
+
+    def cancel(self):
+        """Stop as soon as the files currently being written are finished"""
+        self._cancelled.set()
+        self._running.set()  # Wake paused workers so they can exit
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns True if it did"""
+        return self.finished.wait(timeout)
+
+
+class MultiTargetJob:
+    """Write the same files to several folders at once
+
+    Every file is encoded and hashed once and the result is shared by one
+    GenerationJob per target, each with its own worker pool, manifest and
+    metrics. A target that cannot be written to (an unmounted share, a full
+    disk) only fails itself: its errors are kept per target and the other
+    targets carry on at their own speed. Each target is started on its own
+    thread too, since starting creates the folder and reads its manifest,
+    which can hang on a stalled mount. Offers the polling interface of
+    GenerationJob, summed over all targets. listeners are added to the
+    metrics of the first (primary) target. An opened library is not read
+    here: each target's workers read it (a file is read from disk once,
+    whichever target needs it first) and encode it themselves.
+    """
+
+    def __init__(self, folders, file_contents, workers=DEFAULT_WORKERS, force=False,
+                 durability=DEFAULT_DURABILITY, listeners=(), output_format=None):
+        self.folders = list(dict.fromkeys(folders))  # In order, without duplicates
+        self.file_contents = file_contents
+        self.output_format = output_format
+        self.prepared = None if isinstance(file_contents, LibraryContents) else prepare_files(file_contents,
+                                                                                               output_format)
+        self.workers = workers
+        self.force = force
+        self.durability = durability
+        self.listeners = list(listeners)
+        self.jobs = {}  # folder -> GenerationJob of every target
+        self.failed = {}  # folder -> exception of targets that could not be started
+        self.finished = threading.Event()
+
+    def start(self):
+        """Start writing to every target and return immediately"""
+        for index, folder in enumerate(self.folders):
+            metrics = GenerationMetrics(self.listeners if index == 0 else ())
+            self.jobs[folder] = GenerationJob(folder, self.file_contents, self.workers, self.force, self.durability,
+                                              metrics, self.prepared, self.output_format)
+        starters = [threading.Thread(target=self._start_target, args=(folder,), name="strm-target", daemon=True)
+                    for folder in self.folders]
+        for starter in starters:
+            starter.start()
+        threading.Thread(target=self._wait_all, args=(starters,), name="strm-targets", daemon=True).start()
+        return self
+
+    def _start_target(self, folder):
+        """Start the job of one target; runs on its own thread"""
+        try:
+            self.jobs[folder].start()
+        except Exception as e:
+            self.failed[folder] = e  # Recorded rather than raised, so finished is still set
+
+    def _running(self):
+        """Return the (folder, GenerationJob) pairs of targets that did not fail to start"""
+        return [(folder, job) for folder, job in self.jobs.items() if folder not in self.failed]
+
+    def _wait_all(self, starters):
+        """Set finished once every target is done"""
+        for starter in starters:
+            starter.join()
+        for _, job in self._running():
+            job.wait()
+        self.finished.set()
+
+    @property
+    def total(self):
+        """Files to write, over all targets that did not fail to start"""
+        return sum(job.total for _, job in self._running())
+
+    @property
+    def done(self):
+        """Files handled so far, over all targets"""
+        return sum(job.done for _, job in self._running())
+
+    @property
+    def current_file(self):
+        """File being written by the slowest target"""
+        running = [job for _, job in self._running() if not job.finished.is_set()]
+        return min(running, key=lambda job: job.done).current_file if running else ""
+
+    @property
+    def metrics(self):
+        """Metrics of the first target that did not fail to start (the primary one)"""
+        running = self._running()
+        return running[0][1].metrics if running else GenerationMetrics()
+
+    @property
+    def stats(self):
+        """WriteStats of the primary target"""
+        running = self._running()
+        return running[0][1].stats if running else WriteStats()
+
+    @property
+    def errors(self):
+        """(file name, exception) of every target; file names are prefixed with their target"""
+        errors = [(folder, error) for folder, error in list(self.failed.items())]
+        for folder, job in self._running():
+            errors.extend((os.path.join(folder, file_name), error) for file_name, error in job.errors)
+        return errors
+
+    def target_errors(self):
+        """Return {folder: [(file name, exception)]} for every target that had errors"""
+        errors = {folder: [(folder, error)] for folder, error in list(self.failed.items())}
+        for folder, job in self._running():
+            if job.errors:
+                errors[folder] = list(job.errors)
+        return errors
+
+    def progress(self):
+        """Return (folder, done, total) for every target"""
+        return [(folder, job.done, job.total) for folder, job in self._running()]
+
+    @property
+    def cancelled(self):
+        """True once cancel() was called"""
+        return any(job.cancelled for job in self.jobs.values())
+
+    @property
+    def paused(self):
+        """True while the targets are paused"""
+        return any(job.paused for job in self.jobs.values())
+
+    def pause(self):
+        """Pause every target"""
+        for job in self.jobs.values():
+            job.pause()
+
+    def resume(self):
+        """Resume every target"""
+        for job in self.jobs.values():
+            job.resume()
+
+    def cancel(self):
+        """Cancel every target"""
+        for job in self.jobs.values():
+            job.cancel()
+
+    def wait(self, timeout=None):
+        """Block until every target has finished; returns True if they did"""
+        return self.finished.wait(timeout)
+
+
+def _same_folder(folder, other):
+    """True if both paths name the same folder"""
+    return os.path.normcase(os.path.abspath(folder)) == os.path.normcase(os.path.abspath(other))
+
+
+def _single_show_file_name(file_name):
+    """Return SxxEyy.strm for an episode path in any layout, else the base name"""
+    episode = parse_episode_file_name(file_name)
+    if episode is None:
+        return os.path.basename(file_name)
+    return episode_file_name(*episode)
+
+
+class StrmSession:
+    """The files of one editing session (a movie or one season of a series)
+
+    store, if given, is a content_store.SqliteContentStore that holds the
+    file contents instead of a dict. After open_library() the contents are a
+    library_reader.LibraryContents that reads files from the folder on demand.
+    """
+
+    def __init__(self, store=None):
+        self.content_type = ""  # "movie" or "series"
+        self.season_number = 1
+        self.store = store
+        self.files = store.files() if store is not None else []
+        self.file_contents = store if store is not None else {}
+        self.positions = None  # Lazily built file name -> index map
+        self.search_index = None  # Lazily built FileIndex for search()
+        self.journal = None  # Optional session_journal.SessionJournal recording every change
+
+    def attach_journal(self, journal):
+        """Record all further changes in journal"""
+        self.journal = journal
+        journal.source = self.journal_state
+
+    def journal_state(self):
+        """Return (files, file_contents, meta) for a journal snapshot
+
+        For an opened library only the edited files are saved; the rest is
+        read from the folder again on restore.
+        """
+        meta = {
+            "content_type": self.content_type,
+            "season_number": self.season_number,
+            "library": None,
+        }
+        if isinstance(self.file_contents, LibraryContents):
+            meta["library"] = self.file_contents.folder
+            files, file_contents = self.file_contents.edits()
+            return files, file_contents, meta
+        return self.files, self.file_contents, meta
+
+    def _replaced(self):
+        """Called after the file set was replaced as a whole"""
+        self.positions = None
+        self.search_index = None
+        if self.journal is not None:
+            self.journal.compact()  # One snapshot instead of a record per file
+
+    def _set_contents(self, pairs):
+        """Replace all file contents with (file name, content) pairs"""
+        if self.store is not None:
+            self.store.replace(pairs)
+            self.file_contents = self.store
+        else:
+            self.file_contents = dict(pairs)
+
+    def restore(self, state):
+        """Load a session_journal.JournalState"""
+        self.content_type = state.meta.get("content_type", "")
+        self.season_number = state.meta.get("season_number", 1)
+        library = state.meta.get("library")
+        if library:
+            # Reopen the folder and apply the edits made on top of it
+            self.files, self.file_contents = open_library(library, (STRM_EXTENSION,))
+            for file in state.files:
+                if file not in self.file_contents:
+                    self.files.append(file)
+                self.file_contents[file] = state.file_contents.get(file, "")
+            self.file_contents.start_prefetch()
+        else:
+            self.files = list(state.files)
+            self._set_contents((file, state.file_contents.get(file, "")) for file in self.files)
+        self.positions = None
+        self.search_index = None
+
+    def reset(self):
+        """Forget all files"""
+        self.files = []
+        self._set_contents(())
+        self._replaced()
+
+    def open_library(self, folder, prefetch=True, files=None):
+        """Edit the .strm files already in folder; returns the number of files
+
+        Only the file names are read now (or taken from files, an earlier
+        library_reader.scan_library() of folder). Contents are read when a
+        file is first accessed and, with prefetch, in parallel in the
+        background.
+        """
+        files, file_contents = open_library(folder, (STRM_EXTENSION,), file_names=files)
+        self.files = files
+        self.file_contents = file_contents
+        self.content_type = "series" if any(parse_episode_file_name(file) for file in files) else "movie"
+        self._replaced()
+        if prefetch:
+            file_contents.start_prefetch()
+        return len(files)
+
+    def setup_movie(self):
+        """Prepare a single movie file"""
+        self.content_type = "movie"
+        self.files = [MOVIE_FILE_NAME]
+        self._set_contents([(MOVIE_FILE_NAME, "")])
+        self._replaced()
+
+    def setup_series(self, episode_count, season_number=None):
+        """Prepare empty files for one season"""
+        self.content_type = "series"
+        if season_number is not None:
+            self.season_number = season_number
+        self.files = series_file_names(self.season_number, episode_count)
+        self._set_contents((file, "") for file in self.files)
+        self._replaced()
+
+    def load_entries(self, entries, layout=LAYOUT_FLAT):
+        """Replace the session with the given entries (e.g. from an imported playlist)
+
+        entries may be a generator; it is consumed once. When all entries
+        belong to one show the files are named SxxEyy.strm, otherwise they
+        are laid out as a library in the given layout.
+        """
+        self.positions = None
+        shows = set()
+        has_episodes = False
+
+        def pairs():
+            nonlocal has_episodes
+            for entry in entries:
+                shows.add(entry.show)
+                has_episodes = has_episodes or entry.episode is not None
+                yield entry_path(entry, layout), entry.url
+
+        self._set_contents(pairs())
+        if len(shows) == 1:
+            # Single show: drop the show folder, like a session set up by hand
+            self._set_contents([(_single_show_file_name(file), content)
+                                for file, content in list(self.file_contents.items())])
+        self.files = list(self.file_contents)
+        self.content_type = "series" if has_episodes else "movie"
+        self._replaced()
+        return len(self.files)
+
+    def apply_template(self, render, show, base="", only_empty=True):
+        """Fill episode files with URLs from a compiled url_template
+
+        Files in a show folder (e.g. from an imported playlist) use that
+        folder, without a year, as the show name. Returns the number of files
+        filled.
+        """
+        updates = []
+        for file_name in (self.empty_files() if only_empty else self.files):
+            episode = parse_episode_file_name(file_name)
+            if episode is not None:
+                updates.append((file_name, render(show_from_path(file_name) or show, episode[0], episode[1], base)))
+        if updates:
+            self.file_contents.update(updates)  # One transaction when backed by a content store
+            self._replaced()
+        return len(updates)
+
+    def set_content(self, file_name, content):
+        """Store the content of one file"""
+        if self.file_contents.get(file_name) == content:
+            return  # Called on every key release; only real changes are journaled
+        self.file_contents[file_name] = content
+        if self.search_index is not None:
+            self.search_index.update(file_name, content)
+        if self.journal is not None:
+            self.journal.record_content(file_name, content)
+
+    def index_of(self, file_name):
+        """Return the position of file_name in files, or None"""
+        if self.positions is None:
+            self.positions = {file: index for index, file in enumerate(self.files)}
+        return self.positions.get(file_name)
+
+    def search(self, query):
+        """Return the files whose name or URL contains query (case-insensitive), in order"""
+        if self.search_index is None:
+            self.search_index = FileIndex(self.files, self.file_contents)
+        return self.search_index.search(query)
+
+    def next_empty_file(self, after=None, files=None):
+        """Return the first empty file after the given one, wrapping around
+
+        Entry usually proceeds in order, so the scan normally stops at the
+        very next file. files, if given, is searched instead of all files
+        (e.g. the filtered list on screen). Returns None when every other
+        file has content.
+        """
+        if files is None:
+            files = self.files
+            start = self.index_of(after) if after is not None else None
+        else:
+            start = files.index(after) if after in files else None
+        count = len(files)
+        start = -1 if start is None else start
+        for step in range(1, count + 1):
+            file = files[(start + step) % count]
+            if file != after and not self.file_contents.get(file, "").strip():
+                return file
+        return None
+
+    def has_content(self):
+        """True if any file has content
+
+        For an opened library only the files read or edited so far count, so
+        this never waits for the folder to be read.
+        """
+        if isinstance(self.file_contents, LibraryContents):
+            return self.file_contents.has_loaded_content()
+        return any(content.strip() for content in self.file_contents.values())
+
+    def empty_files(self, loaded_only=False):
+        """Return the names of files that have no content yet
+
+        With loaded_only, of an opened library only the files read or edited
+        so far are checked, so this never waits for the folder to be read.
+        """
+        if loaded_only and isinstance(self.file_contents, LibraryContents):
+            return self.file_contents.empty_loaded_files()
+        return find_empty_files(self.file_contents)
+
+    def generate(self, folder, progress=None, force=False, durability=DEFAULT_DURABILITY, metrics=None,
+                 output_format=None):
+        """Write all changed files of the session into folder, returns a WriteStats"""
+        return write_files(folder, self.file_contents, progress, force, durability, metrics, output_format)
+
+    def start_generation(self, folder, workers=DEFAULT_WORKERS, force=False, durability=DEFAULT_DURABILITY,
+                         metrics=None, output_format=None):
+        """Write all changed files of the session on background threads, returns the GenerationJob"""
+        return GenerationJob(folder, self.file_contents, workers, force, durability, metrics,
+                             output_format=output_format).start()
+
+    def start_generation_to(self, folders, workers=DEFAULT_WORKERS, force=False, durability=DEFAULT_DURABILITY,
+                            listeners=(), output_format=None):
+        """Write all changed files of the session into several folders at once, returns the MultiTargetJob"""
+        return MultiTargetJob(folders, self.file_contents, workers, force, durability, listeners,
+                              output_format).start()
@@ -0,0 +1,378 @@
+"""Concurrent reachability checks for stream URLs
+
+Before generating, every http(s) URL can be probed with a HEAD request
+(falling back to a one-byte ranged GET for servers that refuse HEAD).
+Probes run concurrently on asyncio with a limit per host and keep-alive
+connections that are reused between requests to the same host. Results
+are kept in an on-disk cache with a TTL and LRU eviction so repeated runs
+only probe URLs that are new or whose result has expired.
+
+Only the standard library is used.
+"""
+import asyncio
+import json
+import os
+import ssl
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".strm_probe_cache.json")
+DEFAULT_TTL = 24 * 60 * 60  # Seconds a cached result stays valid
+DEFAULT_MAX_ENTRIES = 100000  # Cached results kept before the least recently used are evicted
+DEFAULT_PER_HOST = 4  # Concurrent connections per host
+DEFAULT_CONCURRENCY = 64  # Concurrent probes overall
+DEFAULT_TIMEOUT = 10.0  # Seconds per request
+MAX_REDIRECTS = 5
+MAX_DRAIN_BYTES = 64 * 1024  # Larger bodies close the connection instead of being read
+
+USER_AGENT = "strm-probe/1.0"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# ok is True/False for probed URLs and None for URLs that cannot be probed (local paths, rtsp, ...)
+ProbeResult = namedtuple("ProbeResult", ["url", "ok", "status", "error", "checked_at"])
+
+
+def is_probeable(url):
+    """Return True for http and https URLs"""
+    return urlsplit(url).scheme.lower() in ("http", "https")
+
+
+class ProbeCache:
+    """Probe results on disk, expired after ttl seconds, least recently used evicted first"""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # url -> ProbeResult, least recently used first
+        self.changed = False
+        if path:
+            self.load()
+
+    def load(self, now=None):
+        """Read cached results from disk, dropping expired ones and all but the max_entries most recent"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                rows = json.load(file).get("results", [])
+            self.entries = OrderedDict((row[0], ProbeResult(*row)) for row in rows)
+        except FileNotFoundError:
+            self.entries = OrderedDict()
+            return
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.entries = OrderedDict()  # Corrupt cache, start over
+            return
+        now = time.time() if now is None else now
+        for url in [url for url, result in self.entries.items() if self.expired(result, now)]:
+            del self.entries[url]
+            self.changed = True
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # Saved least recently used first
+            self.changed = True
+
+    def save(self):
+        """Write the cache to disk if it changed"""
+        if not self.path or not self.changed:
+            return
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "results": [list(result) for result in self.entries.values()]}, file)
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+    def expired(self, result, now):
+        """True if result is older than ttl seconds"""
+        return now - result.checked_at > self.ttl
+
+    def get(self, url, now=None):
+        """Return the cached result for url, or None if missing or expired"""
+        result = self.entries.get(url)
+        if result is None:
+            return None
+        if self.expired(result, time.time() if now is None else now):
+            del self.entries[url]
+            self.changed = True
+            return None
+        self.entries.move_to_end(url)
+        return result
+
+    def put(self, result):
+        """Store a result, evicting the least recently used entries when full"""
+        self.entries[result.url] = result
+        self.entries.move_to_end(result.url)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.changed = True
+
+
+class _ConnectionPool:
+    """Keep-alive connections per (scheme, host, port) with a per-host limit"""
+
+    def __init__(self, per_host, timeout):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._idle = {}  # key -> list of (reader, writer)
+        self._limits = {}  # key -> asyncio.Semaphore
+        self._ssl_context = None
+
+    def limit(self, key):
+        """Semaphore bounding the concurrent requests to one host"""
+        semaphore = self._limits.get(key)
+        if semaphore is None:
+            semaphore = self._limits[key] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    async def acquire(self, key):
+        """Return (reader, writer, reused) for key, reusing an idle connection if possible"""
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl_context, server_hostname=host if ssl_context else None),
+            self.timeout
+        )
+        return reader, writer, False
+
+    def release(self, key, reader, writer, reusable):
+        """Return a connection to the pool, or close it"""
+        if reusable and not writer.is_closing():
+            self._idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        """Close every idle connection"""
+        for connections in self._idle.values():
+            for reader, writer in connections:
+                writer.close()
+        self._idle = {}
+
+
+async def _read_response(reader, method):
+    """Read status and headers (and a small body) of one response
+
+    Returns (status, headers, reusable).
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed by server")
+    parts = status_line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ValueError(f"Invalid HTTP response: {status_line[:80]!r}")
+    version, status = parts[0], int(parts[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    reusable = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+
+    # Responses to HEAD and 1xx/204/304 never have a body
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return status, headers, reusable
+
+    # Drain small bodies so the connection can be reused, give up on anything else
+    length = headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) <= MAX_DRAIN_BYTES:
+        await reader.readexactly(int(length))
+    else:
+        reusable = False
+    return status, headers, reusable
+
+
+class UrlProber:
+    """Probe many URLs concurrently, consulting and filling a ProbeCache"""
+
+    def __init__(self, cache=None, per_host=DEFAULT_PER_HOST, concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT):
+        self.cache = cache if cache is not None else ProbeCache()
+        self.per_host = per_host
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.total = 0
+        self.done = 0
+        self.cancelled = False
+
+    def probe(self, urls):
+        """Probe urls (blocking) and return a dict url -> ProbeResult"""
+        return asyncio.run(self.probe_async(urls))
+
+    async def probe_async(self, urls):
+        """Probe urls and return a dict url -> ProbeResult"""
+        unique = list(dict.fromkeys(url for url in urls if url))
+        self.total = len(unique)
+        self.done = 0
+
+        results = {}
+        pending = []
+        now = time.time()
+        for url in unique:
+            if not is_probeable(url):
+                results[url] = ProbeResult(url, None, None, "not an http(s) URL", now)
+                self.done += 1
+                continue
+            cached = self.cache.get(url, now)
+            if cached is not None:
+                results[url] = cached
+                self.done += 1
+            else:
+                pending.append(url)
+
+        pool = _ConnectionPool(self.per_host, self.timeout)
+        overall = asyncio.Semaphore(self.concurrency)
+
+        async def run(url):
+            async with overall:
+                if self.cancelled:
+                    return
+                result = await self._probe_one(pool, url)
+            results[url] = result
+            self.cache.put(result)
+            self.done += 1
+
+        try:
+            await asyncio.gather(*(run(url) for url in pending))
+        finally:
+            await pool.close()
+        return results
+
+    async def _probe_one(self, pool, url):
+        """Probe a single URL, following redirects"""
+        original = url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                parts = urlsplit(url)
+                scheme = parts.scheme.lower()
+                if scheme not in ("http", "https"):
+                    return ProbeResult(original, False, None, f"redirected to unsupported URL {url}", time.time())
+                if not parts.hostname:
+                    return ProbeResult(original, False, None, "URL has no host", time.time())
+                port = parts.port or (443 if scheme == "https" else 80)
+                key = (scheme, parts.hostname, port)
+
+                async with pool.limit(key):
+                    status, headers = await self._request(pool, key, parts, "HEAD")
+                    if status in (405, 501):  # Server does not support HEAD
+                        status, headers = await self._request(pool, key, parts, "GET")
+
+                location = headers.get("location")
+                if status in REDIRECT_STATUSES and location:
+                    url = urljoin(url, location)
+                    continue
+                return ProbeResult(original, 200 <= status < 400, status, None, time.time())
+            return ProbeResult(original, False, None, "too many redirects", time.time())
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            return ProbeResult(original, False, None, str(e) or type(e).__name__, time.time())
+
+    async def _request(self, pool, key, parts, method):
+        """Send one request, retrying once if a reused connection turned out to be stale"""
+        hostname = parts.hostname
+        if ":" in hostname:  # IPv6 literal
+            hostname = f"[{hostname}]"
+        host = f"{hostname}:{parts.port}" if parts.port else hostname
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {host}",
+            f"User-Agent: {USER_AGENT}",
+            "Accept: */*",
+            "Connection: keep-alive",
+        ]
+        if method == "GET":
+            lines.append("Range: bytes=0-0")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        for attempt in range(2):
+            reader, writer, reused = await pool.acquire(key)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers, reusable = await asyncio.wait_for(_read_response(reader, method), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue  # The server closed the idle connection, try a fresh one
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            pool.release(key, reader, writer, reusable)
+            return status, headers
+        raise ConnectionResetError("Connection closed by server")
+
+
+class ProbeJob:
+    """Run a UrlProber on a background thread so a GUI can poll done/total"""
+
+    def __init__(self, urls, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 **prober_options):
+        self.urls = list(urls)
+        self.prober = UrlProber(ProbeCache(cache_path, ttl, max_entries), **prober_options)
+        self.results = {}
+        self.error = None
+        self.finished = threading.Event()
+
+    @property
+    def done(self):
+        return self.prober.done
+
+    @property
+    def total(self):
+        return self.prober.total or len(self.urls)
+
+    def start(self):
+        """Start probing in the background and return immediately"""
+        threading.Thread(target=self._run, name="strm-probe", daemon=True).start()
+        return self
+
+    def _run(self):
+        try:
+            self.results = self.prober.probe(self.urls)
+            self.prober.cache.save()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+
+    def cancel(self):
+        """Skip every probe that has not started yet"""
+        self.prober.cancelled = True
+
+    def dead(self):
+        """Return the results of URLs that could not be reached"""
+        return [result for result in self.results.values() if result.ok is False]
+
+
+def probe_urls(urls, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+               **prober_options):
+    """Probe urls (blocking), using and updating the cache at cache_path
+
+    Returns a dict url -> ProbeResult. Pass cache_path=None to disable the
+    on-disk cache.
+    """
+    prober = UrlProber(ProbeCache(cache_path, ttl, max_entries), **prober_options)
+    results = prober.probe(urls)
+    prober.cache.save()
+    return results
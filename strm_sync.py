@@ -0,0 +1,223 @@
+"""Keep a .strm tree in sync with manifests that change over time
+
+ManifestSync watches one manifest file or a folder of manifests by polling
+(os.stat / os.scandir only, so it works on any filesystem, including
+network shares that deliver no change notifications). A burst of changes -
+an upstream job rewriting several lists, an editor saving twice - is
+debounced: a manifest is read once it has not changed for debounce
+seconds. Touching a manifest without changing it costs one hash of the
+file. When it did change, only the entries whose URL differs from the last
+read are written.
+
+Memory stays bounded by the number of entries: per manifest only its stat,
+its hash and an 8-byte hash of every entry's URL are kept, and changed
+entries are streamed from the manifest and written in batches of
+SYNC_BATCH. Entries that could not be written are retried on the next poll.
+
+    sync = ManifestSync("lists/", "/srv/media/shows", layout=strm_engine.LAYOUT_JELLYFIN)
+    sync.run()  # until sync.stop() is called
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+import strm_engine
+from generation_metrics import GenerationMetrics
+
+MANIFEST_EXTENSIONS = (".csv", ".json", ".m3u", ".m3u8")
+DEFAULT_INTERVAL = 2.0  # Seconds between polls
+DEFAULT_DEBOUNCE = 1.0  # Seconds a manifest must stay unchanged before it is read
+SYNC_BATCH = 5000  # Changed entries written per generation job
+
+# Result of one sync pass
+SyncResult = namedtuple("SyncResult", "manifests changed removed stats errors")
+
+
+def entry_digest(url):
+    """Short hash of an entry's URL, kept instead of the URL itself"""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+
+def file_digest(path):
+    """Hash of a manifest file's bytes"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class ManifestState:
+    """What is known about one manifest since it was last read"""
+
+    def __init__(self):
+        self.stamp = None  # (mtime_ns, size) when last read
+        self.digest = None  # file_digest() when last read
+        self.entries = {}  # relative path -> entry_digest() of its URL
+        self.seen = None  # (mtime_ns, size) at the last poll
+        self.changed_at = None  # time.monotonic() of the last change not read yet
+
+
+class ManifestSync:
+    """Poll manifests and regenerate the entries that changed"""
+
+    def __init__(self, source, folder, layout=strm_engine.LAYOUT_FLAT, interval=DEFAULT_INTERVAL,
+                 debounce=DEFAULT_DEBOUNCE, workers=strm_engine.DEFAULT_WORKERS,
+                 durability=strm_engine.DEFAULT_DURABILITY, force=False, on_sync=None, listeners=()):
+        self.source = source
+        self.folder = folder
+        self.layout = layout
+        self.interval = interval
+        self.debounce = debounce
+        self.workers = workers
+        self.durability = durability
+        self.force = force
+        self.on_sync = on_sync  # Called with a SyncResult after every pass that read a manifest
+        self.listeners = list(listeners)  # GenerationMetrics listeners of every job, e.g. a RefreshNotifier
+        self.states = {}  # manifest path -> ManifestState
+        self._stopped = threading.Event()
+
+    def manifests(self):
+        """Return the manifest paths currently present in the source"""
+        if not os.path.isdir(self.source):
+            return [self.source] if os.path.exists(self.source) else []
+        with os.scandir(self.source) as entries:
+            return sorted(entry.path for entry in entries
+                          if entry.is_file() and not entry.name.startswith(".")
+                          and entry.name.lower().endswith(MANIFEST_EXTENSIONS))
+
+    def due(self, now=None):
+        """Stat every manifest and return the ones that changed and have settled"""
+        now = time.monotonic() if now is None else now
+        present = set()
+        ready = []
+        for path in self.manifests():
+            present.add(path)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamp = (info.st_mtime_ns, info.st_size)
+            state = self.states.setdefault(path, ManifestState())
+            if stamp != state.seen:
+                state.seen = stamp
+                state.changed_at = now  # Still being written, or a new change: wait again
+            if (state.changed_at is not None and stamp != state.stamp
+                    and now - state.changed_at >= self.debounce):
+                ready.append(path)
+        for path in [path for path in self.states if path not in present]:
+            del self.states[path]  # Manifest deleted; its files stay until pruned
+        return ready
+
+    def sync_manifest(self, path, stats, errors, now=None):
+        """Read one manifest and write its changed entries in batches of SYNC_BATCH
+
+        Entries are streamed from the manifest, so only one batch of URLs is
+        held at a time. An entry whose write failed keeps its old state and
+        the manifest stays due, so it is retried on the next poll. Returns
+        the number of changed and of removed entries.
+        """
+        state = self.states[path]
+        stamp = state.seen
+        digest = file_digest(path)
+        if digest == state.digest:
+            state.stamp = stamp  # Touched, not changed
+            state.changed_at = None
+            return 0, 0
+
+        entries = {}  # Like state.entries, for the manifest as it is now
+        batch = {}  # Changed entries not written yet: relative path -> url
+        digests = {}  # relative path -> entry_digest() of the entries in batch
+        changed = 0
+        failed = False
+
+        def flush():
+            nonlocal failed
+            not_written = self.write(batch, stats, errors)
+            failed = failed or bool(not_written)
+            for file_name in batch:
+                if file_name not in not_written:
+                    entries[file_name] = digests[file_name]
+                elif file_name in state.entries:
+                    entries[file_name] = state.entries[file_name]
+            batch.clear()
+            digests.clear()
+
+        try:
+            for entry in strm_engine.read_manifest(path):
+                file_name = strm_engine.entry_path(entry, self.layout)
+                url_digest = entry_digest(entry.url)
+                if state.entries.get(file_name) == url_digest:
+                    entries[file_name] = url_digest
+                    continue
+                if file_name not in batch:
+                    changed += 1
+                batch[file_name] = entry.url
+                digests[file_name] = url_digest
+                if len(batch) >= SYNC_BATCH:
+                    flush()
+            if batch:
+                flush()
+        except BaseException:
+            state.entries.update(entries)  # Keep what was written before the manifest turned out unreadable
+            raise
+        removed = sum(1 for file_name in state.entries if file_name not in entries)
+
+        state.entries = entries
+        state.changed_at = None
+        if failed:
+            # Stay due: read the manifest again after the debounce and retry what is missing
+            state.stamp = None
+            state.digest = None
+            state.changed_at = time.monotonic() if now is None else now
+        else:
+            state.stamp = stamp
+            state.digest = digest
+        return changed, removed
+
+    def write(self, batch, stats, errors):
+        """Write a {relative path: url} batch; returns the paths that could not be written"""
+        job = strm_engine.GenerationJob(self.folder, batch, self.workers, self.force, self.durability,
+                                        GenerationMetrics(self.listeners)).start()
+        job.wait()
+        for status in ("created", "updated", "unchanged"):
+            setattr(stats, status, getattr(stats, status) + getattr(job.stats, status))
+        errors.extend(job.errors)
+        return {file_name for file_name, _ in job.errors}
+
+    def sync_once(self, now=None):
+        """Run one poll; returns a SyncResult, or None if no manifest was due"""
+        ready = self.due(now)
+        if not ready:
+            return None
+        stats = strm_engine.WriteStats()
+        errors = []
+        changed_total = 0
+        removed_total = 0
+        for path in ready:
+            try:
+                changed, removed = self.sync_manifest(path, stats, errors, now)
+            except (OSError, ValueError) as e:
+                # Most likely caught mid-write; keep the old state and read it again after the next change
+                self.states[path].changed_at = None
+                errors.append((path, e))
+                continue
+            changed_total += changed
+            removed_total += removed
+        result = SyncResult(ready, changed_total, removed_total, stats, errors)
+        if self.on_sync is not None:
+            self.on_sync(result)
+        return result
+
+    def run(self):
+        """Poll every interval seconds until stop() is called"""
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            self.sync_once()
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        """Make run() return after the current pass"""
+        self._stopped.set()
@@ -0,0 +1,85 @@
+import pytest
+
+from content_store import SqliteContentStore
+
+
+@pytest.fixture
+def store():
+    store = SqliteContentStore()
+    yield store
+    store.close()
+
+
+def test_iteration_follows_insertion_order(store):
+    store["B/S01E02.strm"] = "http://host/b2"
+    store["A/S01E01.strm"] = "http://host/a1"
+    store.update([("C/S01E01.strm", ""), ("B/S01E01.strm", "http://host/b1")])
+
+    expected = [("B/S01E02.strm", "http://host/b2"), ("A/S01E01.strm", "http://host/a1"),
+                ("C/S01E01.strm", ""), ("B/S01E01.strm", "http://host/b1")]
+    assert list(store.iter_items()) == expected
+    assert list(store.items()) == expected
+    assert list(store) == store.files() == [file_name for file_name, _ in expected]
+    assert list(store.values()) == [content for _, content in expected]
+    assert len(store) == 4
+
+
+def test_updating_a_file_keeps_its_position(store):
+    store.update([("S01E01.strm", ""), ("S01E02.strm", ""), ("S01E03.strm", "")])
+
+    store["S01E01.strm"] = "http://host/1"
+    store.update({"S01E02.strm": "http://host/2"})
+
+    assert list(store.iter_items()) == [("S01E01.strm", "http://host/1"), ("S01E02.strm", "http://host/2"),
+                                        ("S01E03.strm", "")]
+    assert store.empty_files() == ["S01E03.strm"]
+    assert store.count_empty() == 1
+
+
+def test_delete_and_missing_files(store):
+    store["movie.strm"] = "http://host/movie"
+
+    del store["movie.strm"]
+
+    assert "movie.strm" not in store
+    assert store.get("movie.strm", "none") == "none"
+    with pytest.raises(KeyError):
+        store["movie.strm"]
+    with pytest.raises(KeyError):
+        del store["movie.strm"]
+
+
+def test_replace_drops_the_old_files(store):
+    store.update([("Old/S01E01.strm", "http://host/old"), ("Keep/S01E01.strm", "")])
+
+    store.replace((f"New/S01E0{episode}.strm", f"http://host/{episode}") for episode in (2, 1))
+
+    assert store.files() == ["New/S01E02.strm", "New/S01E01.strm"]
+    assert store.shows() == ["New"]
+    assert store.files_for_show("New", 1) == ["New/S01E01.strm", "New/S01E02.strm"]
+    assert store.empty_files() == []
+
+
+def test_clear_starts_over(store):
+    store.update([("S01E01.strm", "http://host/1"), ("S01E02.strm", "")])
+
+    store.clear()
+    store["S01E03.strm"] = "http://host/3"
+
+    assert list(store.iter_items()) == [("S01E03.strm", "http://host/3")]
+    assert store.empty_files() == []
+
+
+def test_rows_survive_reopening(tmp_path):
+    path = str(tmp_path / "library.db")
+    store = SqliteContentStore(path)
+    store.update([("S01E01.strm", "http://host/1"), ("S01E02.strm", "http://host/2")])
+    store.close()
+
+    store = SqliteContentStore(path)
+    store["S01E03.strm"] = "http://host/3"
+    store["S01E01.strm"] = "http://host/new"
+
+    assert store.files() == ["S01E01.strm", "S01E02.strm", "S01E03.strm"]
+    assert store["S01E01.strm"] == "http://host/new"
+    store.close()
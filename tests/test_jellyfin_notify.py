@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import strm_engine
+from jellyfin_notify import RefreshNotifier
+
+
+class JellyfinHandler(BaseHTTPRequestHandler):
+    """Records every POST and answers 204 like Jellyfin"""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append((self.path, self.headers.get("X-Emby-Token"),
+                                     json.loads(body) if body.strip() else None))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), JellyfinHandler)
+    httpd.daemon_threads = True
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def notifier_for(server, **options):
+    return RefreshNotifier(f"http://127.0.0.1:{server.server_address[1]}", "secret", "/media/shows", **options)
+
+
+def test_many_writes_send_one_targeted_refresh(server, tmp_path):
+    notifier = notifier_for(server, delay=0.2)
+    files = {f"Show {show}/S01E{episode:02d}.strm": f"http://host/{show}/{episode}"
+             for show in range(5) for episode in range(2000)}
+    metrics = strm_engine.GenerationMetrics([notifier.file_written])
+
+    job = strm_engine.GenerationJob(str(tmp_path), files, metrics=metrics).start()
+    assert job.wait(60) and job.stats.created == 10000
+    deadline = time.monotonic() + 10
+    while not server.requests and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.3)  # Anything else would have been sent by now
+    notifier.close()
+
+    assert len(server.requests) == 1
+    endpoint, token, body = server.requests[0]
+    assert (endpoint, token) == ("/Library/Media/Updated", "secret")
+    assert body == {"Updates": [{"Path": f"/media/shows/Show {show}", "UpdateType": "Created"}
+                                for show in range(5)]}
+    assert (notifier.requests_sent, notifier.errors) == (1, [])
+
+
+def test_unchanged_files_send_nothing(server):
+    notifier = notifier_for(server, delay=0.05)
+    notifier.file_written("Show/S01E01.strm", "unchanged")
+    notifier.close()
+
+    assert server.requests == []
+
+
+def test_too_many_folders_fall_back_to_a_full_refresh(server):
+    notifier = notifier_for(server, delay=60)
+    for show in range(101):
+        notifier.file_written(f"Show {show}/S01E01.strm", "updated")
+    notifier.close()  # Sends the pending refresh without waiting for the delay
+
+    assert server.requests == [("/Library/Refresh", "secret", None)]
+
+
+def test_unreachable_server_is_only_recorded(server):
+    port = server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    notifier = RefreshNotifier(f"http://127.0.0.1:{port}", "secret", "/media/shows", delay=60, timeout=2)
+    notifier.file_written("Show/S01E01.strm", "created")
+    notifier.close()
+
+    assert notifier.requests_sent == 0
+    assert len(notifier.errors) == 1
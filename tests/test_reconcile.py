@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+import reconcile
+import strm_cli
+import strm_engine
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(text)
+
+
+@pytest.fixture
+def library(tmp_path):
+    """A folder with four files written by the tool and one it did not write"""
+    folder = tmp_path / "library"
+    strm_engine.write_files(str(folder), {
+        "A/S01E01.strm": "http://host/a1",
+        "A/S01E02.strm": "http://host/a2",
+        "B/Season 01/S01E01.strm": "http://host/b1",
+        "C/S01E01.strm": "http://host/c1",
+    })
+    write(folder / "A" / "extra.strm", "http://host/mine")
+    return folder
+
+
+def test_plan_sorts_files_and_deletes_only_managed_ones(library):
+    desired = {
+        "A/S01E01.strm": "http://host/a1",
+        "A/S01E02.strm": "http://host/new",
+        "C/S01E01.strm": "http://host/c1",
+        "D/S01E01.strm": "http://host/d1",
+    }
+
+    plan = reconcile.plan_generation(str(library), desired, prune=True)
+
+    assert plan.create == ["D/S01E01.strm"]
+    assert plan.update == ["A/S01E02.strm"]
+    assert plan.unchanged == ["A/S01E01.strm", "C/S01E01.strm"]
+    assert plan.delete == ["B/Season 01/S01E01.strm"]
+    assert plan.unmanaged == ["A/extra.strm"]
+
+
+def test_apply_plan_prunes_and_removes_emptied_folders(library):
+    desired = {"A/S01E01.strm": "http://host/a1", "A/S01E02.strm": "http://host/a2",
+               "C/S01E01.strm": "http://host/c1"}
+    plan = reconcile.plan_generation(str(library), desired, prune=True)
+
+    job, prune_errors = reconcile.apply_plan(plan)
+
+    assert (job.errors, prune_errors) == ([], [])
+    assert not os.path.exists(library / "B")  # Season folder and show folder were left empty
+    assert os.path.exists(library / "A" / "extra.strm")  # Not written by the tool, so kept
+    assert "B/Season 01/S01E01.strm" not in strm_engine.WriteManifest(str(library)).hashes
+
+
+def test_prune_files_keeps_folders_that_are_not_empty(tmp_path):
+    write(tmp_path / "A" / "S01E01.strm", "http://host/a1")
+    write(tmp_path / "A" / "poster.jpg", "")
+
+    assert reconcile.prune_files(str(tmp_path), ["A/S01E01.strm", "A/gone.strm"]) == []
+    assert os.listdir(tmp_path / "A") == ["poster.jpg"]
+
+
+def test_plan_over_the_prune_limit_is_refused(library):
+    plan = reconcile.plan_generation(str(library), {"A/S01E01.strm": "http://host/a1"}, prune=True)
+
+    with pytest.raises(ValueError):
+        reconcile.apply_plan(plan)
+    assert os.path.exists(library / "C" / "S01E01.strm")
+    reconcile.apply_plan(plan, max_prune=1.0)
+    assert not os.path.exists(library / "C" / "S01E01.strm")
+
+
+def test_nothing_is_pruned_when_writes_fail(library):
+    os.makedirs(library / "D" / "S01E01.strm")  # A folder where a file has to be written
+    desired = {"A/S01E01.strm": "http://host/a1", "A/S01E02.strm": "http://host/a2",
+               "C/S01E01.strm": "http://host/c1", "D/S01E01.strm": "http://host/d1"}
+    plan = reconcile.plan_generation(str(library), desired, prune=True)
+    assert plan.delete == ["B/Season 01/S01E01.strm"]
+
+    job, prune_errors = reconcile.apply_plan(plan)
+
+    assert [file_name for file_name, _ in job.errors] == ["D/S01E01.strm"]
+    assert prune_errors == []
+    assert os.path.exists(library / "B" / "Season 01" / "S01E01.strm")
+
+
+def test_dry_run_deletes_nothing(library, tmp_path, capsys):
+    manifest = tmp_path / "list.csv"
+    write(manifest, "show,season,episode,url\nA,1,1,http://host/a1\nA,1,2,http://host/a2\nC,1,1,http://host/c1\n")
+    before = sorted(os.path.join(root, name) for root, _, names in os.walk(library) for name in names)
+
+    assert strm_cli.main(["generate", str(manifest), "--output", str(library), "--dry-run", "--prune"]) == 0
+
+    assert "delete B/Season 01/S01E01.strm" in capsys.readouterr().out
+    assert sorted(os.path.join(root, name) for root, _, names in os.walk(library) for name in names) == before
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+import output_formats
+import strm_engine
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(text)
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def test_opened_library_rewrites_only_edited_files(tmp_path):
+    for episode in (1, 2, 3):
+        write(tmp_path / f"S01E0{episode}.strm", f"http://host/{episode}")
+        os.utime(tmp_path / f"S01E0{episode}.strm", ns=(1, 1))
+    session = strm_engine.StrmSession()
+    session.open_library(str(tmp_path), prefetch=False)
+    session.set_content("S01E02.strm", "http://host/new")
+
+    job = session.start_generation(str(tmp_path), output_format=output_formats.FORMAT_STRM)
+    job.wait()
+
+    assert job.errors == []
+    assert job.stats.summary() == "0 created, 1 updated, 2 unchanged"
+    assert os.stat(tmp_path / "S01E01.strm").st_mtime_ns == 1
+    assert os.stat(tmp_path / "S01E03.strm").st_mtime_ns == 1
+    assert read(tmp_path / "S01E02.strm") == "http://host/new"
+    assert session.file_contents.unread == {"S01E01.strm", "S01E03.strm"}  # Skipped without being read
+
+
+def test_opened_library_is_copied_whole_to_another_folder(tmp_path):
+    library = tmp_path / "library"
+    library.mkdir()
+    write(library / "movie.strm", "http://host/movie")
+    session = strm_engine.StrmSession()
+    session.open_library(str(library), prefetch=False)
+
+    job = session.start_generation_to([str(library), str(tmp_path / "mirror")])
+    job.wait()
+
+    assert job.errors == []
+    assert job.jobs[str(library)].stats.summary() == "0 created, 0 updated, 1 unchanged"
+    assert job.jobs[str(tmp_path / "mirror")].stats.summary() == "1 created, 0 updated, 0 unchanged"
+    assert read(tmp_path / "mirror" / "movie.strm") == "http://host/movie"
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    strm_engine.write_files(str(tmp_path), {"A/S01E01.strm": "http://host/a1"})
+    os.utime(tmp_path / "A" / "S01E01.strm", ns=(1, 1))
+
+    stats = strm_engine.write_files(str(tmp_path), {"A/S01E01.strm": "http://host/a1"})
+
+    assert stats.summary() == "0 created, 0 updated, 1 unchanged"
+    assert os.stat(tmp_path / "A" / "S01E01.strm").st_mtime_ns == 1
+
+
+def test_changed_files_are_rewritten(tmp_path):
+    strm_engine.write_files(str(tmp_path), {"A/S01E01.strm": "http://host/a1", "A/S01E02.strm": "http://host/a2"})
+
+    stats = strm_engine.write_files(str(tmp_path), {"A/S01E01.strm": "http://host/new",
+                                                    "A/S01E02.strm": "http://host/a2"})
+
+    assert stats.summary() == "0 created, 1 updated, 1 unchanged"
+    assert read(tmp_path / "A" / "S01E01.strm") == "http://host/new"
+
+
+def test_strict_mode_syncs_every_file_and_its_folder(tmp_path, monkeypatch):
+    synced_files = []
+    synced_folders = []
+    monkeypatch.setattr(strm_engine.os, "fsync", synced_files.append)
+    monkeypatch.setattr(strm_engine, "fsync_directory", synced_folders.append)
+
+    strm_engine.write_files(str(tmp_path), {"A/S01E01.strm": "http://host/a1", "B/S01E01.strm": "http://host/b1"},
+                            durability=strm_engine.DURABILITY_STRICT)
+
+    assert len(synced_files) == 2
+    assert sorted(synced_folders) == [str(tmp_path / "A"), str(tmp_path / "B")]
+    assert read(tmp_path / "B" / "S01E01.strm") == "http://host/b1"
+    assert [name for name in os.listdir(tmp_path / "A") if name.endswith(".tmp")] == []
+
+
+@pytest.mark.parametrize("manifest", ["{not json", "[]", '{"files": 3}'])
+def test_corrupt_manifest_is_rebuilt(tmp_path, manifest):
+    strm_engine.write_files(str(tmp_path), {"movie.strm": "http://host/movie"})
+    write(tmp_path / strm_engine.MANIFEST_FILE_NAME, manifest)
+
+    stats = strm_engine.write_files(str(tmp_path), {"movie.strm": "http://host/movie"})
+
+    assert stats.summary() == "0 created, 1 updated, 0 unchanged"  # Unknown hash, so written once more
+    assert strm_engine.WriteManifest(str(tmp_path)).hashes == {
+        "movie.strm": strm_engine.content_hash("http://host/movie")}
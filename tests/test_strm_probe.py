@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import strm_probe
+
+
+class ProbeHandler(BaseHTTPRequestHandler):
+    """Refuses HEAD, answers a ranged GET with one byte and records concurrency"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.server.requests.append(("HEAD", self.path, None))
+        self.send_response(405)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.requests.append(("GET", self.path, self.headers.get("Range")))
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(206)
+        self.send_header("Content-Range", "bytes 0-0/100")
+        self.send_header("Content-Length", "1")
+        self.end_headers()
+        self.wfile.write(b"x")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ProbeHandler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.active = 0
+    httpd.max_active = 0
+    httpd.delay = 0.0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_job(urls, tmp_path, **options):
+    job = strm_probe.ProbeJob(urls, cache_path=str(tmp_path / "cache.json"), **options).start()
+    assert job.finished.wait(30)
+    assert job.error is None
+    return job
+
+
+def test_refused_head_falls_back_to_ranged_get(server, tmp_path):
+    job = run_job([base_url(server) + "/video.mkv", base_url(server) + "/missing.mkv"], tmp_path)
+
+    ok = job.results[base_url(server) + "/video.mkv"]
+    assert ok.ok is True and ok.status == 206
+    assert [result.url for result in job.dead()] == [base_url(server) + "/missing.mkv"]
+    assert ("HEAD", "/video.mkv", None) in server.requests
+    assert ("GET", "/video.mkv", "bytes=0-0") in server.requests
+
+
+def test_per_host_limit_is_respected(server, tmp_path):
+    server.delay = 0.05
+    urls = [f"{base_url(server)}/episode{number}.mkv" for number in range(12)]
+
+    job = run_job(urls, tmp_path, per_host=2)
+
+    assert len(job.results) == 12
+    assert all(result.ok for result in job.results.values())
+    assert server.max_active == 2
+
+
+def test_cached_results_are_not_probed_again(server, tmp_path):
+    url = base_url(server) + "/video.mkv"
+    run_job([url], tmp_path)
+    server.requests.clear()
+
+    job = run_job([url], tmp_path)
+
+    assert job.results[url].ok is True
+    assert server.requests == []
+
+
+def test_expired_results_are_probed_again(server, tmp_path):
+    url = base_url(server) + "/video.mkv"
+    run_job([url], tmp_path)
+    server.requests.clear()
+
+    run_job([url], tmp_path, ttl=-1)
+
+    assert server.requests
+
+
+def test_load_applies_max_entries_and_ttl(tmp_path):
+    path = tmp_path / "cache.json"
+    now = time.time()
+    rows = [[f"http://host/{number}", True, 200, None, now] for number in range(52)]
+    rows.append(["http://host/old", True, 200, None, now - 2 * strm_probe.DEFAULT_TTL])
+    path.write_text(json.dumps({"version": 1, "results": rows}), encoding="utf-8")
+
+    cache = strm_probe.ProbeCache(str(path), max_entries=3)
+
+    assert list(cache.entries) == ["http://host/49", "http://host/50", "http://host/51"]
+    assert cache.changed
@@ -0,0 +1,105 @@
+import os
+
+import strm_sync
+
+
+def write_manifest(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write("show,season,episode,url\n")
+        for show, season, episode, url in rows:
+            file.write(f"{show},{season},{episode},{url}\n")
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def test_manifest_is_read_once_it_settled(tmp_path):
+    manifest = tmp_path / "list.csv"
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1")])
+    sync = strm_sync.ManifestSync(str(manifest), str(tmp_path / "out"), debounce=1.0)
+
+    assert sync.sync_once(now=100.0) is None  # Just seen
+    assert sync.sync_once(now=100.5) is None  # Still settling
+    result = sync.sync_once(now=101.0)
+
+    assert result.changed == 1
+    assert read(tmp_path / "out" / "A" / "S01E01.strm") == "http://host/a1"
+
+
+def test_change_during_debounce_restarts_the_wait(tmp_path):
+    manifest = tmp_path / "list.csv"
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1")])
+    sync = strm_sync.ManifestSync(str(manifest), str(tmp_path / "out"), debounce=1.0)
+    assert sync.sync_once(now=100.0) is None
+
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1"), ("A", 1, 2, "http://host/a2")])
+    os.utime(manifest, ns=(1, 1))  # A stamp that differs whatever the filesystem's timestamp resolution
+    assert sync.sync_once(now=100.9) is None
+    assert sync.sync_once(now=101.5) is None
+
+    assert sync.sync_once(now=101.9).changed == 2
+
+
+def test_only_changed_entries_are_written(tmp_path):
+    manifest = tmp_path / "list.csv"
+    out = tmp_path / "out"
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1"), ("A", 1, 2, "http://host/a2")])
+    sync = strm_sync.ManifestSync(str(manifest), str(out), debounce=0)
+    assert sync.sync_once().changed == 2
+
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1"), ("A", 1, 2, "http://host/new")])
+    os.utime(manifest, ns=(2, 2))
+    result = sync.sync_once()
+
+    assert (result.changed, result.stats.written) == (1, 1)
+    assert read(out / "A" / "S01E02.strm") == "http://host/new"
+
+
+def test_touched_manifest_writes_nothing(tmp_path):
+    manifest = tmp_path / "list.csv"
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1")])
+    sync = strm_sync.ManifestSync(str(manifest), str(tmp_path / "out"), debounce=0)
+    sync.sync_once()
+
+    os.utime(manifest, ns=(3, 3))
+    result = sync.sync_once()
+
+    assert result.manifests == [str(manifest)]
+    assert (result.changed, result.stats.total, result.errors) == (0, 0, [])
+    assert sync.sync_once() is None
+
+
+def test_failed_writes_are_retried(tmp_path):
+    manifest = tmp_path / "list.csv"
+    out = tmp_path / "out"
+    write_manifest(manifest, [("A", 1, 1, "http://host/a1"), ("B", 1, 1, "http://host/b1")])
+    out.mkdir()
+    (out / "A").write_text("not a folder")  # Blocks every file of show A
+    sync = strm_sync.ManifestSync(str(manifest), str(out), debounce=0)
+
+    result = sync.sync_once()
+    assert [os.path.dirname(file_name) for file_name, _ in result.errors] == ["A"]
+    assert read(out / "B" / "S01E01.strm") == "http://host/b1"
+
+    (out / "A").unlink()
+    result = sync.sync_once()
+
+    assert result is not None and result.errors == []
+    assert (result.changed, result.stats.written) == (1, 1)
+    assert read(out / "A" / "S01E01.strm") == "http://host/a1"
+    assert sync.sync_once() is None
+
+
+def test_entries_are_written_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(strm_sync, "SYNC_BATCH", 3)
+    manifest = tmp_path / "list.csv"
+    write_manifest(manifest, [("A", 1, episode, f"http://host/{episode}") for episode in range(1, 8)])
+    sync = strm_sync.ManifestSync(str(manifest), str(tmp_path / "out"), debounce=0)
+    batches = []
+    write = sync.write
+    sync.write = lambda batch, stats, errors: batches.append(len(batch)) or write(batch, stats, errors)
+
+    assert sync.sync_once().changed == 7
+    assert batches == [3, 3, 1]
@@ -0,0 +1,96 @@
+"""URL templates for filling whole seasons at once
+
+A template such as
+
+    {base}/{show_url}/S{season:02d}E{episode:02d}.mkv
+
+is parsed once by compile_url_template() into a render function that only
+concatenates pre-split literals and formatted values, so it can be applied
+to thousands of episodes in a few milliseconds.
+
+Available fields:
+    base      - base URL given separately
+    show      - show name as is
+    show_url  - show name quoted for use in a URL path
+    season    - season number (int, supports format specs like :02d)
+    episode   - episode number (int, supports format specs like :02d)
+"""
+import string
+from urllib.parse import quote
+
+from strm_engine import Entry
+
+TEMPLATE_FIELDS = ("base", "show", "show_url", "season", "episode")
+
+
+def compile_url_template(template):
+    """Parse template once and return render(show, season, episode, base="")
+
+    Raises ValueError for unknown fields or malformed templates.
+    """
+    parts = []  # (literal, field, format spec)
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError as e:
+        raise ValueError(f"Invalid URL template: {e}")
+    for literal, field, spec, conversion in parsed:
+        if field is not None:
+            if field not in TEMPLATE_FIELDS:
+                raise ValueError(f"Unknown template field {{{field}}}, use one of: {', '.join(TEMPLATE_FIELDS)}")
+            if conversion:
+                raise ValueError(f"Conversions like !{conversion} are not supported in URL templates")
+        parts.append((literal, field, spec or ""))
+
+    # Check the format specs now rather than on the first episode
+    for literal, field, spec in parts:
+        if field in ("season", "episode"):
+            try:
+                format(1, spec)
+            except ValueError as e:
+                raise ValueError(f"Invalid format for {{{field}}}: {e}")
+
+    def render(show, season, episode, base=""):
+        values = {
+            "base": base.rstrip("/"),
+            "show": show,
+            "show_url": quote(show),
+            "season": season,
+            "episode": episode,
+        }
+        return "".join(literal + (format(values[field], spec) if field is not None else "")
+                       for literal, field, spec in parts)
+
+    return render
+
+
+def parse_range(text):
+    """Parse "1-3,5,8-9" into a sorted list of numbers"""
+    numbers = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        try:
+            first = int(start)
+            last = int(end) if end else first
+        except ValueError:
+            raise ValueError(f"Invalid range: {part!r}")
+        if first < 0 or last < first:
+            raise ValueError(f"Invalid range: {part!r}")
+        numbers.update(range(first, last + 1))
+    if not numbers:
+        raise ValueError("Range is empty")
+    return sorted(numbers)
+
+
+def expand_template(render, show, seasons, episodes, base=""):
+    """Yield an Entry for every episode of every season
+
+    episodes is either a list of episode numbers used for every season or a
+    dict season -> list of episode numbers.
+    """
+    for season in seasons:
+        season_episodes = episodes[season] if isinstance(episodes, dict) else episodes
+        for episode in season_episodes:
+            yield Entry(show, season, episode, render(show, season, episode, base))
@@ -0,0 +1,226 @@
+"""Virtualized file list for the customtkinter GUI
+
+Only the rows that are visible (plus a few rows of overscan) exist as
+widgets. The widgets are kept in a pool and reused while scrolling, so
+building and scrolling the list costs the same for 50 or 50,000 files.
+"""
+import sys
+
+import customtkinter as ctk
+
+ROW_HEIGHT = 35  # Height of one button
+ROW_SPACING = 2  # Gap between buttons
+OVERSCAN = 3  # Extra rows kept above and below the visible area
+WHEEL_STEP = 3  # Rows scrolled per mouse wheel notch
+
+
+class VirtualFileList(ctk.CTkFrame):
+    """Scrollable list of file names backed by a small pool of reusable buttons"""
+
+    def __init__(self, master, command=None, selected_color="#3a7ebf", **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+
+        self.command = command  # Called with the file name when a row is clicked
+        self.selected_color = selected_color
+        self.items = []
+        self.positions = None  # Lazily built file name -> row index map
+        self.selected = None
+
+        # Scroll position in (unscaled) pixels from the top of the list
+        self.offset = 0
+        self.row_pitch = ROW_HEIGHT + ROW_SPACING
+
+        # Pool of row buttons; button k always shows an item index with index % len(pool) == k
+        self.pool = []
+        self.pool_state = []  # (item index, selected) currently shown by each pooled button
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.viewport)
+
+    def bind_wheel(self, widget):
+        """Scroll the list with the mouse wheel while the pointer is over widget"""
+        widget.bind("<MouseWheel>", self.on_mouse_wheel)
+        widget.bind("<Button-4>", self.on_mouse_wheel)
+        widget.bind("<Button-5>", self.on_mouse_wheel)
+
+    def set_items(self, items):
+        """Replace the listed file names"""
+        self.items = items
+        self.positions = None
+        self.offset = 0
+        self.reset_pool()
+        self.redraw()
+
+    def set_selected(self, item):
+        """Highlight item and scroll it into view
+
+        Unless the list has to scroll, only the rows of the previously and the
+        newly selected item are reconfigured.
+        """
+        previous = self.index_of(self.selected) if self.selected is not None else None
+        self.selected = item
+        index = self.index_of(item)
+
+        offset = self.offset
+        if index is not None:
+            self.see(index)
+        if self.offset == offset:  # see() already redrew everything if it scrolled
+            for row in (previous, index):
+                if row is not None:
+                    self.update_row(row)
+
+    def update_row(self, index):
+        """Refresh a single row if it currently has a widget"""
+        if not self.pool:
+            return
+        slot = index % len(self.pool)
+        state = self.pool_state[slot]
+        if state is not None and state[0] == index:
+            self.render_row(index, slot)
+
+    def index_of(self, item):
+        """Return the row index of item, or None if it is not listed"""
+        # The name -> row map is only built once a selection needs it
+        if self.positions is None:
+            self.positions = {name: index for index, name in enumerate(self.items)}
+        return self.positions.get(item)
+
+    def see(self, index):
+        """Scroll so that the row at index is fully visible"""
+        top = index * self.row_pitch
+        bottom = top + ROW_HEIGHT
+        height = self.viewport_height()
+        if top < self.offset:
+            self.scroll_to(top)
+        elif bottom > self.offset + height:
+            self.scroll_to(bottom - height)
+
+    def viewport_height(self):
+        """Visible height in unscaled pixels"""
+        return max(1, self._reverse_widget_scaling(self.viewport.winfo_height()))
+
+    def max_offset(self):
+        """Largest valid scroll offset"""
+        return max(0, len(self.items) * self.row_pitch - self.viewport_height())
+
+    def scroll_to(self, offset):
+        """Set the scroll offset and redraw"""
+        offset = int(max(0, min(offset, self.max_offset())))
+        if offset != self.offset:
+            self.offset = offset
+            self.redraw()
+
+    def on_scrollbar(self, action, value, unit=None):
+        """Handle scrollbar drags ('moveto') and clicks/wheel ('scroll')"""
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.items) * self.row_pitch)
+        elif action == "scroll":
+            self.scroll_to(self.offset + int(value) * self.row_pitch)
+
+    def on_mouse_wheel(self, event):
+        """Scroll a few rows per wheel notch"""
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_to(self.offset + delta * WHEEL_STEP * self.row_pitch)
+
+    def on_resize(self, event=None):
+        """Grow the pool when the visible area gets taller"""
+        needed = self.viewport_height() // self.row_pitch + 2 + 2 * OVERSCAN
+        if len(self.pool) < needed:
+            while len(self.pool) < needed:
+                self.pool.append(self.create_row())
+            # Every row has to be re-mapped, since index % len(pool) changed
+            self.reset_pool()
+        self.offset = min(self.offset, self.max_offset())
+        self.redraw()
+
+    def reset_pool(self):
+        """Unmap all pooled rows so the next redraw assigns them from scratch"""
+        for button in self.pool:
+            button.place_forget()
+        self.pool_state = [None] * len(self.pool)
+
+    def create_row(self):
+        """Create one reusable row button"""
+        button = ctk.CTkButton(
+            self.viewport,
+            text="",
+            anchor="w",
+            height=ROW_HEIGHT,
+            fg_color="transparent",
+            hover_color=("#e0e0e0", "#3a3a3a"),
+            text_color=("gray10", "gray90")
+        )
+        slot = len(self.pool)
+        button.configure(command=lambda: self.on_row_click(slot))
+        self.bind_wheel(button)
+        # The button is drawn on an internal canvas and label, which receive the events
+        for child in button.winfo_children():
+            self.bind_wheel(child)
+        return button
+
+    def on_row_click(self, slot):
+        """Forward a click on a pooled row to the command callback"""
+        state = self.pool_state[slot]
+        if state is not None and self.command is not None:
+            self.command(self.items[state[0]])
+
+    def visible_range(self):
+        """Return the first and last (exclusive) item index that has a widget"""
+        if not self.pool:
+            return 0, 0
+        first = max(0, self.offset // self.row_pitch - OVERSCAN)
+        last = min(len(self.items), first + len(self.pool))
+        return first, last
+
+    def render_row(self, index, slot):
+        """Show item index on the pooled button in slot"""
+        button = self.pool[slot]
+        state = self.pool_state[slot]
+        is_selected = self.items[index] == self.selected
+        # Only reconfigure a reused button when it shows a different row or state
+        if state == (index, is_selected):
+            return
+        if state is None or state[0] != index:
+            button.configure(text=self.items[index])
+        if state is None or state[1] != is_selected:
+            if is_selected:
+                button.configure(fg_color=self.selected_color, text_color=("white", "white"))
+            else:
+                button.configure(fg_color="transparent", text_color=("gray10", "gray90"))
+        self.pool_state[slot] = (index, is_selected)
+
+    def redraw(self):
+        """Place pooled rows for the visible range and update the scrollbar"""
+        first, last = self.visible_range()
+        pool_size = len(self.pool)
+        used = set()
+        for index in range(first, last):
+            slot = index % pool_size
+            used.add(slot)
+            self.render_row(index, slot)
+            self.pool[slot].place(x=0, y=index * self.row_pitch - self.offset, relwidth=1.0)
+
+        # Hide rows that are not needed (e.g. short lists)
+        for slot in range(pool_size):
+            if slot not in used and self.pool_state[slot] is not None:
+                self.pool[slot].place_forget()
+                self.pool_state[slot] = None
+
+        total = len(self.items) * self.row_pitch
+        if total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.viewport_height()) / total))